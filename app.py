@@ -6,6 +6,7 @@ from views.pedido_view import PedidoView
 from views.pedido_historico_view import PedidoHistoricoView
 from views.pedido_form_view import PedidoFormView
 from views.configuracoes_view import ConfiguracoesView
+from views.importacao_view import ImportacaoView
 from pathlib import Path
 
 # Carregar variáveis de ambiente
@@ -88,6 +89,11 @@ def main():
             
         st.sidebar.markdown('<div style="margin: 0.2rem 0;"></div>', unsafe_allow_html=True)
             
+        if st.sidebar.button("📥 Importar Pedidos", use_container_width=True):
+            st.session_state.menu_atual = "📥 Importação"
+            
+        st.sidebar.markdown('<div style="margin: 0.2rem 0;"></div>', unsafe_allow_html=True)
+            
         if st.sidebar.button("⚙️ Configurações", use_container_width=True):
             st.session_state.menu_atual = "⚙️ Configurações"
         
@@ -100,6 +106,7 @@ def main():
             st.markdown("""
             - 📝 **Novo Pedido**: Criar requisição
             - 📋 **Histórico**: Ver/Imprimir pedidos
+            - 📥 **Importar**: Vários pedidos de uma planilha
             """)
             
             st.markdown("---")
@@ -111,6 +118,8 @@ def main():
                 3. Selecione o RACK
                 4. Escolha a localização
                 5. Preencha os dados
+                6. Para várias posições do mesmo RACK, use
+                   "🛒 Adicionar ao carrinho" e crie um único pedido
                 """)
             
             with st.expander("Como imprimir um pedido?"):
@@ -126,13 +135,16 @@ def main():
         # Inicializar views
         pedido_view = PedidoView(pedido_controller)
         historico_view = PedidoHistoricoView(pedido_controller)
-        configuracoes_view = ConfiguracoesView()
+        configuracoes_view = ConfiguracoesView(pedido_controller)
+        importacao_view = ImportacaoView(pedido_controller)
         
         # Mostrar interface baseado na seleção do menu
         if "Novo Pedido" in st.session_state.menu_atual:
             pedido_view.mostrar_interface()
         elif "Histórico" in st.session_state.menu_atual:
             historico_view.mostrar_interface()
+        elif "Importação" in st.session_state.menu_atual:
+            importacao_view.mostrar_interface()
         else:
             configuracoes_view.mostrar_interface()
         
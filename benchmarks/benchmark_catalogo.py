@@ -0,0 +1,69 @@
+"""
+Benchmark da carga do catálogo de posições em função do número de linhas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.benchmark_catalogo --linhas 1000 10000 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_mapeamento
+from models.catalogo import COLUNAS_PLANILHA, Catalogo
+from models.pedido import Pedido
+
+def carregar_iterrows(df: pd.DataFrame):
+    """Caminho antigo de _carregar_planilha, mantido apenas para comparação"""
+    df = df.rename(columns=COLUNAS_PLANILHA)
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].fillna('').astype(str).str.strip()
+    return [
+        Pedido(
+            id=idx + 1,
+            rack=row['rack'],
+            cod_yazaki=row['cod_yazaki'],
+            codigo_cabo=row['codigo_cabo'],
+            seccao=row['seccao'],
+            cor=row['cor'],
+            cliente=row['cliente'],
+            locacao=row['locacao'],
+            projeto=row['projeto'],
+            cod_oes=row['cod_oes']
+        )
+        for idx, row in df.iterrows()
+    ]
+
+def medir(funcao, *args) -> float:
+    inicio = time.perf_counter()
+    funcao(*args)
+    return (time.perf_counter() - inicio) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'linhas':>8} {'leitura xlsx':>14} {'iterrows':>12} {'vetorizado':>12} {'ganho':>8}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for linhas in args.linhas:
+            caminho = os.path.join(diretorio, f'mapeamento_{linhas}.xlsx')
+            gerar_mapeamento(caminho, linhas)
+
+            inicio = time.perf_counter()
+            df = pd.read_excel(
+                caminho,
+                sheet_name='Projeto',
+                dtype={coluna: str for coluna in COLUNAS_PLANILHA}
+            )
+            leitura = (time.perf_counter() - inicio) * 1000
+
+            antigo = medir(carregar_iterrows, df.copy())
+            novo = medir(lambda d: Catalogo.from_dataframe(d).pedidos, df.copy())
+            print(f"{linhas:>8} {leitura:>11.0f} ms {antigo:>9.0f} ms {novo:>9.0f} ms {antigo / novo:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
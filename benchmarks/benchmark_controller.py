@@ -0,0 +1,266 @@
+"""
+Benchmark dos caminhos críticos do PedidoController em função do histórico.
+
+Para cada tamanho gera (ou reaproveita de --dados) um mapeamento e um
+pedidos.xlsx sintéticos e mede, num processo separado e com a sincronização
+do GitHub desligada: _carregar_planilha, salvar_pedido, buscar_pedidos,
+get_pedido_detalhes, atualizar_status_pedido e _fazer_backup. O resultado vai
+para um JSON que pode ser comparado com o de outra execução.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.benchmark_controller --linhas 1000 10000 100000 --saida atual.json
+    python -m benchmarks.benchmark_controller --linhas 1000000 --dados /var/tmp/bench
+    python -m benchmarks.benchmark_controller --comparar base.json atual.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List
+
+from benchmarks.dados_sinteticos import gerar_mapeamento, gerar_pedidos
+
+VERSAO_FORMATO = 1
+# Diferenças menores que isso são ruído na comparação, qualquer que seja a razão
+DIFERENCA_MINIMA_MS = 1.0
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def resumir(amostras: List[float]) -> Dict[str, float]:
+    """A primeira amostra (caches frios) fica à parte; o resto vira mediana/p95"""
+    quentes = sorted(amostras[1:] or amostras)
+    return {
+        "primeira_ms": round(amostras[0], 3),
+        "mediana_ms": round(statistics.median(quentes), 3),
+        "p95_ms": round(quentes[min(len(quentes) - 1, int(len(quentes) * 0.95))], 3),
+        "min_ms": round(quentes[0], 3),
+        "max_ms": round(quentes[-1], 3),
+        "amostras": len(amostras)
+    }
+
+def cronometrar(funcao: Callable[[int], object], repeticoes: int) -> Dict[str, float]:
+    amostras = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        amostras.append((time.perf_counter() - inicio) * 1000)
+    return resumir(amostras)
+
+def preparar_dados(diretorio: str, linhas: int, linhas_mapeamento: int, semente: int) -> Dict[str, str]:
+    """Gera as planilhas do tamanho pedido, a menos que já existam em `diretorio`"""
+    os.makedirs(diretorio, exist_ok=True)
+    mapeamento = os.path.join(diretorio, f"mapeamento_{linhas_mapeamento}_{semente}.xlsx")
+    pedidos = os.path.join(diretorio, f"pedidos_{linhas}_{linhas_mapeamento}_{semente}.xlsx")
+    if not os.path.exists(mapeamento):
+        gerar_mapeamento(mapeamento, linhas_mapeamento, semente)
+    if not os.path.exists(pedidos):
+        gerar_pedidos(pedidos, linhas, linhas_mapeamento, semente)
+    return {"mapeamento": mapeamento, "pedidos": pedidos}
+
+def executar_tamanho(linhas: int, mapeamento: str, pedidos: str, repeticoes: int, semente: int) -> Dict:
+    """Mede um tamanho no diretório atual (chamado no processo filho)"""
+    os.makedirs('pedidos', exist_ok=True)
+    shutil.copy(pedidos, os.path.join('pedidos', 'pedidos.xlsx'))
+    caminho_mapeamento = os.path.join('pedidos', 'Mapeamento de Racks - Cabos.xlsx')
+    shutil.copy(mapeamento, caminho_mapeamento)
+    # Planilha gerada já no layout atual: a migração não entra na medição
+    from models.esquema import STATUS_PEDIDOS, VERSAO_ESQUEMA
+    with open(os.path.join('pedidos', 'versao_esquema.txt'), 'w', encoding='utf-8') as f:
+        f.write(str(VERSAO_ESQUEMA))
+
+    # Sincronização com o GitHub desligada: o worker nunca chama o git
+    from utils.sync_worker import SyncWorker
+    SyncWorker._instancia = SyncWorker(lambda: (True, "benchmark"), janela=3600)
+
+    from controllers.pedido_controller import PedidoController
+    aleatorio = random.Random(semente)
+    resultados: Dict[str, Dict] = {}
+
+    inicio = time.perf_counter()
+    controller = PedidoController(caminho_mapeamento)
+    resultados["inicializacao"] = resumir([(time.perf_counter() - inicio) * 1000])
+
+    resultados["_carregar_planilha"] = cronometrar(
+        lambda _: PedidoController._carregar_planilha(caminho_mapeamento), repeticoes
+    )
+    catalogo = controller.carregar_catalogo().pedidos
+
+    def salvar(_):
+        posicao = aleatorio.choice(catalogo)
+        controller.salvar_pedido({
+            "cliente": posicao.cliente,
+            "rack": posicao.rack,
+            "locacao": posicao.locacao,
+            "solicitante": "Benchmark",
+            "observacoes": "",
+            "data": datetime.now(),
+            "itens": [{
+                "cod_yazaki": posicao.cod_yazaki,
+                "codigo_cabo": posicao.codigo_cabo,
+                "seccao": posicao.seccao,
+                "cor": posicao.cor,
+                "quantidade": 1
+            }]
+        })
+    resultados["salvar_pedido"] = cronometrar(salvar, repeticoes)
+
+    hoje = date.today()
+    resultados["buscar_pedidos"] = cronometrar(
+        lambda _: controller.buscar_pedidos(
+            status="Pendente", offset=0, limit=25, ordenar_por=[("Data", False)]
+        ),
+        repeticoes
+    )
+    resultados["buscar_pedidos_termo"] = cronometrar(
+        lambda _: controller.buscar_pedidos(
+            termo=aleatorio.choice(catalogo).rack, offset=0, limit=25
+        ),
+        repeticoes
+    )
+    resultados["buscar_pedidos_periodo"] = cronometrar(
+        lambda _: controller.buscar_pedidos(
+            data_inicio=hoje - timedelta(days=30), data_fim=hoje, offset=0, limit=25,
+            ordenar_por=[("Numero_Pedido", False)]
+        ),
+        repeticoes
+    )
+
+    numeros = [f"REQ-{aleatorio.randint(1, linhas):03d}" for _ in range(repeticoes)]
+    resultados["get_pedido_detalhes"] = cronometrar(
+        lambda i: controller.get_pedido_detalhes(numeros[i]), repeticoes
+    )
+    resultados["atualizar_status_pedido"] = cronometrar(
+        lambda i: controller.atualizar_status_pedido(
+            numeros[i], aleatorio.choice(STATUS_PEDIDOS), "Benchmark"
+        ),
+        repeticoes
+    )
+    resultados["_fazer_backup"] = cronometrar(
+        lambda _: controller.armazenamento._fazer_backup(), repeticoes
+    )
+    return resultados
+
+def medir_em_processo(linhas: int, arquivos: Dict[str, str], repeticoes: int, semente: int) -> Dict:
+    """Roda executar_tamanho num processo novo, com caches frios e diretório próprio"""
+    with tempfile.TemporaryDirectory() as trabalho:
+        saida = os.path.join(trabalho, 'resultado.json')
+        comando = [
+            sys.executable, '-m', 'benchmarks.benchmark_controller', '--filho',
+            '--linhas', str(linhas), '--repeticoes', str(repeticoes), '--semente', str(semente),
+            '--mapeamento-arquivo', arquivos["mapeamento"], '--pedidos-arquivo', arquivos["pedidos"],
+            '--saida', saida
+        ]
+        ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            filter(None, [RAIZ_PROJETO, os.environ.get('PYTHONPATH')])
+        ))
+        subprocess.run(comando, cwd=trabalho, env=ambiente, check=True)
+        with open(saida, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+def commit_atual() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ_PROJETO,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+
+def comparar(base: Dict, atual: Dict, tolerancia: float) -> bool:
+    """
+    Imprime a razão atual/base da mediana e da primeira chamada (caches frios);
+    retorna True se alguma piorou além da tolerância
+    """
+    regressao = False
+    print(f"{'linhas':>8} {'operação':<26} {'mediana base → atual':>26} {'1ª chamada base → atual':>30}")
+    for linhas, operacoes in atual["resultados"].items():
+        for operacao, medida in operacoes.items():
+            anterior = base["resultados"].get(linhas, {}).get(operacao)
+            if anterior is None:
+                continue
+            colunas = []
+            piorou = False
+            for chave in ("mediana_ms", "primeira_ms"):
+                antes, depois = anterior[chave], medida[chave]
+                razao = depois / antes if antes else 1.0
+                if razao > 1 + tolerancia and depois - antes > DIFERENCA_MINIMA_MS:
+                    piorou = True
+                colunas.append(f"{antes:>8.1f} → {depois:>8.1f} ms {razao:>5.2f}x")
+            regressao = regressao or piorou
+            print(f"{linhas:>8} {operacao:<26} {colunas[0]:>26} {colunas[1]:>30}"
+                  f"{'  ← regressão' if piorou else ''}")
+    return regressao
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--mapeamento', type=int, default=None,
+                        help="Linhas do mapeamento (padrão: o mesmo número de pedidos)")
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--dados', default=None,
+                        help="Pasta para guardar e reaproveitar as planilhas geradas")
+    parser.add_argument('--saida', default='benchmark_controller.json')
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'ATUAL'))
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="Aumento relativo da mediana considerado regressão")
+    parser.add_argument('--filho', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mapeamento-arquivo', help=argparse.SUPPRESS)
+    parser.add_argument('--pedidos-arquivo', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.comparar:
+        arquivos = []
+        for caminho in args.comparar:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                arquivos.append(json.load(f))
+        sys.exit(1 if comparar(*arquivos, args.tolerancia) else 0)
+
+    if args.filho:
+        resultados = executar_tamanho(
+            args.linhas[0], args.mapeamento_arquivo, args.pedidos_arquivo,
+            args.repeticoes, args.semente
+        )
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f)
+        # Threads de fundo (monitor, fila, sync) não seguram o processo
+        os._exit(0)
+
+    import pandas as pd
+    relatorio = {
+        "versao": VERSAO_FORMATO,
+        "executado_em": datetime.now().isoformat(timespec='seconds'),
+        "commit": commit_atual(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "backend": os.getenv('BACKEND_PEDIDOS', 'xlsx'),
+        "repeticoes": args.repeticoes,
+        "semente": args.semente,
+        "resultados": {}
+    }
+    with tempfile.TemporaryDirectory() as temporario:
+        dados = args.dados or temporario
+        for linhas in args.linhas:
+            inicio = time.perf_counter()
+            arquivos = preparar_dados(dados, linhas, args.mapeamento or linhas, args.semente)
+            print(f"{linhas} linhas: dados prontos em {time.perf_counter() - inicio:.1f} s", flush=True)
+            resultados = medir_em_processo(linhas, arquivos, args.repeticoes, args.semente)
+            relatorio["resultados"][str(linhas)] = resultados
+            for operacao, medida in resultados.items():
+                print(f"  {operacao:<26} 1ª {medida['primeira_ms']:>9.1f} ms   "
+                      f"mediana {medida['mediana_ms']:>8.1f} ms   p95 {medida['p95_ms']:>8.1f} ms")
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {args.saida}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Geração de planilhas sintéticas para os benchmarks"""
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+from openpyxl import Workbook
+
+from models.catalogo import COLUNAS_PLANILHA
+from models.esquema import COLUNAS_ITENS, COLUNAS_PEDIDOS, FORMATO_DATA, STATUS_PEDIDOS
+
+# Poucos clientes concentram a maior parte das posições, como na planta
+CLIENTES = ['Renault', 'Ford', 'Volkswagen', 'Stellantis', 'Toyota', 'Honda', 'GM', 'Nissan']
+PESOS_CLIENTES = [30, 20, 15, 12, 8, 7, 5, 3]
+CORES = ['PT', 'VM', 'AZ', 'BR', 'AM', 'VD', 'CZ', 'MR', 'LR', 'VT']
+SECCOES = ['0.35', '0.5', '0.75', '1.0', '1.5', '2.5', '4.0', '6.0']
+POSICOES_POR_RACK = 48
+SOLICITANTES = ['Ana Souza', 'Bruno Lima', 'Carla Dias', 'Diego Alves', 'Elaine Rocha',
+                'Fábio Costa', 'Gisele Nunes', 'Hugo Martins']
+RESPONSAVEIS = ['Almoxarifado 1', 'Almoxarifado 2', 'Líder de turno']
+# Os mesmos status da tela de histórico: o último encerra o pedido
+*STATUS_ABERTOS, STATUS_CONCLUIDO = STATUS_PEDIDOS
+
+def gerar_linhas_mapeamento(linhas: int, semente: int = 42) -> List[list]:
+    """Linhas da aba 'Projeto' distribuídas em racks de POSICOES_POR_RACK posições"""
+    aleatorio = random.Random(semente)
+    resultado = []
+    rack_atual = None
+    for i in range(linhas):
+        if i % POSICOES_POR_RACK == 0:
+            cliente = aleatorio.choices(CLIENTES, PESOS_CLIENTES)[0]
+            rack_atual = f"R{i // POSICOES_POR_RACK + 1:04d}"
+        posicao = i % POSICOES_POR_RACK
+        resultado.append([
+            rack_atual,
+            f"{aleatorio.randint(7000000, 7999999)}",
+            f"CB-{aleatorio.randint(10000, 99999)}",
+            aleatorio.choice(SECCOES),
+            aleatorio.choice(CORES),
+            cliente,
+            f"{chr(ord('A') + posicao // 12)}{posicao % 12 + 1:02d}",
+            f"PRJ-{aleatorio.randint(1, 40):02d}",
+            f" OES{aleatorio.randint(100, 999)} "  # espaços extras, como na planilha real
+        ])
+    return resultado
+
+def gerar_mapeamento(caminho: str, linhas: int, semente: int = 42):
+    """Grava uma planilha de mapeamento com a aba 'Projeto'"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Projeto')
+    ws.append(list(COLUNAS_PLANILHA))
+    for linha in gerar_linhas_mapeamento(linhas, semente):
+        ws.append(linha)
+    wb.save(caminho)
+
+def gerar_pedidos(caminho: str, linhas: int, linhas_mapeamento: int, semente: int = 42,
+                  dias: int = 365):
+    """
+    Grava um pedidos.xlsx (abas Pedidos/Itens) já no layout atual do esquema.
+
+    Os pedidos apontam para posições do mapeamento gerado com a mesma semente,
+    com os primeiros racks mais requisitados; as datas avançam ao longo de
+    `dias` até agora. Quase todo o histórico está Concluído e só a ponta final
+    segue Pendente ou Em Processamento. A maioria dos pedidos tem um item.
+    """
+    aleatorio = random.Random(semente)
+    posicoes = gerar_linhas_mapeamento(linhas_mapeamento, semente)
+    fim = datetime.now().replace(second=0, microsecond=0)
+    inicio = fim - timedelta(days=dias)
+    passo = (fim - inicio) / max(linhas, 1)
+    abertos = max(1, linhas // 50)
+
+    wb = Workbook(write_only=True)
+    ws_pedidos = wb.create_sheet('Pedidos')
+    ws_itens = wb.create_sheet('Itens')
+    ws_pedidos.append(COLUNAS_PEDIDOS)
+    ws_itens.append(COLUNAS_ITENS)
+    for i in range(linhas):
+        numero = f"REQ-{i + 1:03d}"
+        data = inicio + passo * i + timedelta(minutes=aleatorio.randint(0, 30))
+        posicao = posicoes[int(len(posicoes) * aleatorio.random() ** 2)]
+        rack, cod_yazaki, codigo_cabo, seccao, cor, cliente, locacao = posicao[:7]
+
+        if i >= linhas - abertos:
+            status = aleatorio.choices(STATUS_ABERTOS, [60, 40])[0]
+        else:
+            status = STATUS_CONCLUIDO
+        if status == 'Pendente':
+            atualizacao, responsavel = "", ""
+        else:
+            atualizacao = min(data + timedelta(hours=aleatorio.randint(1, 8)), fim).strftime(FORMATO_DATA)
+            responsavel = aleatorio.choice(RESPONSAVEIS)
+
+        ws_pedidos.append([
+            numero,
+            data.strftime(FORMATO_DATA),
+            cliente,
+            rack,
+            locacao,
+            aleatorio.choice(SOLICITANTES),
+            "Urgente" if aleatorio.random() < 0.1 else "",
+            status,
+            atualizacao,
+            responsavel
+        ])
+        ws_itens.append([numero, cod_yazaki, codigo_cabo, seccao, cor, aleatorio.randint(1, 10)])
+        for _ in range(aleatorio.choices([0, 1, 2], [90, 7, 3])[0]):
+            extra = posicoes[aleatorio.randrange(len(posicoes))]
+            ws_itens.append([numero, extra[1], extra[2], extra[3], extra[4], aleatorio.randint(1, 10)])
+    wb.save(caminho)
@@ -1,10 +1,22 @@
 import pandas as pd
-from datetime import datetime
+from datetime import date, datetime
 from models.pedido import Pedido
-from typing import List, Optional
-import streamlit as st
+from models.catalogo import Catalogo, ConsultaCatalogo, DiferencaCatalogo, IndiceCatalogo
+from typing import List, Optional, Tuple, Union
 import os
 import shutil
+from utils.armazenamento import ArmazenamentoPedidos
+from utils.diagnostico import instrumentar
+from utils.exportacao_pdf import ExportadorPDF
+from utils.fila_escrita import FilaEscrita
+from utils.importacao_pedidos import ResultadoImportacao, ler_arquivo_importacao, validar_importacao
+from utils.indice_busca import IndiceBusca
+from utils.indice_pedidos import IndicePedidos
+from utils.monitor_catalogo import MonitorCatalogo
+from utils.print_manager import SpoolerImpressao
+from utils.renderizador_pdf import RenderizadorPDF
+from utils.sequencia_pedidos import SequenciaPedidos
+from utils.sync_worker import SyncWorker
 
 class PedidoController:
     def __init__(self, caminho_planilha: str):
@@ -18,297 +30,339 @@ class PedidoController:
         self.arquivo_pedidos = os.path.join('pedidos', 'pedidos.xlsx')
         self.diretorio_backup = os.path.join('pedidos', 'backup')
         
-        # Criar diretório de backup se não existir
-        os.makedirs(self.diretorio_backup, exist_ok=True)
+        # Backend de armazenamento definido em BACKEND_PEDIDOS (xlsx por padrão)
+        self.armazenamento = ArmazenamentoPedidos.get_instance(
+            self.arquivo_pedidos,
+            self.diretorio_backup
+        )
+        self.fila_escrita = FilaEscrita.get_instance(self.armazenamento)
+        self.indice_busca = IndiceBusca.get_instance(self.armazenamento)
+        self.indice_pedidos = IndicePedidos.get_instance(self.armazenamento)
+        # Os índices recebem cada lote na thread de gravação, na ordem do commit
+        self.fila_escrita.adicionar_ouvinte(self.indice_busca.aplicar)
+        self.fila_escrita.adicionar_ouvinte(self.indice_pedidos.aplicar)
+        SyncWorker.get_instance().adicionar_preparacao(self.armazenamento.preparar_sincronizacao)
+        self.spooler = SpoolerImpressao.get_instance(os.path.join('pedidos', 'impressao'))
+        self.sequencia = SequenciaPedidos(
+            os.path.join('pedidos', 'sequencia_pedidos.txt'),
+            self._maior_numero_existente
+        )
 
     @staticmethod
-    @st.cache_data
+    def _monitor_catalogo(caminho: str) -> MonitorCatalogo:
+        return MonitorCatalogo.get_instance(caminho, os.path.join('pedidos', 'cache'))
+
+    @staticmethod
+    @instrumentar()
     def _carregar_planilha(caminho: str) -> List[Pedido]:
+        """Visão de compatibilidade: o catálogo como lista de Pedido"""
+        try:
+            return PedidoController._monitor_catalogo(caminho).obter().pedidos
+        except Exception as e:
+            raise Exception(f"Erro ao carregar dados da planilha: {str(e)}")
+
+    @instrumentar()
+    def carregar_catalogo(self) -> Catalogo:
         """
-        Carrega os dados da planilha com cache do Streamlit para melhor performance
+        Retorna o catálogo da versão atual da planilha de mapeamento. O catálogo
+        é compartilhado entre as sessões e recarregado (com atualização
+        incremental do índice) quando a planilha muda.
         """
         try:
-            # Lê a aba específica 'Projeto' da planilha
-            df = pd.read_excel(
-                caminho, 
-                sheet_name='Projeto',
-                dtype={
-                    'RACK': str,
-                    'CÓD Yazaki': str,
-                    'Codigo Cabo': str,
-                    'Secção': str,
-                    'Cor': str,
-                    'Cliente': str,
-                    'Locação': str,
-                    'Projeto': str,
-                    'Cod OES': str
-                }
-            )
-            
-            # Mapeia os nomes das colunas da planilha
-            colunas_mapeadas = {
-                'RACK': 'rack',
-                'CÓD Yazaki': 'cod_yazaki',
-                'Codigo Cabo': 'codigo_cabo',
-                'Secção': 'seccao',
-                'Cor': 'cor',
-                'Cliente': 'cliente',
-                'Locação': 'locacao',
-                'Projeto': 'projeto',
-                'Cod OES': 'cod_oes'
-            }
-            
-            # Renomeia as colunas para corresponder aos nomes dos atributos da classe
-            df = df.rename(columns=colunas_mapeadas)
-            
-            # Limpa os dados
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].fillna('').astype(str).str.strip()
-            
-            # Converte o DataFrame para lista de objetos Pedido
-            pedidos = [
-                Pedido(
-                    id=idx + 1,
-                    rack=row['rack'],
-                    cod_yazaki=row['cod_yazaki'],
-                    codigo_cabo=row['codigo_cabo'],
-                    seccao=row['seccao'],
-                    cor=row['cor'],
-                    cliente=row['cliente'],
-                    locacao=row['locacao'],
-                    projeto=row['projeto'],
-                    cod_oes=row['cod_oes']
-                )
-                for idx, row in df.iterrows()
-            ]
-            
-            return pedidos
-            
+            return self._monitor_catalogo(self.caminho_planilha).obter()
         except Exception as e:
             raise Exception(f"Erro ao carregar dados da planilha: {str(e)}")
 
+    def alteracoes_catalogo(self) -> List[DiferencaCatalogo]:
+        """Mudanças detectadas na planilha de mapeamento, da mais recente para a mais antiga"""
+        return self._monitor_catalogo(self.caminho_planilha).diferencas()
+
     def carregar_dados(self):
         """Carrega os dados usando a função cacheada"""
-        self.pedidos = self._carregar_planilha(self.caminho_planilha)
+        self.pedidos = self.carregar_catalogo().pedidos
         return self.pedidos
 
-    def _fazer_backup(self):
-        """Faz backup do arquivo antes de modificá-lo"""
-        if os.path.exists(self.arquivo_pedidos):
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_path = os.path.join(
-                self.diretorio_backup, 
-                f"pedidos_backup_{timestamp}.xlsx"
-            )
-            
-            # Copiar arquivo atual para backup
-            pd.read_excel(self.arquivo_pedidos).to_excel(backup_path, index=False)
-            
-            # Manter apenas os últimos 10 backups
-            backups = sorted([
-                os.path.join(self.diretorio_backup, f) 
-                for f in os.listdir(self.diretorio_backup)
-                if f.endswith('.xlsx')
-            ])
-            while len(backups) > 10:
-                os.remove(backups.pop(0))
+    def obter_indice(self) -> IndiceCatalogo:
+        """Índice cliente → RACK → locação da versão atual do catálogo"""
+        return self.carregar_catalogo().indice
 
     def _ler_pedidos(self) -> pd.DataFrame:
         """Lê a planilha de pedidos"""
-        try:
-            if not os.path.exists(self.arquivo_pedidos):
-                return pd.DataFrame(columns=[
-                    "Numero_Pedido", "Data", "Cliente", "RACK", "Localizacao",
-                    "Solicitante", "Observacoes", "Status", "Ultima_Atualizacao",
-                    "Responsavel_Atualizacao"
-                ])
-            df = pd.read_excel(self.arquivo_pedidos, sheet_name='Pedidos')
-
-            # Garantir que as colunas 'Ultima_Atualizacao' e 'Responsavel_Atualizacao' existam
-            if 'Ultima_Atualizacao' not in df.columns:
-                df['Ultima_Atualizacao'] = ""
-            if 'Responsavel_Atualizacao' not in df.columns:
-                df['Responsavel_Atualizacao'] = ""
-
-            return df
-        except Exception as e:
-            raise Exception(f"Erro ao ler pedidos: {str(e)}")
+        return self.armazenamento.ler_pedidos()
 
     def _ler_itens(self) -> pd.DataFrame:
         """Lê a planilha de itens"""
+        return self.armazenamento.ler_itens()
+
+    def alteracoes_pendentes(self) -> int:
+        """Quantidade de alterações ainda não gravadas em pedidos.xlsx"""
+        return self.armazenamento.alteracoes_pendentes()
+
+    @instrumentar()
+    def consolidar_planilha(self) -> int:
+        """Grava o estado atual em pedidos.xlsx (compactação do journal ou exportação)"""
+        return self.armazenamento.consolidar_planilha()
+
+    def listar_backups(self) -> List[dict]:
+        """Lista os backups disponíveis, do mais recente para o mais antigo"""
+        return self.armazenamento.listar_backups()
+
+    @instrumentar()
+    def restaurar_backup(self, backup_id: str):
+        """Restaura um backup de pedidos.xlsx"""
         try:
-            if not os.path.exists(self.arquivo_pedidos):
-                return pd.DataFrame(columns=[
-                    "Numero_Pedido", "cod_yazaki", "codigo_cabo", "seccao",
-                    "cor", "quantidade"
-                ])
-            return pd.read_excel(self.arquivo_pedidos, sheet_name='Itens')
+            self.armazenamento.restaurar_backup(backup_id)
+            self.indice_busca.invalidar()
+            self.indice_pedidos.invalidar()
         except Exception as e:
-            raise Exception(f"Erro ao ler itens: {str(e)}")
+            raise Exception(f"Erro ao restaurar backup: {str(e)}")
+
+    @instrumentar()
+    def relatorio_memoria(self) -> dict:
+        """Memória da tabela de pedidos no esquema tipado versus só texto"""
+        return self.indice_pedidos.relatorio_memoria()
 
+    @instrumentar()
+    def _maior_numero_existente(self) -> int:
+        """Maior número REQ-NNN já gravado (usado para reconstruir a sequência)"""
+        df = self.armazenamento.ler_pedidos(["Numero_Pedido"])
+        if df.empty:
+            return 0
+        return max(SequenciaPedidos.extrair_numero(n) for n in df["Numero_Pedido"])
+
+    @instrumentar()
     def _gerar_numero_pedido(self) -> str:
         """Gera um número único para o pedido"""
-        try:
-            df = self._ler_pedidos()
-            if df.empty:
-                return "REQ-001"
-            ultimo_numero = df["Numero_Pedido"].iloc[-1]
-            numero = int(ultimo_numero.split("-")[1]) + 1
-            return f"REQ-{numero:03d}"
-        except:
-            return "REQ-001"
+        return self.sequencia.proximo()
+
+    @instrumentar()
+    def reservar_numeros_pedido(self, quantidade: int) -> List[str]:
+        """Reserva um bloco de números de pedido consecutivos"""
+        return self.sequencia.reservar(quantidade)
+
+    @instrumentar()
+    def _gravar(self, *alteracoes: dict):
+        """
+        Grava as alterações pela fila de escrita, todas na mesma gravação; os
+        índices já estão atualizados quando a chamada retorna
+        """
+        self.fila_escrita.enviar_lote(list(alteracoes)).result()
+
+    @staticmethod
+    def _montar_registros(numero_pedido: str, pedido_info: dict) -> Tuple[dict, List[dict]]:
+        """Linha do pedido e linhas dos itens, no formato das planilhas"""
+        novo_pedido = {
+            "Numero_Pedido": numero_pedido,
+            "Data": pedido_info["data"].strftime('%d/%m/%Y %H:%M'),
+            "Cliente": pedido_info["cliente"],
+            "RACK": pedido_info["rack"],
+            "Localizacao": pedido_info["locacao"],
+            "Solicitante": pedido_info["solicitante"],
+            "Observacoes": pedido_info["observacoes"] if pedido_info["observacoes"] else "",
+            "Status": "Pendente",
+            "Ultima_Atualizacao": "",
+            "Responsavel_Atualizacao": ""
+        }
+        novos_itens = [
+            {
+                "Numero_Pedido": numero_pedido,
+                "cod_yazaki": item["cod_yazaki"],
+                "codigo_cabo": item["codigo_cabo"],
+                "seccao": item["seccao"],
+                "cor": item["cor"],
+                "quantidade": int(item["quantidade"])
+            }
+            for item in pedido_info["itens"]
+        ]
+        return novo_pedido, novos_itens
 
+    @instrumentar()
     def salvar_pedido(self, pedido_info: dict) -> str:
-        """Salva o pedido e sincroniza com GitHub"""
-        from utils.github_sync import GitHubSync
-        
+        """Salva o pedido e agenda a sincronização com GitHub"""
         numero_pedido = self._gerar_numero_pedido()
         
         try:
-            # Carregar dados existentes
-            df_pedidos = self._ler_pedidos()
-            df_itens = self._ler_itens()
-            
-            # Criar novo registro de pedido
-            novo_pedido = pd.DataFrame([{
-                "Numero_Pedido": numero_pedido,
-                "Data": pedido_info["data"].strftime('%d/%m/%Y %H:%M'),
-                "Cliente": pedido_info["cliente"],
-                "RACK": pedido_info["rack"],
-                "Localizacao": pedido_info["locacao"],
-                "Solicitante": pedido_info["solicitante"],
-                "Observacoes": pedido_info["observacoes"] if pedido_info["observacoes"] else "",
-                "Status": "Pendente"
-            }])
-            
-            # Criar registros de itens
-            novos_itens = []
-            for item in pedido_info["itens"]:
-                novos_itens.append({
-                    "Numero_Pedido": numero_pedido,
-                    "cod_yazaki": item["cod_yazaki"],
-                    "codigo_cabo": item["codigo_cabo"],
-                    "seccao": item["seccao"],
-                    "cor": item["cor"],
-                    "quantidade": item["quantidade"]
-                })
-            
-            df_novos_itens = pd.DataFrame(novos_itens)
+            novo_pedido, novos_itens = self._montar_registros(numero_pedido, pedido_info)
             
-            # Concatenar com os dados existentes
-            df_pedidos = pd.concat([df_pedidos, novo_pedido], ignore_index=True)
-            df_itens = pd.concat([df_itens, df_novos_itens], ignore_index=True)
+            # Gravar pela fila de escrita (commit em grupo com as demais sessões)
+            self._gravar(self.armazenamento.alteracao_pedido(novo_pedido, novos_itens))
             
-            # Preencher valores NaN com string vazia
-            df_pedidos = df_pedidos.fillna("")
-            df_itens = df_itens.fillna("")
+            # Deixar o PDF pronto para o primeiro download
+            RenderizadorPDF.get_instance().pre_renderizar(self._montar_detalhes(novo_pedido, novos_itens))
             
-            # Fazer backup antes de salvar
-            self._fazer_backup()
-            
-            # Salvar na planilha
-            with pd.ExcelWriter(self.arquivo_pedidos, engine='openpyxl') as writer:
-                df_pedidos.to_excel(writer, sheet_name='Pedidos', index=False)
-                df_itens.to_excel(writer, sheet_name='Itens', index=False)
-            
-            # Sincronizar com GitHub
-            sync = GitHubSync()
-            success, message = sync.sync_files()
-            if not success:
-                st.warning(f"⚠️ Aviso: {message}")
+            # Sincronizar com GitHub em segundo plano (agrupando rajadas de pedidos)
+            SyncWorker.get_instance().solicitar(numero_pedido)
             
             return numero_pedido
             
         except Exception as e:
             raise Exception(f"Erro ao salvar pedido: {str(e)}")
 
+    @instrumentar()
+    def preparar_importacao(self, conteudo: bytes, nome_arquivo: str,
+                            solicitante_padrao: str = "") -> ResultadoImportacao:
+        """Lê um arquivo CSV/XLSX de pedidos e valida todas as linhas contra o catálogo"""
+        df = ler_arquivo_importacao(conteudo, nome_arquivo)
+        return validar_importacao(df, self.carregar_catalogo(), solicitante_padrao)
+
+    @instrumentar()
+    def salvar_pedidos_em_lote(self, pedidos_info: List[dict]) -> List[str]:
+        """
+        Salva vários pedidos (no formato de salvar_pedido) com um bloco de números
+        reservado de uma vez, uma única gravação e uma única sincronização
+        """
+        if not pedidos_info:
+            return []
+        numeros = self.reservar_numeros_pedido(len(pedidos_info))
+
+        try:
+            self._gravar(*(
+                self.armazenamento.alteracao_pedido(*self._montar_registros(numero, pedido_info))
+                for numero, pedido_info in zip(numeros, pedidos_info)
+            ))
+            SyncWorker.get_instance().solicitar(f"{numeros[0]} a {numeros[-1]}")
+            return numeros
+
+        except Exception as e:
+            raise Exception(f"Erro ao salvar pedidos em lote: {str(e)}")
+
+    @staticmethod
+    def _chave_ordenacao(serie: pd.Series) -> pd.Series:
+        """Datas e números pelo valor; textos sem diferenciar maiúsculas"""
+        if pd.api.types.is_datetime64_any_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+            return serie
+        return serie.astype(str).str.casefold()
+
+    @instrumentar()
     def buscar_pedidos(self, 
                       numero_pedido: Optional[str] = None,
                       cliente: Optional[str] = None,
-                      status: Optional[str] = None) -> pd.DataFrame:
-        """Busca pedidos com filtros opcionais"""
+                      status: Optional[str] = None,
+                      rack: Optional[str] = None,
+                      termo: Optional[str] = None,
+                      data_inicio: Optional[Union[date, datetime]] = None,
+                      data_fim: Optional[Union[date, datetime]] = None,
+                      offset: int = 0,
+                      limit: Optional[int] = None,
+                      ordenar_por: Optional[List[Tuple[str, bool]]] = None) -> Tuple[pd.DataFrame, int]:
+        """
+        Busca pedidos com filtros opcionais, ordenação e paginação
+        Args:
+            rack: RACK exato (sem diferenciar maiúsculas)
+            termo: Texto livre procurado pelo índice de busca (pedido, cliente, RACK,
+                locação, solicitante, observações e códigos dos itens)
+            data_inicio, data_fim: Intervalo da Data do pedido (uma data sem hora
+                inclui o dia inteiro), resolvido por busca binária no índice de datas
+            ordenar_por: Lista de (coluna, crescente); sem ordenação, mantém a ordem de gravação
+            offset: Quantidade de pedidos a pular, depois de filtrar e ordenar
+            limit: Tamanho máximo da página (None retorna todos)
+        Returns:
+            (página de pedidos no esquema tipado, total de pedidos que atendem aos filtros)
+        """
         try:
-            df = self._ler_pedidos()
-            
-            # Preencher valores NaN com string vazia
-            df = df.fillna("")
+            # Status e intervalo de datas saem dos índices, sem percorrer a tabela
+            df = self.indice_pedidos.consultar(
+                status=status,
+                data_inicio=data_inicio,
+                data_fim=data_fim
+            )
             
             if numero_pedido:
                 df = df[df["Numero_Pedido"].str.contains(numero_pedido, case=False)]
             if cliente:
                 df = df[df["Cliente"].str.contains(cliente, case=False)]
-            if status:
-                df = df[df["Status"] == status]
-            
-            return df
+            if rack:
+                df = df[df["RACK"].astype(str).str.strip().str.casefold() == rack.strip().casefold()]
+            encontrados = self.indice_busca.buscar(termo) if termo else None
+            if encontrados is not None:
+                df = df[df["Numero_Pedido"].isin(encontrados)]
+
+            total = len(df)
+            if ordenar_por:
+                colunas, crescente = zip(*ordenar_por)
+                # REQ-NNN é ordenado pelo Id_Pedido inteiro
+                df = df.sort_values(
+                    ["Id_Pedido" if coluna == "Numero_Pedido" else coluna for coluna in colunas],
+                    ascending=list(crescente),
+                    key=self._chave_ordenacao,
+                    kind='stable'
+                )
+            inicio = max(offset, 0)
+            fim = None if limit is None else inicio + limit
+            return df.iloc[inicio:fim], total
         except Exception as e:
             raise Exception(f"Erro ao buscar pedidos: {str(e)}")
 
+    @staticmethod
+    def _montar_detalhes(pedido: dict, itens: List[dict]) -> dict:
+        info_dict = {
+            "Numero_Pedido": pedido["Numero_Pedido"],
+            "Data": pedido["Data"],
+            "Cliente": pedido["Cliente"],
+            "RACK": pedido["RACK"],
+            "Localizacao": pedido["Localizacao"],
+            "Solicitante": pedido["Solicitante"],
+            "Observacoes": pedido["Observacoes"],
+            "Ultima_Atualizacao": pedido["Ultima_Atualizacao"] if pd.notna(pedido["Ultima_Atualizacao"]) else "",
+            "Responsavel_Atualizacao": pedido["Responsavel_Atualizacao"] if pd.notna(pedido["Responsavel_Atualizacao"]) else ""
+        }
+        
+        return {
+            "info": info_dict,
+            "itens": itens,
+            "status": pedido["Status"]
+        }
+
+    @instrumentar()
     def get_pedido_detalhes(self, numero_pedido: str) -> dict:
         """Retorna os detalhes completos de um pedido"""
         try:
-            # Carregar dados
-            df_pedidos = pd.read_excel(self.arquivo_pedidos, sheet_name='Pedidos')
-            df_itens = pd.read_excel(self.arquivo_pedidos, sheet_name='Itens')
-            
             # Buscar informações do pedido
-            pedido = df_pedidos[df_pedidos["Numero_Pedido"] == numero_pedido].iloc[0]
-            itens = df_itens[df_itens["Numero_Pedido"] == numero_pedido].to_dict('records')
+            pedido, itens = self.armazenamento.buscar_pedido(numero_pedido)
+            if pedido is None:
+                raise ValueError(f"Pedido {numero_pedido} não encontrado")
             
-            # Converter o pedido para dicionário
-            info_dict = {
-                "Numero_Pedido": pedido["Numero_Pedido"],
-                "Data": pedido["Data"],
-                "Cliente": pedido["Cliente"],
-                "RACK": pedido["RACK"],
-                "Localizacao": pedido["Localizacao"],
-                "Solicitante": pedido["Solicitante"],
-                "Observacoes": pedido["Observacoes"],
-                "Ultima_Atualizacao": pedido["Ultima_Atualizacao"] if pd.notna(pedido["Ultima_Atualizacao"]) else "",
-                "Responsavel_Atualizacao": pedido["Responsavel_Atualizacao"] if pd.notna(pedido["Responsavel_Atualizacao"]) else ""
-            }
-            
-            return {
-                "info": info_dict,
-                "itens": itens,
-                "status": pedido["Status"]
-            }
+            return self._montar_detalhes(pedido, itens)
             
         except Exception as e:
             raise Exception(f"Erro ao buscar detalhes do pedido: {str(e)}")
 
+    @instrumentar()
+    def get_pedidos_detalhes(self, numeros_pedido: List[str]) -> List[dict]:
+        """
+        Detalhes de vários pedidos (no formato de get_pedido_detalhes), na ordem
+        recebida, com uma única leitura do armazenamento
+        """
+        try:
+            encontrados = self.armazenamento.buscar_pedidos_lote(numeros_pedido)
+            faltantes = [numero for numero in numeros_pedido if numero not in encontrados]
+            if faltantes:
+                raise ValueError(f"Pedidos não encontrados: {', '.join(faltantes)}")
+            return [self._montar_detalhes(*encontrados[numero]) for numero in numeros_pedido]
+        except Exception as e:
+            raise Exception(f"Erro ao buscar detalhes dos pedidos: {str(e)}")
+
+    @instrumentar()
     def atualizar_status_pedido(self, numero_pedido: str, novo_status: str, responsavel: str):
         """Atualiza o status de um pedido"""
         try:
-            # Carregar dados atuais
-            df_pedidos = pd.read_excel(self.arquivo_pedidos, sheet_name='Pedidos')
-            df_itens = pd.read_excel(self.arquivo_pedidos, sheet_name='Itens')
-            
-            # Localizar o pedido
-            idx = df_pedidos[df_pedidos["Numero_Pedido"] == numero_pedido].index[0]
-            
-            # Atualizar informações
-            df_pedidos.at[idx, "Status"] = novo_status
-            df_pedidos.at[idx, "Ultima_Atualizacao"] = datetime.now().strftime('%d/%m/%Y %H:%M')
-            df_pedidos.at[idx, "Responsavel_Atualizacao"] = responsavel
-            
-            # Fazer backup antes de salvar
-            self._fazer_backup()
-            
-            # Salvar alterações
-            with pd.ExcelWriter(self.arquivo_pedidos, engine='openpyxl') as writer:
-                df_pedidos.to_excel(writer, sheet_name='Pedidos', index=False)
-                df_itens.to_excel(writer, sheet_name='Itens', index=False)
+            self._gravar(
+                self.armazenamento.alteracao_status(
+                    numero_pedido,
+                    novo_status,
+                    datetime.now().strftime('%d/%m/%Y %H:%M'),
+                    responsavel
+                )
+            )
+            SyncWorker.get_instance().solicitar(numero_pedido)
                 
         except Exception as e:
             raise Exception(f"Erro ao atualizar status: {str(e)}")
 
     @staticmethod
-    @st.cache_data
     def filtrar_dados(pedidos: List[Pedido], cliente: Optional[str] = None, 
                      rack: Optional[str] = None) -> List[Pedido]:
-        """Filtra os dados com cache"""
+        """Filtra uma lista qualquer de Pedido (para o catálogo, use consultar_catalogo)"""
         resultado = pedidos
         if cliente:
             cliente = cliente.lower()
@@ -318,104 +372,49 @@ class PedidoController:
             resultado = [p for p in resultado if p.rack.lower() == rack]
         return resultado
 
+    @instrumentar()
+    def consultar_catalogo(self, cliente: Optional[str] = None, rack: Optional[str] = None,
+                           locacao: Optional[str] = None) -> List[Pedido]:
+        """Consulta o catálogo pelos índices, com cache LRU por versão do catálogo"""
+        return ConsultaCatalogo.get_instance().filtrar(
+            self.carregar_catalogo(), cliente=cliente, rack=rack, locacao=locacao
+        )
+
     def buscar_por_cliente(self, cliente: str) -> List[Pedido]:
         """Busca pedidos por cliente (case-insensitive)"""
-        return self.filtrar_dados(self.pedidos, cliente=cliente)
+        return self.consultar_catalogo(cliente=cliente)
 
     def buscar_por_rack(self, rack: str) -> List[Pedido]:
         """Busca pedidos por rack (case-insensitive)"""
-        return self.filtrar_dados(self.pedidos, rack=rack)
+        return self.consultar_catalogo(rack=rack)
 
     def buscar_por_cliente_e_rack(self, cliente: str, rack: str) -> List[Pedido]:
         """Busca pedidos por cliente e rack (case-insensitive)"""
-        return self.filtrar_dados(self.pedidos, cliente=cliente, rack=rack)
+        return self.consultar_catalogo(cliente=cliente, rack=rack)
 
-    def imprimir_pedido(self, numero_pedido: str):
-        """Gera um arquivo PDF do pedido e envia para impressão"""
+    @instrumentar()
+    def imprimir_pedido(self, numero_pedido: str, impressora: Optional[str] = None) -> str:
+        """Envia o PDF do pedido para a fila de impressão e retorna o id do trabalho"""
         try:
-            # Buscar detalhes do pedido
             detalhes = self.get_pedido_detalhes(numero_pedido)
-            
-            # Gerar HTML para impressão
-            html = f"""
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; }}
-                    .header {{ text-align: center; margin-bottom: 20px; }}
-                    .info {{ margin-bottom: 20px; }}
-                    .item {{ margin-bottom: 10px; }}
-                    .signatures {{ margin-top: 50px; text-align: center; }}
-                    .signature-line {{ 
-                        width: 200px; 
-                        border-top: 1px solid black; 
-                        margin: 50px auto 10px auto; 
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1>Pedido de Requisição #{numero_pedido}</h1>
-                    <p>Data: {detalhes['info']['Data']}</p>
-                </div>
-                
-                <div class="info">
-                    <h2>Informações do Pedido</h2>
-                    <p><strong>Cliente:</strong> {detalhes['info']['Cliente']}</p>
-                    <p><strong>RACK:</strong> {detalhes['info']['RACK']}</p>
-                    <p><strong>Localização:</strong> {detalhes['info']['Localizacao']}</p>
-                    <p><strong>Solicitante:</strong> {detalhes['info']['Solicitante']}</p>
-                    <p><strong>Status:</strong> {detalhes['status']}</p>
-                </div>
-                
-                <div class="items">
-                    <h2>Itens</h2>
-            """
-            
-            # Adicionar itens
-            for idx, item in enumerate(detalhes['itens'], 1):
-                html += f"""
-                    <div class="item">
-                        <h3>Item {idx}</h3>
-                        <p><strong>CÓD Yazaki:</strong> {item['cod_yazaki']}</p>
-                        <p><strong>Código Cabo:</strong> {item['codigo_cabo']}</p>
-                        <p><strong>Seção:</strong> {item['seccao']}</p>
-                        <p><strong>Cor:</strong> {item['cor']}</p>
-                        <p><strong>Quantidade:</strong> {item['quantidade']}</p>
-                    </div>
-                """
-            
-            # Adicionar área de assinaturas
-            html += """
-                </div>
-                
-                <div class="signatures">
-                    <div>
-                        <div class="signature-line"></div>
-                        <p>Solicitante</p>
-                    </div>
-                    
-                    <div>
-                        <div class="signature-line"></div>
-                        <p>Aprovação</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            # Salvar HTML temporário
-            temp_html = f"temp_{numero_pedido}.html"
-            with open(temp_html, "w", encoding="utf-8") as f:
-                f.write(html)
-            
-            # Enviar para impressão usando o navegador padrão
-            os.startfile(temp_html, "print")
-            
-            # Aguardar um pouco e remover arquivo temporário
-            import time
-            time.sleep(5)
-            os.remove(temp_html)
-            
+            pdf = RenderizadorPDF.get_instance().obter(detalhes)
+            return self.spooler.enviar(pdf, f"{numero_pedido}.pdf", impressora)
+        except Exception as e:
+            raise Exception(f"Erro ao imprimir pedido: {str(e)}")
+
+    @instrumentar()
+    def imprimir_pedidos(self, numeros_pedido: List[str], impressora: Optional[str] = None) -> List[str]:
+        """Enfileira vários pedidos de uma vez (o spooler os envia juntos à impressora)"""
+        try:
+            detalhes = self.get_pedidos_detalhes(numeros_pedido)
+            pdfs = ExportadorPDF.get_instance().renderizar(detalhes)
+            return [
+                self.spooler.enviar(pdf, f"{numero}.pdf", impressora)
+                for numero, pdf in pdfs.items()
+            ]
         except Exception as e:
-            raise Exception(f"Erro ao imprimir pedido: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Erro ao imprimir pedidos: {str(e)}")
+
+    def status_impressao(self, trabalhos: List[str]) -> List[dict]:
+        """Situação dos trabalhos de impressão informados (os que ainda existem)"""
+        return [status for status in map(self.spooler.status, trabalhos) if status is not None]
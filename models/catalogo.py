@@ -0,0 +1,432 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.pedido import Pedido
+
+# Colunas da aba 'Projeto' e os atributos correspondentes de Pedido
+COLUNAS_PLANILHA = {
+    'RACK': 'rack',
+    'CÓD Yazaki': 'cod_yazaki',
+    'Codigo Cabo': 'codigo_cabo',
+    'Secção': 'seccao',
+    'Cor': 'cor',
+    'Cliente': 'cliente',
+    'Locação': 'locacao',
+    'Projeto': 'projeto',
+    'Cod OES': 'cod_oes'
+}
+COLUNAS_CATALOGO = list(COLUNAS_PLANILHA.values())
+# Colunas que identificam uma posição; as demais são atributos da posição
+COLUNAS_CHAVE = ['cliente', 'rack', 'locacao']
+
+Posicao = Tuple[str, str, str]
+
+@dataclass
+class DiferencaCatalogo:
+    """Posições (cliente, RACK, locação) que mudaram entre duas versões do catálogo"""
+    versao_anterior: str
+    versao_nova: str
+    adicionadas: List[Posicao] = field(default_factory=list)
+    removidas: List[Posicao] = field(default_factory=list)
+    alteradas: List[Posicao] = field(default_factory=list)
+    incremental: bool = True
+    data: datetime = field(default_factory=datetime.now)
+
+    @property
+    def vazia(self) -> bool:
+        return not (self.adicionadas or self.removidas or self.alteradas)
+
+class Catalogo:
+    """
+    Catálogo de posições (cliente, RACK, locação) em formato colunar.
+
+    Cada atributo de Pedido é guardado como um array NumPy; a lista de objetos
+    Pedido só é montada sob demanda, como visão de compatibilidade.
+    """
+
+    def __init__(self, colunas: Dict[str, np.ndarray], versao: str = ""):
+        self.colunas = colunas
+        self.versao = versao
+        self._pedidos: Optional[List[Pedido]] = None
+        self._indice: Optional['IndiceCatalogo'] = None
+
+    def __len__(self) -> int:
+        return len(self.colunas['rack'])
+
+    @staticmethod
+    def from_dataframe(df: pd.DataFrame, versao: str = "") -> 'Catalogo':
+        """Limpa as colunas de texto em bloco e extrai os arrays"""
+        df = df.rename(columns=COLUNAS_PLANILHA).reindex(columns=COLUNAS_CATALOGO)
+        df = df.fillna('').astype(str).apply(lambda coluna: coluna.str.strip())
+        return Catalogo({
+            coluna: df[coluna].to_numpy(dtype=object)
+            for coluna in COLUNAS_CATALOGO
+        }, versao)
+
+    @staticmethod
+    def carregar_planilha(caminho: str, versao: str = "") -> 'Catalogo':
+        """Lê a aba 'Projeto' da planilha de mapeamento"""
+        df = pd.read_excel(
+            caminho,
+            sheet_name='Projeto',
+            dtype={coluna: str for coluna in COLUNAS_PLANILHA}
+        )
+        return Catalogo.from_dataframe(df, versao)
+
+    @property
+    def pedidos(self) -> List[Pedido]:
+        """Lista de Pedido (id sequencial a partir de 1), montada uma única vez"""
+        if self._pedidos is None:
+            self._pedidos = [
+                Pedido(
+                    id=idx,
+                    rack=rack,
+                    cod_yazaki=cod_yazaki,
+                    codigo_cabo=codigo_cabo,
+                    seccao=seccao,
+                    cor=cor,
+                    cliente=cliente,
+                    locacao=locacao,
+                    projeto=projeto,
+                    cod_oes=cod_oes
+                )
+                for idx, (rack, cod_yazaki, codigo_cabo, seccao, cor,
+                          cliente, locacao, projeto, cod_oes)
+                in enumerate(zip(*(self.colunas[c] for c in COLUNAS_CATALOGO)), 1)
+            ]
+        return self._pedidos
+
+    @property
+    def indice(self) -> 'IndiceCatalogo':
+        """Índice cliente → RACK → locação, construído uma vez por versão do catálogo"""
+        if self._indice is None:
+            self._indice = IndiceCatalogo(self)
+        return self._indice
+
+    def posicao(self, linha: int) -> Posicao:
+        return tuple(self.colunas[c][linha] for c in COLUNAS_CHAVE)
+
+    def herdar_indice(self, anterior: 'Catalogo') -> DiferencaCatalogo:
+        """
+        Compara com a versão anterior do catálogo e monta o índice desta versão a
+        partir do índice anterior, mexendo só nas posições que mudaram.
+        """
+        indice, diferenca = anterior.indice.atualizado(self)
+        self._indice = indice
+        return diferenca
+
+def normalizar_chave(valor: str) -> str:
+    """Chave de comparação sem distinção de maiúsculas/minúsculas"""
+    return str(valor).strip().casefold()
+
+class IndiceCatalogo:
+    """
+    Índice hierárquico do catálogo. As chaves são normalizadas com casefold e
+    as listas já ficam ordenadas, então cada consulta da tela é O(1).
+    """
+
+    def __init__(self, catalogo: Catalogo):
+        self.catalogo = catalogo
+        self._posicoes: Dict[Tuple[str, str], List[str]] = {}
+        self._itens: Dict[Tuple[str, str, str], int] = {}
+        self._linhas_cliente: Dict[str, List[int]] = {}
+        self._linhas_rack: Dict[str, List[int]] = {}
+        self._linhas_cliente_rack: Dict[Tuple[str, str], List[int]] = {}
+        self._racks: Dict[str, List[str]] = {}
+        # Linhas por nome de cliente e por nome de RACK de cada cliente: as listas
+        # de nomes saem das chaves, sem percorrer o catálogo a cada versão
+        self._contagem_clientes: Dict[str, int] = {}
+        self._contagem_racks: Dict[str, Dict[str, int]] = {}
+
+        clientes_afetados = self._indexar(0, len(catalogo))
+        self._atualizar_nomes(clientes_afetados)
+
+    def _chave(self, linha: int) -> Tuple[str, str, str]:
+        colunas = self.catalogo.colunas
+        return (
+            normalizar_chave(colunas['cliente'][linha]),
+            normalizar_chave(colunas['rack'][linha]),
+            normalizar_chave(colunas['locacao'][linha])
+        )
+
+    def _indexar(self, inicio: int, fim: int) -> set:
+        """Acrescenta as linhas [inicio, fim) do catálogo ao índice"""
+        colunas = self.catalogo.colunas
+        clientes = set()
+        for linha, cliente, rack, locacao in zip(
+            range(inicio, fim),
+            colunas['cliente'][inicio:fim],
+            colunas['rack'][inicio:fim],
+            colunas['locacao'][inicio:fim]
+        ):
+            chave_cliente = normalizar_chave(cliente)
+            chave_rack = normalizar_chave(rack)
+            clientes.add(chave_cliente)
+            self._contagem_clientes[cliente] = self._contagem_clientes.get(cliente, 0) + 1
+            racks = self._contagem_racks.setdefault(chave_cliente, {})
+            racks[rack] = racks.get(rack, 0) + 1
+            self._posicoes.setdefault((chave_cliente, chave_rack), []).append(locacao)
+            self._itens.setdefault((chave_cliente, chave_rack, normalizar_chave(locacao)), linha)
+            self._linhas_cliente.setdefault(chave_cliente, []).append(linha)
+            self._linhas_rack.setdefault(chave_rack, []).append(linha)
+            self._linhas_cliente_rack.setdefault((chave_cliente, chave_rack), []).append(linha)
+        return clientes
+
+    def _desindexar(self, anterior: 'IndiceCatalogo', inicio: int, fim: int) -> set:
+        """Remove do índice as linhas finais [inicio, fim) do catálogo anterior"""
+        chaves = [anterior._chave(linha) for linha in range(inicio, fim)]
+        clientes = {chave_cliente for chave_cliente, _, _ in chaves}
+        grupos = {(chave_cliente, chave_rack) for chave_cliente, chave_rack, _ in chaves}
+
+        for chave_cliente in clientes:
+            self._contagem_racks[chave_cliente] = dict(self._contagem_racks.get(chave_cliente, {}))
+        colunas = anterior.catalogo.colunas
+        for (chave_cliente, _, _), cliente, rack in zip(
+            chaves, colunas['cliente'][inicio:fim], colunas['rack'][inicio:fim]
+        ):
+            self._descontar(self._contagem_clientes, cliente)
+            self._descontar(self._contagem_racks[chave_cliente], rack)
+
+        # Linhas finais ficam sempre no fim das listas: basta cortá-las, uma vez por lista
+        for indice, afetadas in ((self._linhas_cliente, clientes),
+                                 (self._linhas_rack, {chave_rack for _, chave_rack in grupos}),
+                                 (self._linhas_cliente_rack, grupos)):
+            for chave in afetadas:
+                restantes = [l for l in indice.get(chave, []) if l < inicio]
+                if restantes:
+                    indice[chave] = restantes
+                else:
+                    indice.pop(chave, None)
+
+        locacoes = self.catalogo.colunas['locacao']
+        for grupo in grupos:
+            if grupo in self._linhas_cliente_rack:
+                self._posicoes[grupo] = [locacoes[l] for l in self._linhas_cliente_rack[grupo]]
+            else:
+                self._posicoes.pop(grupo, None)
+        for chave in chaves:
+            if self._itens.get(chave, -1) >= inicio:
+                del self._itens[chave]
+        return clientes
+
+    @staticmethod
+    def _descontar(contagem: Dict[str, int], nome: str):
+        if contagem[nome] > 1:
+            contagem[nome] -= 1
+        else:
+            del contagem[nome]
+
+    def _separar(self, linhas):
+        """Copia as listas que as linhas vão alterar, preservando as do índice anterior"""
+        grupos = set()
+        for linha in linhas:
+            chave_cliente, chave_rack, _ = self._chave(linha)
+            grupos.add((chave_cliente, chave_rack))
+        for indice, chaves in ((self._posicoes, grupos),
+                               (self._linhas_cliente_rack, grupos),
+                               (self._linhas_cliente, {c for c, _ in grupos}),
+                               (self._linhas_rack, {r for _, r in grupos})):
+            for chave in chaves:
+                if chave in indice:
+                    indice[chave] = list(indice[chave])
+        for chave_cliente in {c for c, _ in grupos}:
+            if chave_cliente in self._contagem_racks:
+                self._contagem_racks[chave_cliente] = dict(self._contagem_racks[chave_cliente])
+
+    def _atualizar_nomes(self, clientes_afetados: set):
+        """Refaz, a partir das contagens, as listas ordenadas de clientes e de RACKs dos clientes afetados"""
+        for chave_cliente in clientes_afetados:
+            racks = self._contagem_racks.get(chave_cliente)
+            if racks:
+                self._racks[chave_cliente] = sorted(racks)
+            else:
+                self._racks.pop(chave_cliente, None)
+                self._contagem_racks.pop(chave_cliente, None)
+        self._clientes = sorted(self._contagem_clientes)
+
+    def _copiar(self, catalogo: Catalogo) -> 'IndiceCatalogo':
+        """Cópia rasa para o novo catálogo; o índice atual segue válido para quem o usa"""
+        copia = IndiceCatalogo.__new__(IndiceCatalogo)
+        copia.catalogo = catalogo
+        copia._posicoes = dict(self._posicoes)
+        copia._itens = dict(self._itens)
+        copia._linhas_cliente = dict(self._linhas_cliente)
+        copia._linhas_rack = dict(self._linhas_rack)
+        copia._linhas_cliente_rack = dict(self._linhas_cliente_rack)
+        copia._racks = dict(self._racks)
+        copia._contagem_clientes = dict(self._contagem_clientes)
+        copia._contagem_racks = dict(self._contagem_racks)
+        copia._clientes = self._clientes
+        return copia
+
+    def atualizado(self, novo: Catalogo) -> Tuple['IndiceCatalogo', DiferencaCatalogo]:
+        """
+        Índice para a nova versão do catálogo e as posições que mudaram.
+
+        Quando as colunas de chave da parte comum das duas versões são iguais
+        (edição de atributos, linhas acrescentadas ou removidas no fim), o índice
+        é atualizado só nas linhas diferentes. Se linhas foram inseridas ou
+        removidas no meio da planilha, o índice é reconstruído.
+        """
+        antigo = self.catalogo
+        diferenca = DiferencaCatalogo(antigo.versao, novo.versao)
+        comum = min(len(antigo), len(novo))
+
+        chaves_iguais = all(
+            np.array_equal(antigo.colunas[c][:comum], novo.colunas[c][:comum])
+            for c in COLUNAS_CHAVE
+        )
+        if not chaves_iguais:
+            indice = IndiceCatalogo(novo)
+            self._comparar_por_posicao(indice, diferenca)
+            diferenca.incremental = False
+            return indice, diferenca
+
+        # Linhas da parte comum cujos atributos mudaram
+        alteradas = np.zeros(comum, dtype=bool)
+        for coluna in COLUNAS_CATALOGO:
+            if coluna not in COLUNAS_CHAVE:
+                alteradas |= antigo.colunas[coluna][:comum] != novo.colunas[coluna][:comum]
+        diferenca.alteradas = [novo.posicao(l) for l in np.flatnonzero(alteradas)]
+
+        indice = self._copiar(novo)
+        removidas = {self._chave(l): antigo.posicao(l) for l in range(comum, len(antigo))}
+        clientes_afetados = indice._desindexar(self, comum, len(antigo))
+        indice._separar(range(comum, len(novo)))
+        clientes_afetados |= indice._indexar(comum, len(novo))
+        if clientes_afetados:
+            indice._atualizar_nomes(clientes_afetados)
+
+        adicionadas = {indice._chave(l): novo.posicao(l) for l in range(comum, len(novo))}
+        for chave, posicao in adicionadas.items():
+            if chave in removidas:
+                diferenca.alteradas.append(posicao)
+            elif indice._itens.get(chave, comum) >= comum:
+                diferenca.adicionadas.append(posicao)
+        for chave, posicao in removidas.items():
+            if chave not in adicionadas and chave not in indice._itens:
+                diferenca.removidas.append(posicao)
+        return indice, diferenca
+
+    def _comparar_por_posicao(self, novo: 'IndiceCatalogo', diferenca: DiferencaCatalogo):
+        """Diferença completa, posição a posição, entre este índice e o novo"""
+        antigo, catalogo = self.catalogo, novo.catalogo
+        atributos = [c for c in COLUNAS_CATALOGO if c not in COLUNAS_CHAVE]
+        valores_antigos = list(zip(*(antigo.colunas[c].tolist() for c in atributos)))
+        valores_novos = list(zip(*(catalogo.colunas[c].tolist() for c in atributos)))
+        for chave, linha in novo._itens.items():
+            anterior = self._itens.get(chave)
+            if anterior is None:
+                diferenca.adicionadas.append(catalogo.posicao(linha))
+            elif valores_antigos[anterior] != valores_novos[linha]:
+                diferenca.alteradas.append(catalogo.posicao(linha))
+        for chave, linha in self._itens.items():
+            if chave not in novo._itens:
+                diferenca.removidas.append(antigo.posicao(linha))
+
+    def clientes(self) -> List[str]:
+        return self._clientes
+
+    def racks(self, cliente: str) -> List[str]:
+        return self._racks.get(normalizar_chave(cliente), [])
+
+    def posicoes(self, cliente: str, rack: str) -> List[str]:
+        """Locações do RACK na ordem da planilha"""
+        return self._posicoes.get((normalizar_chave(cliente), normalizar_chave(rack)), [])
+
+    def item(self, cliente: str, rack: str, locacao: str) -> Optional[Pedido]:
+        linha = self._itens.get(
+            (normalizar_chave(cliente), normalizar_chave(rack), normalizar_chave(locacao))
+        )
+        return None if linha is None else self.catalogo.pedidos[linha]
+
+    def linhas(self, cliente: Optional[str] = None, rack: Optional[str] = None,
+               locacao: Optional[str] = None) -> List[int]:
+        """Linhas do catálogo que atendem aos filtros, a partir dos índices"""
+        chave_cliente = normalizar_chave(cliente) if cliente else None
+        chave_rack = normalizar_chave(rack) if rack else None
+
+        if chave_cliente and chave_rack:
+            linhas = self._linhas_cliente_rack.get((chave_cliente, chave_rack), [])
+        elif chave_cliente:
+            linhas = self._linhas_cliente.get(chave_cliente, [])
+        elif chave_rack:
+            linhas = self._linhas_rack.get(chave_rack, [])
+        else:
+            linhas = range(len(self.catalogo))
+
+        if locacao:
+            chave_locacao = normalizar_chave(locacao)
+            colunas = self.catalogo.colunas
+            linhas = [l for l in linhas if normalizar_chave(colunas['locacao'][l]) == chave_locacao]
+        return list(linhas)
+
+class ConsultaCatalogo:
+    """
+    Consultas ao catálogo por cliente/RACK/locação respondidas pelo índice, com
+    cache LRU limitado. A chave inclui a versão do catálogo, então uma nova
+    versão da planilha nunca reaproveita resultados antigos.
+    """
+
+    _instancia: Optional['ConsultaCatalogo'] = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, tamanho_maximo: int = 256):
+        self.tamanho_maximo = tamanho_maximo
+        self._resultados: 'OrderedDict[tuple, List[Pedido]]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_instance() -> 'ConsultaCatalogo':
+        with ConsultaCatalogo._lock_instancia:
+            if ConsultaCatalogo._instancia is None:
+                ConsultaCatalogo._instancia = ConsultaCatalogo()
+            return ConsultaCatalogo._instancia
+
+    def filtrar(self, catalogo: Catalogo, cliente: Optional[str] = None,
+                rack: Optional[str] = None, locacao: Optional[str] = None) -> List[Pedido]:
+        chave = (
+            catalogo.versao,
+            normalizar_chave(cliente) if cliente else None,
+            normalizar_chave(rack) if rack else None,
+            normalizar_chave(locacao) if locacao else None
+        )
+        with self.lock:
+            resultado = self._resultados.get(chave)
+            if resultado is not None:
+                self._resultados.move_to_end(chave)
+                self.hits += 1
+                return list(resultado)
+            self.misses += 1
+
+        pedidos = catalogo.pedidos
+        resultado = [pedidos[l] for l in catalogo.indice.linhas(cliente, rack, locacao)]
+
+        with self.lock:
+            self._resultados[chave] = resultado
+            self._resultados.move_to_end(chave)
+            while len(self._resultados) > self.tamanho_maximo:
+                self._resultados.popitem(last=False)
+        return list(resultado)
+
+    def limpar(self):
+        with self.lock:
+            self._resultados.clear()
+
+    def estatisticas(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": self.hits / total if total else 0.0,
+                "entradas": len(self._resultados)
+            }
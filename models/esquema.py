@@ -0,0 +1,150 @@
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+COLUNAS_PEDIDOS = [
+    "Numero_Pedido", "Data", "Cliente", "RACK", "Localizacao",
+    "Solicitante", "Observacoes", "Status", "Ultima_Atualizacao",
+    "Responsavel_Atualizacao"
+]
+COLUNAS_ITENS = [
+    "Numero_Pedido", "cod_yazaki", "codigo_cabo", "seccao",
+    "cor", "quantidade"
+]
+
+# Versão do layout de pedidos.xlsx; a migração roda uma vez quando muda
+VERSAO_ESQUEMA = 1
+
+# Formato em que Data e Ultima_Atualizacao são gravadas na planilha
+FORMATO_DATA = '%d/%m/%Y %H:%M'
+COLUNAS_DATA = ["Data", "Ultima_Atualizacao"]
+# Status gravados pela tela de histórico, na ordem do andamento do pedido
+STATUS_PEDIDOS = ["Pendente", "Em Processamento", "Concluído"]
+# Poucos valores distintos repetidos em todas as linhas
+COLUNAS_CATEGORIA = ["Status", "Cliente", "RACK"]
+
+def inteiro_ou_zero(valor) -> int:
+    try:
+        return int(float(valor))
+    except (TypeError, ValueError):
+        return 0
+
+# Leitura explícita das planilhas, sem inferência: quantidade inteira e o resto como texto
+CONVERSORES_LEITURA = {"quantidade": inteiro_ou_zero}
+TIPOS_LEITURA = {
+    coluna: str for coluna in dict.fromkeys(COLUNAS_PEDIDOS + COLUNAS_ITENS)
+    if coluna not in CONVERSORES_LEITURA
+}
+
+def usar_coluna(coluna) -> bool:
+    """usecols das abas Pedidos/Itens: ignora colunas extras (ex.: índices salvos por engano)"""
+    return coluna in TIPOS_LEITURA or coluna in CONVERSORES_LEITURA
+
+def converter_quantidade(serie: pd.Series) -> pd.Series:
+    return pd.to_numeric(serie, errors='coerce').fillna(0).astype('int64')
+
+def converter_datas(valores) -> pd.Series:
+    """Textos 'dd/mm/aaaa HH:MM' para datetime64 (NaT quando vazio ou inválido)"""
+    return pd.to_datetime(pd.Series(valores, dtype=object), format=FORMATO_DATA, errors='coerce')
+
+def formatar_datas(serie: pd.Series) -> pd.Series:
+    """datetime64 de volta para o texto exibido e gravado ('' quando não há data)"""
+    return serie.dt.strftime(FORMATO_DATA).fillna("")
+
+def id_pedido(numeros: pd.Series) -> pd.Series:
+    """Parte numérica de 'REQ-NNN' como inteiro (0 se o formato não bater)"""
+    return pd.to_numeric(
+        numeros.astype(str).str.extract(r'^\s*REQ-(\d+)\s*$', expand=False),
+        errors='coerce'
+    ).fillna(0).astype('int64')
+
+def tipar_pedidos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pedidos no esquema em memória: Id_Pedido inteiro, datas datetime64,
+    Status/Cliente/RACK categóricos e os demais campos como texto
+    """
+    df = df.reindex(columns=COLUNAS_PEDIDOS)
+    tipado = pd.DataFrame(index=df.index)
+    tipado["Id_Pedido"] = id_pedido(df["Numero_Pedido"].fillna(""))
+    for coluna in COLUNAS_PEDIDOS:
+        if coluna in COLUNAS_DATA:
+            tipado[coluna] = converter_datas(df[coluna].to_numpy()).to_numpy()
+        elif coluna in COLUNAS_CATEGORIA:
+            tipado[coluna] = df[coluna].fillna("").astype(str).astype('category')
+        else:
+            tipado[coluna] = df[coluna].fillna("").astype(str)
+    return tipado
+
+def alinhar_categorias(df: pd.DataFrame, novos: pd.DataFrame):
+    """Une as categorias dos dois DataFrames para que o concat preserve o dtype categórico"""
+    for coluna in COLUNAS_CATEGORIA:
+        faltantes = novos[coluna].cat.categories.difference(df[coluna].cat.categories)
+        if len(faltantes):
+            df[coluna] = df[coluna].cat.add_categories(faltantes)
+        novos[coluna] = novos[coluna].cat.set_categories(df[coluna].cat.categories)
+
+def exibir_pedidos(df: pd.DataFrame) -> pd.DataFrame:
+    """Cópia com as datas formatadas como texto, para exibição"""
+    df = df.copy()
+    for coluna in COLUNAS_DATA:
+        if coluna in df and pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = formatar_datas(df[coluna])
+    return df
+
+def _normalizar_data(valor: str) -> str:
+    """Reescreve uma data em qualquer formato reconhecível como 'dd/mm/aaaa HH:MM'"""
+    texto = str(valor).strip()
+    if not texto:
+        return ""
+    for tentativa in (
+        lambda: pd.to_datetime(texto, format=FORMATO_DATA),
+        lambda: pd.to_datetime(texto, format='ISO8601'),
+        lambda: pd.to_datetime(texto, dayfirst=True)
+    ):
+        try:
+            return tentativa().strftime(FORMATO_DATA)
+        except (ValueError, TypeError):
+            continue
+    return texto
+
+def normalizar_planilha(df_pedidos: pd.DataFrame,
+                        df_itens: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Forma canônica de pedidos.xlsx usada pela migração: colunas na ordem do
+    esquema, textos sem espaços nas pontas, datas em 'dd/mm/aaaa HH:MM' e
+    quantidade inteira
+    """
+    df_pedidos = df_pedidos.reindex(columns=COLUNAS_PEDIDOS).fillna("").astype(str)
+    df_pedidos = df_pedidos.apply(lambda coluna: coluna.str.strip())
+    for coluna in COLUNAS_DATA:
+        df_pedidos[coluna] = df_pedidos[coluna].map(_normalizar_data)
+
+    df_itens = df_itens.reindex(columns=COLUNAS_ITENS)
+    quantidade = converter_quantidade(df_itens["quantidade"])
+    df_itens = df_itens.drop(columns="quantidade").fillna("").astype(str)
+    df_itens = df_itens.apply(lambda coluna: coluna.str.strip())
+    df_itens["quantidade"] = quantidade
+    return df_pedidos, df_itens
+
+def relatorio_memoria(antes: pd.DataFrame, depois: pd.DataFrame) -> Dict:
+    """Memória por coluna (bytes, contando o conteúdo dos textos) antes e depois da tipagem"""
+    memoria_antes = antes.memory_usage(index=False, deep=True)
+    memoria_depois = depois.memory_usage(index=False, deep=True)
+    colunas: List[dict] = [
+        {
+            "coluna": coluna,
+            "tipo": str(depois[coluna].dtype),
+            "antes": int(memoria_antes.get(coluna, 0)),
+            "depois": int(memoria_depois.get(coluna, 0))
+        }
+        for coluna in depois.columns
+    ]
+    total_antes = int(memoria_antes.sum())
+    total_depois = int(memoria_depois.sum())
+    return {
+        "linhas": len(depois),
+        "colunas": colunas,
+        "total_antes": total_antes,
+        "total_depois": total_depois,
+        "reducao": 1 - total_depois / total_antes if total_antes else 0.0
+    }
@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from utils.armazenamento import ExcelArmazenamento, SQLiteArmazenamento
+from utils.fila_escrita import FilaEscrita
+
+@pytest.fixture(params=["xlsx", "sqlite"])
+def armazenamento(request, tmp_path):
+    """Backend novo numa pasta vazia, como em BACKEND_PEDIDOS"""
+    pasta = tmp_path / "pedidos"
+    pasta.mkdir()
+    arquivo = str(pasta / "pedidos.xlsx")
+    backup = str(pasta / "backup")
+    if request.param == "sqlite":
+        return SQLiteArmazenamento(arquivo, backup, str(pasta / "pedidos.db"))
+    return ExcelArmazenamento(arquivo, backup)
+
+def pedido(numero: str, quantidade: int = 1):
+    return (
+        {"Numero_Pedido": numero, "Data": "01/01/2026 10:00", "Cliente": "Renault",
+         "RACK": "R1", "Localizacao": "A01", "Solicitante": "Teste", "Status": "Pendente"},
+        [{"Numero_Pedido": numero, "cod_yazaki": "123", "quantidade": quantidade}]
+    )
+
+def numeros(armazenamento) -> list:
+    return sorted(armazenamento.ler_pedidos()["Numero_Pedido"])
+
+def test_restaurar_e_voltar_nao_perde_pedidos(armazenamento):
+    armazenamento.inserir_pedido(*pedido("REQ-001"))
+    armazenamento.consolidar_planilha()
+    armazenamento.inserir_pedido(*pedido("REQ-002"))
+    armazenamento.consolidar_planilha()
+    # Só nas alterações pendentes (journal ou banco), ainda não na planilha
+    armazenamento.inserir_pedido(*pedido("REQ-003"))
+
+    mais_antigo = armazenamento.listar_backups()[-1]
+    armazenamento.restaurar_backup(mais_antigo["id"])
+    assert numeros(armazenamento) == ["REQ-001"]
+    assert armazenamento.alteracoes_pendentes() == 0
+
+    # O backup de segurança feito na restauração tem o estado completo anterior
+    seguranca = armazenamento.listar_backups()[0]
+    armazenamento.restaurar_backup(seguranca["id"])
+    assert numeros(armazenamento) == ["REQ-001", "REQ-002", "REQ-003"]
+    assert len(armazenamento.buscar_pedido("REQ-003")[1]) == 1
+
+def test_status_de_pedido_inexistente_e_recusado(armazenamento):
+    armazenamento.inserir_pedido(*pedido("REQ-001"))
+    armazenamento.atualizar_status("REQ-001", "Concluído", "01/01/2026 11:00", "Teste")
+    pendentes = armazenamento.alteracoes_pendentes()
+
+    with pytest.raises(ValueError, match="Pedido REQ-999 não encontrado"):
+        armazenamento.atualizar_status("REQ-999", "Concluído", "01/01/2026 11:00", "Teste")
+    assert armazenamento.alteracoes_pendentes() == pendentes
+    assert armazenamento.buscar_pedido("REQ-001")[0]["Status"] == "Concluído"
+
+def test_fila_recusa_so_a_entrada_invalida(armazenamento):
+    fila = FilaEscrita(armazenamento.aplicar_lote, validar_lote=armazenamento.validar_lote)
+    status = armazenamento.alteracao_status("REQ-002", "Concluído", "01/01/2026 11:00", "Teste")
+    futuros = [
+        fila.enviar(armazenamento.alteracao_status("REQ-999", "Concluído", "01/01/2026 11:00", "Teste")),
+        # Pedido criado e atualizado na mesma entrada
+        fila.enviar_lote([armazenamento.alteracao_pedido(*pedido("REQ-002")), status]),
+        fila.enviar(armazenamento.alteracao_pedido(*pedido("REQ-003")))
+    ]
+
+    with pytest.raises(ValueError, match="REQ-999"):
+        futuros[0].result(timeout=10)
+    assert futuros[1].result(timeout=10) and futuros[2].result(timeout=10)
+    assert numeros(armazenamento) == ["REQ-002", "REQ-003"]
+    assert armazenamento.buscar_pedido("REQ-002")[0]["Status"] == "Concluído"
+
+@pytest.fixture
+def planilha(tmp_path):
+    pasta = tmp_path / "pedidos"
+    pasta.mkdir()
+    return ExcelArmazenamento(str(pasta / "pedidos.xlsx"), str(pasta / "backup"))
+
+def test_compactacao_incorpora_o_journal(planilha):
+    planilha.inserir_pedido(*pedido("REQ-001"))
+    planilha.consolidar_planilha()
+    planilha.inserir_pedido(*pedido("REQ-002", quantidade=3))
+    planilha.atualizar_status("REQ-001", "Concluído", "01/01/2026 11:00", "Teste")
+    antes = planilha.ler_dados()
+
+    assert planilha.consolidar_planilha() == 2
+    assert planilha.alteracoes_pendentes() == 0
+    assert planilha.journal.ler() == []
+    # O snapshot anterior virou backup
+    assert len(planilha.listar_backups()) == 1
+
+    depois = ExcelArmazenamento._ler_planilha(planilha)
+    for anterior, atual in zip(antes, depois):
+        assert anterior.astype(str).values.tolist() == atual.astype(str).values.tolist()
+    assert planilha.buscar_pedido("REQ-001")[0]["Status"] == "Concluído"
+    assert planilha.consolidar_planilha() == 0
+
+def test_compactacao_interrompida_nao_duplica(planilha):
+    planilha.inserir_pedido(*pedido("REQ-001"))
+    entradas = planilha.journal.ler()
+    planilha.consolidar_planilha()
+    # Queda depois de gravar a planilha e antes de esvaziar o journal
+    planilha.journal.registrar(*entradas)
+
+    assert numeros(planilha) == ["REQ-001"]
+    assert len(planilha.ler_dados()[1]) == 1
+    planilha.consolidar_planilha()
+    assert numeros(planilha) == ["REQ-001"]
+    assert len(planilha.ler_dados()[1]) == 1
+
+def test_compactacao_em_segundo_plano(planilha, monkeypatch):
+    monkeypatch.setattr("utils.armazenamento.LIMITE_COMPACTACAO", 3)
+    planilha.aplicar_lote([planilha.alteracao_pedido(*pedido(f"REQ-{i:03d}")) for i in range(1, 4)])
+
+    for _ in range(100):
+        if planilha.alteracoes_pendentes() == 0:
+            break
+        time.sleep(0.05)
+    assert planilha.alteracoes_pendentes() == 0
+    assert planilha.erro_compactacao == ""
+    assert numeros(planilha) == ["REQ-001", "REQ-002", "REQ-003"]
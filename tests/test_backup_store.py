@@ -0,0 +1,90 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.backup_store import BackupStore, PoliticaRetencao
+
+AGORA = datetime(2026, 1, 31, 12, 0)
+
+@pytest.fixture
+def arquivo(tmp_path):
+    return tmp_path / "pedidos.xlsx"
+
+def registrar(store, arquivo, conteudo: str, data: datetime):
+    arquivo.write_text(conteudo)
+    return store.registrar(str(arquivo), data=data)
+
+def objetos(store) -> int:
+    return len(os.listdir(store.diretorio_objetos))
+
+def test_conteudo_repetido_guardado_uma_vez(tmp_path, arquivo):
+    store = BackupStore(str(tmp_path / "backup"))
+    assert registrar(store, arquivo, "a", AGORA) is not None
+    # Igual ao mais recente: nem entrada nova
+    assert registrar(store, arquivo, "a", AGORA + timedelta(minutes=1)) is None
+    registrar(store, arquivo, "b", AGORA + timedelta(minutes=2))
+    registrar(store, arquivo, "a", AGORA + timedelta(minutes=3))
+    assert len(store.listar()) == 3
+    assert objetos(store) == 2
+
+def test_restaurar_confere_o_conteudo(tmp_path, arquivo):
+    store = BackupStore(str(tmp_path / "backup"))
+    entrada = registrar(store, arquivo, "versão 1", AGORA)
+    registrar(store, arquivo, "versão 2", AGORA + timedelta(minutes=1))
+
+    store.restaurar(entrada["id"], str(arquivo))
+    assert arquivo.read_text() == "versão 1"
+    # O backup restaurado continua no repositório
+    assert len(store.listar()) == 2
+    with pytest.raises(ValueError):
+        store.restaurar("inexistente", str(arquivo))
+
+def test_retencao_por_hora_e_por_dia(tmp_path):
+    store = BackupStore(str(tmp_path / "backup"), PoliticaRetencao(recentes=2, horas=24, dias=7))
+    indice = []
+    # Quatro por hora nas últimas 48 horas
+    for minutos in range(0, 48 * 60, 15):
+        data = AGORA - timedelta(minutes=minutos)
+        indice.append({"id": data.isoformat(), "data": data.isoformat(), "hash": str(minutos),
+                       "tamanho_comprimido": 1})
+    indice.sort(key=lambda e: e["data"])
+
+    mantidos = store._aplicar_retencao(indice, agora=AGORA)
+    datas = [datetime.fromisoformat(e["data"]) for e in mantidos]
+    assert datas == sorted(datas)
+    # Os dois mais recentes, um por hora no último dia e um por dia antes disso
+    recentes, resto = datas[-2:], datas[:-2]
+    assert recentes == [AGORA - timedelta(minutes=15), AGORA]
+    horas = [d for d in resto if d >= AGORA - timedelta(hours=24)]
+    dias = [d for d in resto if d < AGORA - timedelta(hours=24)]
+    # A janela de 24 h alcança 25 horas do relógio; duas já têm um dos mais recentes
+    assert len(horas) == len({d.strftime("%Y%m%d%H") for d in horas}) == 23
+    assert len(dias) == len({d.date() for d in dias}) == 2
+    # Só calcula: nada foi removido do disco
+    assert os.listdir(store.diretorio_objetos) == []
+
+def test_retencao_remove_objetos_fora_do_indice(tmp_path, arquivo):
+    store = BackupStore(str(tmp_path / "backup"),
+                        PoliticaRetencao(recentes=2, horas=0, dias=0))
+    for i in range(5):
+        registrar(store, arquivo, f"versão {i}", AGORA + timedelta(minutes=i))
+    assert len(store.listar()) == 2
+    assert objetos(store) == 2
+
+def test_retencao_respeita_tamanho_maximo(tmp_path, arquivo):
+    store = BackupStore(str(tmp_path / "backup"),
+                        PoliticaRetencao(recentes=10, tamanho_maximo=1))
+    for i in range(3):
+        registrar(store, arquivo, f"versão {i}", AGORA + timedelta(minutes=i))
+    # Sempre sobra o mais recente, mesmo acima do limite
+    assert [e["id"] for e in store.listar()] == [(AGORA + timedelta(minutes=2)).strftime('%Y%m%d_%H%M%S_%f')]
+    assert objetos(store) == 1
+
+def test_importa_backups_legados(tmp_path):
+    diretorio = tmp_path / "backup"
+    diretorio.mkdir()
+    (diretorio / "pedidos_backup_20260130_080000.xlsx").write_text("antigo")
+    store = BackupStore(str(diretorio))
+    assert [e["data"] for e in store.listar()] == ["2026-01-30T08:00:00"]
+    assert not (diretorio / "pedidos_backup_20260130_080000.xlsx").exists()
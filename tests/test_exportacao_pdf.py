@@ -0,0 +1,44 @@
+import io
+import zipfile
+
+import pytest
+from pypdf import PdfReader
+
+from utils.exportacao_pdf import MINIMO_PARALELO, ExportadorPDF
+from utils.renderizador_pdf import RenderizadorPDF
+
+def pedido(i: int) -> dict:
+    numero = f"REQ-{i:03d}"
+    return {
+        "info": {"Numero_Pedido": numero, "Data": "01/01/2026 10:00", "Cliente": "Renault",
+                 "RACK": "R1", "Localizacao": "A01", "Solicitante": "Teste", "Observacoes": "",
+                 "Ultima_Atualizacao": "", "Responsavel_Atualizacao": ""},
+        "itens": [{"Numero_Pedido": numero, "cod_yazaki": "123", "codigo_cabo": "CB-1",
+                   "seccao": "1.5", "cor": "PT", "quantidade": i + 1}],
+        "status": "Pendente"
+    }
+
+@pytest.fixture
+def exportador(monkeypatch):
+    # Cache de PDFs vazio, para os pedidos passarem pelo pool
+    monkeypatch.setattr(RenderizadorPDF, "_instancia", RenderizadorPDF())
+    exportador = ExportadorPDF(processos=2)
+    yield exportador
+    exportador._descartar_pool()
+
+def test_pdf_unico_renderizado_no_pool_na_ordem(exportador):
+    pedidos = [pedido(i) for i in range(MINIMO_PARALELO + 2)][::-1]
+    documento = PdfReader(io.BytesIO(exportador.exportar_pdf_unico(pedidos)))
+
+    assert exportador._pool is not None
+    numeros = [p["info"]["Numero_Pedido"] for p in pedidos]
+    assert [numero for pagina, numero in zip(documento.pages, numeros)
+            if numero in pagina.extract_text()] == numeros
+    # Os PDFs renderizados no pool ficam no cache para o próximo download
+    assert all(RenderizadorPDF.get_instance().consultar(p) is not None for p in pedidos)
+
+def test_zip_com_um_pdf_por_pedido(exportador):
+    pedidos = [pedido(i) for i in range(3)]
+    with zipfile.ZipFile(io.BytesIO(exportador.exportar_zip(pedidos))) as arquivo:
+        assert arquivo.namelist() == ["REQ-000.pdf", "REQ-001.pdf", "REQ-002.pdf"]
+        assert len(PdfReader(io.BytesIO(arquivo.read("REQ-001.pdf"))).pages) == 1
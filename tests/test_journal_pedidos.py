@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from utils.journal_pedidos import JournalPedidos
+
+@pytest.fixture
+def caminho(tmp_path):
+    return tmp_path / "pedidos" / "pedidos_journal.jsonl"
+
+def entrada(numero: str) -> dict:
+    return {"tipo": "pedido", "pedido": {"Numero_Pedido": numero}, "itens": []}
+
+def test_registrar_e_ler_na_ordem(caminho):
+    journal = JournalPedidos(str(caminho))
+    journal.registrar(entrada("REQ-001"))
+    journal.registrar(entrada("REQ-002"), entrada("REQ-003"))
+    assert [e["pedido"]["Numero_Pedido"] for e in journal.ler()] == ["REQ-001", "REQ-002", "REQ-003"]
+    assert len(journal) == 3
+    # Outra instância (reinício do processo) conta as entradas do arquivo
+    assert len(JournalPedidos(str(caminho))) == 3
+
+def test_ultima_linha_truncada_e_ignorada(caminho):
+    journal = JournalPedidos(str(caminho))
+    journal.registrar(entrada("REQ-001"))
+    # Queda no meio da escrita: metade de uma linha, sem '\n'
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entrada("REQ-002"))[:20])
+
+    reaberto = JournalPedidos(str(caminho))
+    assert [e["pedido"]["Numero_Pedido"] for e in reaberto.ler()] == ["REQ-001"]
+
+    # A próxima entrada começa numa linha nova, sem se perder junto com a truncada
+    reaberto.registrar(entrada("REQ-003"))
+    assert [e["pedido"]["Numero_Pedido"] for e in reaberto.ler()] == ["REQ-001", "REQ-003"]
+
+def test_limpar(caminho):
+    journal = JournalPedidos(str(caminho))
+    journal.registrar(entrada("REQ-001"))
+    journal.limpar()
+    assert journal.ler() == []
+    assert len(journal) == 0
+    journal.registrar(entrada("REQ-002"))
+    assert len(journal.ler()) == 1
+
+def test_instancia_compartilhada_por_caminho(caminho, tmp_path):
+    assert JournalPedidos.get_instance(str(caminho)) is JournalPedidos.get_instance(
+        str(tmp_path / "pedidos" / ".." / "pedidos" / "pedidos_journal.jsonl")
+    )
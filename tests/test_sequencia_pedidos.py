@@ -0,0 +1,74 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from utils.sequencia_pedidos import SequenciaPedidos
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+# Processo separado reservando números do mesmo contador, um de cada vez
+PROCESSO = """
+import sys
+from utils.sequencia_pedidos import SequenciaPedidos
+sequencia = SequenciaPedidos(sys.argv[1], lambda: 0)
+for _ in range(int(sys.argv[2])):
+    print(sequencia.proximo(), flush=True)
+"""
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / "pedidos" / "sequencia_pedidos.txt")
+
+def esperados(quantidade: int, inicio: int = 1) -> list:
+    return [SequenciaPedidos.formatar(n) for n in range(inicio, inicio + quantidade)]
+
+def test_reconstroi_so_sem_contador(caminho):
+    chamadas = []
+    def reconstruir():
+        chamadas.append(1)
+        return 41
+
+    sequencia = SequenciaPedidos(caminho, reconstruir)
+    assert sequencia.proximo() == "REQ-042"
+    assert sequencia.reservar(3) == ["REQ-043", "REQ-044", "REQ-045"]
+    # Outra instância (reinício do processo) continua do contador
+    assert SequenciaPedidos(caminho, reconstruir).proximo() == "REQ-046"
+    assert len(chamadas) == 1
+
+def test_reservar_nada_e_recusado(caminho):
+    with pytest.raises(ValueError):
+        SequenciaPedidos(caminho, lambda: 0).reservar(0)
+
+def test_extrair_numero():
+    assert SequenciaPedidos.extrair_numero(" REQ-1234 ") == 1234
+    assert SequenciaPedidos.extrair_numero("PED-12") == 0
+
+def test_threads_recebem_numeros_unicos(caminho):
+    resultados = []
+    def reservar():
+        sequencia = SequenciaPedidos(caminho, lambda: 0)
+        for _ in range(25):
+            resultados.append(sequencia.proximo())
+
+    threads = [threading.Thread(target=reservar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(resultados) == esperados(200)
+
+def test_processos_recebem_numeros_unicos(caminho):
+    processos = [
+        subprocess.Popen([sys.executable, "-c", PROCESSO, caminho, "30"], cwd=RAIZ,
+                         stdout=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+    resultados = []
+    for processo in processos:
+        saida, _ = processo.communicate(timeout=60)
+        assert processo.returncode == 0
+        resultados.extend(saida.split())
+    assert sorted(resultados) == esperados(120)
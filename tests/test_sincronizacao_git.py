@@ -0,0 +1,168 @@
+import json
+import subprocess
+import threading
+
+import git
+import pandas as pd
+import pytest
+
+from utils.armazenamento import SQLiteArmazenamento
+from utils.github_sync import GitHubSync
+from utils.sync_worker import SyncWorker
+
+@pytest.fixture
+def remoto(tmp_path, monkeypatch):
+    """Repositório bare local no lugar do GitHub, com identidade de commit fixa"""
+    for variavel, valor in (("GIT_AUTHOR_NAME", "Teste"), ("GIT_AUTHOR_EMAIL", "teste@exemplo.com"),
+                            ("GIT_COMMITTER_NAME", "Teste"), ("GIT_COMMITTER_EMAIL", "teste@exemplo.com")):
+        monkeypatch.setenv(variavel, valor)
+    monkeypatch.delenv("IS_STREAMLIT_CLOUD", raising=False)
+    caminho = tmp_path / "remoto.git"
+    subprocess.run(["git", "init", "--quiet", "--bare", str(caminho)], check=True)
+    return caminho
+
+def nova_copia(tmp_path, remoto, nome) -> GitHubSync:
+    """GitHubSync com config e pasta de dados próprias, apontando para o remoto"""
+    pasta = tmp_path / nome
+    pasta.mkdir()
+    config = tmp_path / f"{nome}.json"
+    config.write_text(json.dumps({
+        "github_repo": str(remoto),
+        "local_mapeamento": str(pasta / "Mapeamento de Racks - Cabos.xlsx"),
+        "local_pedidos": str(pasta / "pedidos.xlsx")
+    }))
+    return GitHubSync(str(config), str(pasta))
+
+def commits_no_remoto(remoto) -> int:
+    repo = git.Repo(str(remoto))
+    if "main" not in [ramo.name for ramo in repo.heads]:
+        return 0
+    return sum(1 for _ in repo.iter_commits("main"))
+
+def test_solicitacoes_em_rajada_geram_uma_sincronizacao(remoto, tmp_path):
+    sync = nova_copia(tmp_path, remoto, "a")
+    chamadas = []
+
+    def sincronizar():
+        chamadas.append(threading.current_thread().name)
+        return sync.sync_files()
+
+    worker = SyncWorker(sincronizar, janela=0.3)
+    try:
+        (tmp_path / "a" / "pedidos.xlsx").write_bytes(b"versao 1")
+        for numero in range(5):
+            worker.solicitar(f"REQ-{numero:03d}")
+        assert worker.aguardar(timeout=10)
+        assert len(chamadas) == 1
+        assert worker.status()["ultimo_sucesso"]
+        assert commits_no_remoto(remoto) == 1
+
+        # Nova rajada depois da janela: outro commit
+        (tmp_path / "a" / "pedidos.xlsx").write_bytes(b"versao 2")
+        worker.solicitar("REQ-005")
+        worker.solicitar("REQ-006")
+        assert worker.aguardar(timeout=10)
+        assert len(chamadas) == 2
+        assert commits_no_remoto(remoto) == 2
+    finally:
+        worker.parar()
+
+def test_sem_alteracoes_nao_cria_commit(remoto, tmp_path):
+    sync = nova_copia(tmp_path, remoto, "a")
+    (tmp_path / "a" / "pedidos.xlsx").write_bytes(b"versao 1")
+    assert sync.sync_files()[0]
+    assert sync.sync_files()[0]
+    assert commits_no_remoto(remoto) == 1
+
+def test_envio_e_recebimento_entre_copias(remoto, tmp_path):
+    a = nova_copia(tmp_path, remoto, "a")
+    (tmp_path / "a" / "pedidos.xlsx").write_bytes(b"pedidos de A")
+    (tmp_path / "a" / "pedidos_journal.jsonl").write_text('{"tipo": "pedido"}\n')
+    sucesso, mensagem = a.sync_files()
+    assert sucesso, mensagem
+
+    # Uma cópia nova recebe os dados do remoto
+    b = nova_copia(tmp_path, remoto, "b")
+    sucesso, mensagem = b.sync_files()
+    assert sucesso, mensagem
+    assert (tmp_path / "b" / "pedidos.xlsx").read_bytes() == b"pedidos de A"
+    assert (tmp_path / "b" / "pedidos_journal.jsonl").exists()
+
+    # Arquivos que não são dados vêm do remoto; os dados locais de A prevalecem
+    repo_b = git.Repo(str(tmp_path / "b"))
+    (tmp_path / "b" / "LEIAME.txt").write_text("enviado por B")
+    repo_b.index.add(["LEIAME.txt"])
+    repo_b.index.commit("Leiame")
+    repo_b.git.push("origin", "main")
+    (tmp_path / "a" / "pedidos.xlsx").write_bytes(b"pedidos de A, alterados")
+
+    sucesso, mensagem = a.sync_files()
+    assert sucesso, mensagem
+    assert (tmp_path / "a" / "LEIAME.txt").read_text() == "enviado por B"
+    assert (tmp_path / "a" / "pedidos.xlsx").read_bytes() == b"pedidos de A, alterados"
+
+    arvore = git.Repo(str(remoto)).commit("main").tree
+    assert arvore["pedidos.xlsx"].data_stream.read() == b"pedidos de A, alterados"
+    assert arvore["LEIAME.txt"].data_stream.read() == b"enviado por B"
+
+def test_remoto_inacessivel_agenda_nova_tentativa(remoto, tmp_path):
+    sync = nova_copia(tmp_path, tmp_path / "nao-existe.git", "a")
+    worker = SyncWorker(sync.sync_files, janela=0.05, espera_inicial=60)
+    try:
+        worker.solicitar("REQ-001")
+        assert not worker.aguardar(timeout=2)
+        status = worker.status()
+        assert status["ultimo_sucesso"] is False
+        assert status["proxima_tentativa"] is not None
+        assert status["fila"] == 1
+    finally:
+        worker.parar()
+
+def test_backend_sqlite_exporta_antes_de_sincronizar(remoto, tmp_path):
+    sync = nova_copia(tmp_path, remoto, "a")
+    pasta = tmp_path / "a"
+    armazenamento = SQLiteArmazenamento(
+        str(pasta / "pedidos.xlsx"), str(pasta / "backup"), str(pasta / "pedidos.db")
+    )
+    worker = SyncWorker(sync.sync_files, janela=0.05)
+    worker.adicionar_preparacao(armazenamento.preparar_sincronizacao)
+    worker.adicionar_preparacao(armazenamento.preparar_sincronizacao)
+    assert len(worker.preparacoes) == 1
+    try:
+        armazenamento.inserir_pedido(
+            {"Numero_Pedido": "REQ-001", "Data": "01/01/2026 10:00", "Status": "Pendente"},
+            [{"Numero_Pedido": "REQ-001", "cod_yazaki": "123", "quantidade": 2}]
+        )
+        armazenamento.atualizar_status("REQ-001", "Concluído", "01/01/2026 11:00", "Teste")
+        worker.solicitar("REQ-001")
+        assert worker.aguardar(timeout=10)
+        assert armazenamento.alteracoes_pendentes() == 0
+    finally:
+        worker.parar()
+
+    # O banco não vai para o GitHub; a exportação em pedidos.xlsx leva o pedido atualizado
+    b = nova_copia(tmp_path, remoto, "b")
+    sucesso, mensagem = b.sync_files()
+    assert sucesso, mensagem
+    assert not (tmp_path / "b" / "pedidos.db").exists()
+    pedidos = pd.read_excel(tmp_path / "b" / "pedidos.xlsx", sheet_name="Pedidos", dtype=str)
+    assert pedidos[["Numero_Pedido", "Status"]].values.tolist() == [["REQ-001", "Concluído"]]
+
+def test_falha_na_preparacao_nao_sincroniza(remoto, tmp_path):
+    sync = nova_copia(tmp_path, remoto, "a")
+    (tmp_path / "a" / "pedidos.xlsx").write_bytes(b"versao 1")
+
+    def falhar():
+        raise OSError("disco cheio")
+
+    worker = SyncWorker(sync.sync_files, janela=0.05, espera_inicial=60)
+    worker.adicionar_preparacao(falhar)
+    try:
+        worker.solicitar("REQ-001")
+        assert not worker.aguardar(timeout=2)
+        status = worker.status()
+        assert status["ultimo_sucesso"] is False
+        assert "disco cheio" in status["ultima_mensagem"]
+        assert commits_no_remoto(remoto) == 0
+    finally:
+        worker.parar()
@@ -0,0 +1,164 @@
+import json
+import os
+import stat
+
+import pytest
+
+from utils.print_manager import PrintManager, SpoolerImpressao, UnixPrintManager
+
+# Impressora falsa: registra cada chamada numa linha (impressora e quantos
+# arquivos) e falha enquanto o contador de FALHAS for maior que zero
+IMPRESSORA_FALSA = """#!/bin/sh
+impressora=""
+if [ "$1" = "-d" ]; then
+    impressora="$2"
+    shift 2
+fi
+if [ -f "$FALHAS" ] && [ "$(cat "$FALHAS")" -gt 0 ]; then
+    echo $(( $(cat "$FALHAS") - 1 )) > "$FALHAS"
+    echo "$(date +%s.%N) falha $impressora $#" >> "$CHAMADAS"
+    echo "sem papel" >&2
+    exit 1
+fi
+echo "$(date +%s.%N) ok $impressora $#" >> "$CHAMADAS"
+"""
+
+@pytest.fixture
+def impressora_falsa(tmp_path, monkeypatch):
+    """COMANDO_IMPRESSAO apontando para o script; devolve uma função que lê as chamadas"""
+    script = tmp_path / "impressora.sh"
+    script.write_text(IMPRESSORA_FALSA)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    chamadas = tmp_path / "chamadas.log"
+    falhas = tmp_path / "falhas"
+    monkeypatch.setenv("COMANDO_IMPRESSAO", f"{script} -d {{impressora}}")
+    monkeypatch.setenv("CHAMADAS", str(chamadas))
+    monkeypatch.setenv("FALHAS", str(falhas))
+    monkeypatch.delenv("IMPRESSORA_PADRAO", raising=False)
+
+    def ler():
+        if not chamadas.exists():
+            return []
+        return [linha.split() for linha in chamadas.read_text().splitlines()]
+
+    ler.falhar = lambda vezes: falhas.write_text(str(vezes))
+    return ler
+
+@pytest.fixture
+def spoolers():
+    criados = []
+    yield criados
+    for spooler in criados:
+        spooler.parar()
+
+def novo_spooler(spoolers, diretorio, **opcoes):
+    spooler = SpoolerImpressao(str(diretorio), **opcoes)
+    spoolers.append(spooler)
+    return spooler
+
+def test_comando_configurado_pelo_ambiente(impressora_falsa):
+    gerenciador = PrintManager.get_instance()
+    assert isinstance(gerenciador, UnixPrintManager)
+    assert gerenciador._montar_comando(["a.pdf"], "P1")[-3:] == ["-d", "P1", "a.pdf"]
+    # Sem impressora, a opção -d sai junto com o marcador
+    assert gerenciador._montar_comando(["a.pdf"], None)[1:] == ["a.pdf"]
+
+def test_agrupa_trabalhos_seguidos_da_mesma_impressora(impressora_falsa, spoolers, tmp_path):
+    diretorio = tmp_path / "fila"
+    parado = novo_spooler(spoolers, diretorio)
+    parado.parar()
+    ids = [parado.enviar(b"%PDF", f"{i}.pdf", nome)
+           for i, nome in enumerate(["A", "A", "A", "B", "B", "A"])]
+
+    spooler = novo_spooler(spoolers, diretorio)
+    assert spooler.aguardar(timeout=10)
+    assert [(c[1], c[2], int(c[3])) for c in impressora_falsa()] == [
+        ("ok", "A", 3), ("ok", "B", 2), ("ok", "A", 1)
+    ]
+    assert all(spooler.status(i)["status"] == SpoolerImpressao.CONCLUIDO for i in ids)
+    # PDFs impressos são apagados
+    assert sorted(os.listdir(diretorio)) == ["fila.json"]
+
+def test_lote_respeita_lote_maximo(impressora_falsa, spoolers, tmp_path):
+    diretorio = tmp_path / "fila"
+    parado = novo_spooler(spoolers, diretorio)
+    parado.parar()
+    for i in range(5):
+        parado.enviar(b"%PDF", f"{i}.pdf", "A")
+
+    spooler = novo_spooler(spoolers, diretorio, lote_maximo=2)
+    assert spooler.aguardar(timeout=10)
+    assert [int(c[3]) for c in impressora_falsa()] == [2, 2, 1]
+
+def test_repete_com_espera_exponencial(impressora_falsa, spoolers, tmp_path):
+    impressora_falsa.falhar(2)
+    spooler = novo_spooler(spoolers, tmp_path / "fila", espera_inicial=0.2)
+    identificador = spooler.enviar(b"%PDF", "1.pdf", "A")
+    assert spooler.aguardar(timeout=10)
+
+    chamadas = impressora_falsa()
+    assert [c[1] for c in chamadas] == ["falha", "falha", "ok"]
+    instantes = [float(c[0]) for c in chamadas]
+    # 0,2 s depois da primeira falha, 0,4 s depois da segunda
+    assert instantes[1] - instantes[0] >= 0.2
+    assert instantes[2] - instantes[1] >= 0.4
+    trabalho = spooler.status(identificador)
+    assert trabalho["status"] == SpoolerImpressao.CONCLUIDO
+    assert trabalho["tentativas"] == 3
+
+def test_falha_definitiva_e_reenviar(impressora_falsa, spoolers, tmp_path):
+    impressora_falsa.falhar(2)
+    spooler = novo_spooler(spoolers, tmp_path / "fila", tentativas_maximas=2, espera_inicial=0.05)
+    identificador = spooler.enviar(b"%PDF", "1.pdf", "A")
+    assert spooler.aguardar(timeout=10)
+
+    trabalho = spooler.status(identificador)
+    assert trabalho["status"] == SpoolerImpressao.FALHOU
+    assert "sem papel" in trabalho["erro"]
+    assert spooler.resumo()[SpoolerImpressao.FALHOU] == 1
+
+    assert spooler.reenviar(identificador)
+    assert spooler.aguardar(timeout=10)
+    trabalho = spooler.status(identificador)
+    assert trabalho["status"] == SpoolerImpressao.CONCLUIDO
+    assert trabalho["tentativas"] == 1
+    # Só trabalhos que falharam voltam para a fila
+    assert not spooler.reenviar(identificador)
+    assert not spooler.reenviar("inexistente")
+
+def test_fila_persiste_entre_reinicios(impressora_falsa, spoolers, tmp_path):
+    diretorio = tmp_path / "fila"
+    parado = novo_spooler(spoolers, diretorio)
+    parado.parar()
+    pendente = parado.enviar(b"%PDF", "1.pdf", "A")
+    interrompido = parado.enviar(b"%PDF", "2.pdf", "A")
+
+    # Simula uma queda no meio do envio do segundo trabalho
+    caminho = diretorio / "fila.json"
+    trabalhos = json.loads(caminho.read_text(encoding="utf-8"))
+    trabalhos[1]["status"] = SpoolerImpressao.IMPRIMINDO
+    caminho.write_text(json.dumps(trabalhos), encoding="utf-8")
+    assert impressora_falsa() == []
+
+    spooler = novo_spooler(spoolers, diretorio)
+    assert spooler.aguardar(timeout=10)
+    assert spooler.status(pendente)["status"] == SpoolerImpressao.CONCLUIDO
+    assert spooler.status(interrompido)["status"] == SpoolerImpressao.CONCLUIDO
+    spooler.parar()
+
+    # O estado final também fica gravado
+    reaberto = novo_spooler(spoolers, diretorio)
+    assert reaberto.resumo()[SpoolerImpressao.CONCLUIDO] == 2
+
+def test_fila_ilegivel_vira_aviso(impressora_falsa, spoolers, tmp_path):
+    diretorio = tmp_path / "fila"
+    diretorio.mkdir()
+    (diretorio / "fila.json").write_text("{ quebrado", encoding="utf-8")
+
+    spooler = novo_spooler(spoolers, diretorio)
+    assert "ilegível" in spooler.aviso
+    assert spooler.trabalhos() == []
+    # O conteúdo anterior não é sobrescrito
+    preservados = [n for n in os.listdir(diretorio) if n.endswith(".ilegivel")]
+    assert len(preservados) == 1
+    assert (diretorio / preservados[0]).read_text(encoding="utf-8") == "{ quebrado"
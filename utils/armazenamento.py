@@ -0,0 +1,834 @@
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from models.esquema import (
+    COLUNAS_ITENS, COLUNAS_PEDIDOS, CONVERSORES_LEITURA, TIPOS_LEITURA, VERSAO_ESQUEMA,
+    inteiro_ou_zero, normalizar_planilha, usar_coluna
+)
+from utils.backup_store import BackupStore
+from utils.cache_planilha import CachePlanilha
+from utils.diagnostico import instrumentar
+from utils.journal_pedidos import JournalPedidos
+from utils.leitor_planilha import LeitorPlanilha
+
+# Conversores usados na leitura em streaming (as demais colunas são texto)
+TIPOS_ITENS = {"quantidade": inteiro_ou_zero}
+
+# Quantidade de entradas no journal que dispara a compactação em segundo plano
+LIMITE_COMPACTACAO = 200
+
+logger = logging.getLogger(__name__)
+
+class ArmazenamentoPedidos(ABC):
+    """Interface comum dos backends de armazenamento de pedidos e itens"""
+
+    def __init__(self, arquivo_pedidos: str, diretorio_backup: str):
+        self.arquivo_pedidos = arquivo_pedidos
+        self.diretorio_backup = diretorio_backup
+        self.cache = CachePlanilha.get_instance()
+        os.makedirs(self.diretorio_backup, exist_ok=True)
+        self.backups = BackupStore(self.diretorio_backup)
+        # Falhas exibidas nas configurações: migração do esquema e última compactação em segundo plano
+        self.erro_migracao = ""
+        self.erro_compactacao = ""
+        self.arquivo_versao_esquema = os.path.join(
+            os.path.dirname(arquivo_pedidos), 'versao_esquema.txt'
+        )
+        self._migrar_esquema()
+
+    @instrumentar()
+    def _migrar_esquema(self):
+        """
+        Migração única de pedidos.xlsx para o layout atual (VERSAO_ESQUEMA):
+        colunas na ordem do esquema, sem colunas extras, datas em 'dd/mm/aaaa
+        HH:MM', textos aparados e quantidade inteira. Um backup é registrado
+        antes de regravar.
+        """
+        versao = 0
+        if os.path.exists(self.arquivo_versao_esquema):
+            with open(self.arquivo_versao_esquema, 'r', encoding='utf-8') as f:
+                conteudo = f.read().strip()
+            versao = int(conteudo) if conteudo.isdigit() else 0
+        if versao >= VERSAO_ESQUEMA:
+            return
+
+        try:
+            if os.path.exists(self.arquivo_pedidos):
+                abas = pd.read_excel(
+                    self.arquivo_pedidos,
+                    sheet_name=['Pedidos', 'Itens'],
+                    dtype=TIPOS_LEITURA,
+                    converters=CONVERSORES_LEITURA
+                )
+                df_pedidos, df_itens = normalizar_planilha(abas['Pedidos'], abas['Itens'])
+                self._fazer_backup()
+                self._gravar_planilha(df_pedidos, df_itens)
+            with open(self.arquivo_versao_esquema, 'w', encoding='utf-8') as f:
+                f.write(str(VERSAO_ESQUEMA))
+        except Exception as e:
+            # A planilha segue legível no formato antigo; a migração é tentada de novo no próximo início
+            logger.exception("Falha na migração de pedidos.xlsx")
+            self.erro_migracao = (
+                f"Falha na migração de pedidos.xlsx para o esquema {VERSAO_ESQUEMA}: {str(e)} "
+                "(a planilha segue no formato antigo; nova tentativa no próximo início)"
+            )
+
+    @staticmethod
+    def _assinatura_arquivo(caminho: str) -> Optional[tuple]:
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def assinatura(self) -> tuple:
+        """
+        (mtime, tamanho) dos arquivos de dados, como no CachePlanilha: muda a
+        cada gravação, inclusive as feitas fora deste processo
+        """
+        return (self._assinatura_arquivo(self.arquivo_pedidos),)
+
+    @abstractmethod
+    def ler_dados(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Retorna os DataFrames de pedidos e itens"""
+        pass
+
+    def ler_pedidos(self, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Pedidos, opcionalmente só com as colunas indicadas"""
+        df_pedidos = self.ler_dados()[0]
+        return df_pedidos if colunas is None else df_pedidos.reindex(columns=colunas)
+
+    def ler_itens(self) -> pd.DataFrame:
+        return self.ler_dados()[1]
+
+    @abstractmethod
+    def buscar_pedido(self, numero_pedido: str) -> Tuple[Optional[dict], List[dict]]:
+        """Retorna o registro do pedido (ou None) e a lista de seus itens"""
+        pass
+
+    @instrumentar()
+    def buscar_pedidos_lote(self, numeros: List[str]) -> Dict[str, Tuple[dict, List[dict]]]:
+        """
+        Registros e itens de vários pedidos numa única leitura, por número do
+        pedido (os inexistentes ficam de fora)
+        """
+        procurados = set(numeros)
+        df_pedidos, df_itens = self.ler_dados()
+        df_pedidos = df_pedidos[df_pedidos["Numero_Pedido"].isin(procurados)].fillna("")
+        df_itens = df_itens[df_itens["Numero_Pedido"].isin(procurados)].fillna("")
+        itens: Dict[str, List[dict]] = {}
+        for item in df_itens.to_dict('records'):
+            itens.setdefault(item["Numero_Pedido"], []).append(item)
+        return {
+            pedido["Numero_Pedido"]: (pedido, itens.get(pedido["Numero_Pedido"], []))
+            for pedido in df_pedidos.to_dict('records')
+        }
+
+    @abstractmethod
+    def aplicar_lote(self, alteracoes: List[dict]):
+        """
+        Grava um lote de alterações numa única operação. Cada alteração é
+        {"tipo": "pedido", "pedido": {...}, "itens": [...]} ou
+        {"tipo": "status", "Numero_Pedido", "Status", "Ultima_Atualizacao",
+        "Responsavel_Atualizacao"}; mudanças de status de pedidos inexistentes
+        são ignoradas (validar_lote as recusa antes).
+        """
+        pass
+
+    def validar_lote(self, entradas: List[List[dict]]) -> List[Optional[Exception]]:
+        """
+        Confere cada grupo de alterações enviado junto (uma entrada da fila de
+        escrita) antes da gravação e retorna o erro de cada um, ou None. Mudar o
+        status de um pedido inexistente recusa o grupo com ValueError, sem afetar
+        os demais; pedidos criados pelos grupos aceitos antes contam como existentes.
+        """
+        numeros = {
+            alteracao["Numero_Pedido"]
+            for alteracoes in entradas for alteracao in alteracoes
+            if alteracao["tipo"] == "status"
+        }
+        if not numeros:
+            return [None] * len(entradas)
+
+        existentes = set(self.buscar_pedidos_lote(sorted(numeros)))
+        erros: List[Optional[Exception]] = []
+        for alteracoes in entradas:
+            conhecidos = set(existentes)
+            erro = None
+            for alteracao in alteracoes:
+                if alteracao["tipo"] == "pedido":
+                    conhecidos.add(alteracao["pedido"]["Numero_Pedido"])
+                elif alteracao["Numero_Pedido"] not in conhecidos:
+                    erro = ValueError(f"Pedido {alteracao['Numero_Pedido']} não encontrado")
+                    break
+            if erro is None:
+                existentes = conhecidos
+            erros.append(erro)
+        return erros
+
+    @staticmethod
+    def alteracao_pedido(pedido: dict, itens: List[dict]) -> dict:
+        return {"tipo": "pedido", "pedido": pedido, "itens": itens}
+
+    @staticmethod
+    def alteracao_status(numero_pedido: str, status: str,
+                         ultima_atualizacao: str, responsavel: str) -> dict:
+        return {
+            "tipo": "status",
+            "Numero_Pedido": numero_pedido,
+            "Status": status,
+            "Ultima_Atualizacao": ultima_atualizacao,
+            "Responsavel_Atualizacao": responsavel
+        }
+
+    def inserir_pedido(self, pedido: dict, itens: List[dict]):
+        self.aplicar_lote([self.alteracao_pedido(pedido, itens)])
+
+    def atualizar_status(self, numero_pedido: str, status: str,
+                         ultima_atualizacao: str, responsavel: str):
+        alteracao = self.alteracao_status(numero_pedido, status, ultima_atualizacao, responsavel)
+        erro = self.validar_lote([[alteracao]])[0]
+        if erro:
+            raise erro
+        self.aplicar_lote([alteracao])
+
+    @abstractmethod
+    def alteracoes_pendentes(self) -> int:
+        """Quantidade de alterações ainda não gravadas em pedidos.xlsx"""
+        pass
+
+    @abstractmethod
+    def consolidar_planilha(self) -> int:
+        """Grava o estado atual em pedidos.xlsx e retorna as alterações incorporadas"""
+        pass
+
+    def preparar_sincronizacao(self):
+        """
+        Deixa em dia os arquivos versionados no GitHub (pedidos.xlsx e o journal)
+        antes de uma sincronização
+        """
+        pass
+
+    @instrumentar()
+    def _fazer_backup(self):
+        """Registra um snapshot do arquivo de pedidos antes de modificá-lo"""
+        self.backups.registrar(self.arquivo_pedidos)
+
+    def listar_backups(self) -> List[dict]:
+        return self.backups.listar()
+
+    def restaurar_backup(self, backup_id: str):
+        """
+        Substitui pedidos.xlsx pelo conteúdo do backup, que permanece no repositório.
+        As alterações pendentes são incorporadas à planilha antes do backup de
+        segurança, para que o estado atual também possa ser restaurado depois.
+        """
+        self.consolidar_planilha()
+        self._fazer_backup()
+        self.backups.restaurar(backup_id, self.arquivo_pedidos)
+        self.cache.invalidar(self.arquivo_pedidos)
+
+    @instrumentar()
+    def _gravar_planilha(self, df_pedidos: pd.DataFrame, df_itens: pd.DataFrame):
+        """Reescreve pedidos.xlsx no layout Pedidos/Itens"""
+        try:
+            with pd.ExcelWriter(self.arquivo_pedidos, engine='openpyxl') as writer:
+                df_pedidos.fillna("").to_excel(writer, sheet_name='Pedidos', index=False)
+                df_itens.fillna("").to_excel(writer, sheet_name='Itens', index=False)
+        finally:
+            self.cache.invalidar(self.arquivo_pedidos)
+
+    _instancias: Dict[Tuple[str, str], 'ArmazenamentoPedidos'] = {}
+    _lock_instancias = threading.Lock()
+
+    @staticmethod
+    def get_instance(arquivo_pedidos: str, diretorio_backup: str) -> 'ArmazenamentoPedidos':
+        """
+        Retorna o backend configurado em BACKEND_PEDIDOS ('xlsx' por padrão ou
+        'sqlite'), compartilhado entre as sessões do processo
+        """
+        backend = os.getenv('BACKEND_PEDIDOS', 'xlsx').strip().lower()
+        chave = (backend, os.path.abspath(arquivo_pedidos))
+        with ArmazenamentoPedidos._lock_instancias:
+            if chave not in ArmazenamentoPedidos._instancias:
+                if backend == 'sqlite':
+                    caminho_banco = os.getenv(
+                        'CAMINHO_BANCO_PEDIDOS',
+                        os.path.splitext(arquivo_pedidos)[0] + '.db'
+                    )
+                    instancia = SQLiteArmazenamento(
+                        arquivo_pedidos, diretorio_backup, caminho_banco
+                    )
+                elif backend == 'xlsx':
+                    instancia = ExcelArmazenamento(arquivo_pedidos, diretorio_backup)
+                else:
+                    raise ValueError(
+                        f"Backend de pedidos inválido: {backend}. Use 'xlsx' ou 'sqlite'."
+                    )
+                ArmazenamentoPedidos._instancias[chave] = instancia
+            return ArmazenamentoPedidos._instancias[chave]
+
+class ExcelArmazenamento(ArmazenamentoPedidos):
+    """
+    Backend padrão: snapshot em pedidos.xlsx mais um journal append-only com os
+    pedidos e mudanças de status ainda não compactados
+    """
+
+    # Garante uma única compactação em segundo plano por processo
+    _lock_compactacao = threading.Lock()
+
+    def __init__(self, arquivo_pedidos: str, diretorio_backup: str):
+        super().__init__(arquivo_pedidos, diretorio_backup)
+        self.arquivo_journal = self.caminho_journal(arquivo_pedidos)
+        self.journal = JournalPedidos.get_instance(self.arquivo_journal)
+
+    @staticmethod
+    def caminho_journal(arquivo_pedidos: str) -> str:
+        return os.path.join(os.path.dirname(arquivo_pedidos), 'pedidos_journal.jsonl')
+
+    def assinatura(self) -> tuple:
+        return (
+            self._assinatura_arquivo(self.arquivo_pedidos),
+            self._assinatura_arquivo(self.arquivo_journal)
+        )
+
+    @instrumentar()
+    def _ler_planilha(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Lê as abas de pedidos e itens do último snapshot compactado"""
+        try:
+            if not os.path.exists(self.arquivo_pedidos):
+                return (
+                    pd.DataFrame(columns=COLUNAS_PEDIDOS),
+                    pd.DataFrame(columns=COLUNAS_ITENS)
+                )
+            abas = self.cache.ler(
+                self.arquivo_pedidos,
+                ['Pedidos', 'Itens'],
+                dtype=TIPOS_LEITURA,
+                converters=CONVERSORES_LEITURA,
+                usecols=usar_coluna
+            )
+            df_pedidos = abas['Pedidos']
+            df_itens = abas['Itens']
+
+            # Garantir que as colunas 'Ultima_Atualizacao' e 'Responsavel_Atualizacao' existam
+            if 'Ultima_Atualizacao' not in df_pedidos.columns:
+                df_pedidos['Ultima_Atualizacao'] = ""
+            if 'Responsavel_Atualizacao' not in df_pedidos.columns:
+                df_pedidos['Responsavel_Atualizacao'] = ""
+
+            return df_pedidos, df_itens
+        except Exception as e:
+            raise Exception(f"Erro ao ler pedidos: {str(e)}")
+
+    @staticmethod
+    def _aplicar_journal(df_pedidos: pd.DataFrame, df_itens: pd.DataFrame,
+                         entradas: List[dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Aplica as entradas do journal sobre o snapshot. A aplicação é idempotente:
+        pedidos já presentes no snapshot são ignorados, de modo que uma compactação
+        interrompida não duplica registros.
+        """
+        if not entradas:
+            return df_pedidos, df_itens
+
+        existentes = set(df_pedidos["Numero_Pedido"].astype(str))
+        novos_pedidos = []
+        novos_itens = []
+        atualizacoes = []
+
+        for entrada in entradas:
+            if entrada.get("tipo") == "pedido":
+                numero = entrada["pedido"]["Numero_Pedido"]
+                if numero in existentes:
+                    continue
+                existentes.add(numero)
+                novos_pedidos.append(entrada["pedido"])
+                novos_itens.extend(entrada["itens"])
+            elif entrada.get("tipo") == "status":
+                atualizacoes.append(entrada)
+
+        if novos_pedidos:
+            df_pedidos = pd.concat(
+                [df_pedidos, pd.DataFrame(novos_pedidos, columns=COLUNAS_PEDIDOS)],
+                ignore_index=True
+            )
+        if novos_itens:
+            df_itens = pd.concat(
+                [df_itens, pd.DataFrame(novos_itens, columns=COLUNAS_ITENS)],
+                ignore_index=True
+            )
+
+        if atualizacoes:
+            df_pedidos = df_pedidos.astype({
+                "Status": object,
+                "Ultima_Atualizacao": object,
+                "Responsavel_Atualizacao": object
+            })
+            indices = pd.Series(df_pedidos.index, index=df_pedidos["Numero_Pedido"].astype(str))
+            indices = indices[~indices.index.duplicated(keep='last')]
+            for entrada in atualizacoes:
+                idx = indices.get(entrada["Numero_Pedido"])
+                if idx is None:
+                    continue
+                df_pedidos.at[idx, "Status"] = entrada["Status"]
+                df_pedidos.at[idx, "Ultima_Atualizacao"] = entrada["Ultima_Atualizacao"]
+                df_pedidos.at[idx, "Responsavel_Atualizacao"] = entrada["Responsavel_Atualizacao"]
+
+        return df_pedidos, df_itens
+
+    def ler_dados(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Lê pedidos e itens do snapshot mesclados com as entradas do journal"""
+        with self.journal.lock:
+            entradas = self.journal.ler()
+            df_pedidos, df_itens = self._ler_planilha()
+        return self._aplicar_journal(df_pedidos, df_itens, entradas)
+
+    @instrumentar()
+    def ler_pedidos(self, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Com projeção de colunas e o snapshot fora do cache, a aba é lida em
+        streaming só com as colunas pedidas, sem carregar a planilha inteira
+        """
+        if colunas is None or not os.path.exists(self.arquivo_pedidos) or \
+                self.cache.obter(self.arquivo_pedidos, ['Pedidos', 'Itens'], copiar=False):
+            return super().ler_pedidos(colunas)
+
+        projecao = list(dict.fromkeys(["Numero_Pedido"] + colunas))
+        with self.journal.lock:
+            entradas = self.journal.ler()
+            df_pedidos = pd.DataFrame.from_records(
+                LeitorPlanilha(self.arquivo_pedidos).linhas('Pedidos', projecao),
+                columns=projecao
+            )
+        df_pedidos, _ = self._aplicar_journal(
+            df_pedidos.reindex(columns=COLUNAS_PEDIDOS),
+            pd.DataFrame(columns=COLUNAS_ITENS),
+            entradas
+        )
+        return df_pedidos[colunas]
+
+    @instrumentar()
+    def _buscar_no_snapshot(self, numero_pedido: str) -> Tuple[Optional[dict], List[dict]]:
+        """
+        Procura o pedido em pedidos.xlsx. Se as abas já estão em cache, filtra os
+        DataFrames; senão lê em streaming e para assim que encontra o pedido e o
+        bloco de itens dele (os itens de um pedido são gravados juntos).
+        """
+        if not os.path.exists(self.arquivo_pedidos):
+            return None, []
+
+        abas = self.cache.obter(self.arquivo_pedidos, ['Pedidos', 'Itens'], copiar=False)
+        if abas is not None:
+            df_pedidos, df_itens = abas['Pedidos'], abas['Itens']
+            encontrados = df_pedidos[df_pedidos["Numero_Pedido"] == numero_pedido]
+            if encontrados.empty:
+                return None, []
+            itens = df_itens[df_itens["Numero_Pedido"] == numero_pedido].fillna("")
+            return encontrados.iloc[0].fillna("").to_dict(), itens.to_dict('records')
+
+        leitor = LeitorPlanilha(self.arquivo_pedidos)
+        pedido = next(
+            (p for p in leitor.linhas('Pedidos', COLUNAS_PEDIDOS)
+             if p["Numero_Pedido"] == numero_pedido),
+            None
+        )
+        if pedido is None:
+            return None, []
+
+        itens = []
+        for item in leitor.linhas('Itens', COLUNAS_ITENS, TIPOS_ITENS):
+            if item["Numero_Pedido"] == numero_pedido:
+                itens.append(item)
+            elif itens:
+                break
+        return pedido, itens
+
+    @instrumentar()
+    def buscar_pedido(self, numero_pedido: str) -> Tuple[Optional[dict], List[dict]]:
+        with self.journal.lock:
+            entradas = self.journal.ler()
+            # Pedidos recentes estão no journal, sem precisar abrir a planilha
+            pedido, itens = next(
+                ((dict(e["pedido"]), list(e["itens"])) for e in entradas
+                 if e.get("tipo") == "pedido" and e["pedido"]["Numero_Pedido"] == numero_pedido),
+                (None, [])
+            )
+            if pedido is None:
+                pedido, itens = self._buscar_no_snapshot(numero_pedido)
+
+        if pedido is None:
+            return None, []
+
+        for entrada in entradas:
+            if entrada.get("tipo") == "status" and entrada["Numero_Pedido"] == numero_pedido:
+                pedido["Status"] = entrada["Status"]
+                pedido["Ultima_Atualizacao"] = entrada["Ultima_Atualizacao"]
+                pedido["Responsavel_Atualizacao"] = entrada["Responsavel_Atualizacao"]
+        return pedido, itens
+
+    @instrumentar()
+    def aplicar_lote(self, alteracoes: List[dict]):
+        """O lote inteiro vira um único append (e um único fsync) no journal"""
+        self.journal.registrar(*alteracoes)
+        self._agendar_compactacao()
+
+    def alteracoes_pendentes(self) -> int:
+        return len(self.journal)
+
+    @instrumentar()
+    def consolidar_planilha(self) -> int:
+        """
+        Incorpora as entradas do journal na planilha de pedidos e esvazia o journal.
+        Retorna a quantidade de entradas compactadas.
+        """
+        try:
+            with self.journal.lock:
+                entradas = self.journal.ler()
+                if not entradas:
+                    return 0
+
+                df_pedidos, df_itens = self._aplicar_journal(
+                    *self._ler_planilha(),
+                    entradas
+                )
+
+                # Fazer backup antes de salvar
+                self._fazer_backup()
+                self._gravar_planilha(df_pedidos, df_itens)
+
+                self.journal.limpar()
+                self.erro_compactacao = ""
+                return len(entradas)
+        except Exception as e:
+            raise Exception(f"Erro ao compactar journal: {str(e)}")
+
+    @instrumentar()
+    def restaurar_backup(self, backup_id: str):
+        """
+        O backup representa o estado completo numa compactação anterior; as
+        entradas pendentes já foram compactadas no backup de segurança, então o
+        journal é esvaziado
+        """
+        with self.journal.lock:
+            super().restaurar_backup(backup_id)
+            self.journal.limpar()
+
+    def _agendar_compactacao(self):
+        """Dispara a compactação em segundo plano quando o journal fica grande"""
+        if len(self.journal) < LIMITE_COMPACTACAO:
+            return
+
+        def compactar():
+            if not ExcelArmazenamento._lock_compactacao.acquire(blocking=False):
+                return
+            try:
+                self.consolidar_planilha()
+            except Exception as e:
+                # As entradas seguem no journal; a próxima gravação tenta de novo
+                logger.exception("Falha na compactação do journal")
+                self.erro_compactacao = f"{str(e)} ({datetime.now().strftime('%d/%m/%Y %H:%M:%S')})"
+            finally:
+                ExcelArmazenamento._lock_compactacao.release()
+
+        threading.Thread(target=compactar, daemon=True).start()
+
+class SQLiteArmazenamento(ArmazenamentoPedidos):
+    """
+    Backend SQLite com tabelas Pedidos/Itens indexadas. pedidos.xlsx passa a ser
+    apenas uma exportação, atualizada por consolidar_planilha() e antes de cada
+    sincronização com o GitHub.
+    """
+
+    def __init__(self, arquivo_pedidos: str, diretorio_backup: str, caminho_banco: str):
+        super().__init__(arquivo_pedidos, diretorio_backup)
+        self.caminho_banco = caminho_banco
+        # Reentrante: restaurar_backup exporta as tabelas (consolidar_planilha) sob o lock
+        self.lock = threading.RLock()
+        self._criar_esquema()
+
+    def assinatura(self) -> tuple:
+        # Em modo WAL as gravações vão primeiro para o arquivo -wal
+        return (
+            self._assinatura_arquivo(self.caminho_banco),
+            self._assinatura_arquivo(self.caminho_banco + '-wal')
+        )
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.caminho_banco, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _criar_esquema(self):
+        diretorio = os.path.dirname(self.caminho_banco)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with closing(self._conectar()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS Pedidos (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Numero_Pedido TEXT NOT NULL UNIQUE,
+                    Data TEXT,
+                    Data_Ordenacao TEXT,
+                    Cliente TEXT,
+                    RACK TEXT,
+                    Localizacao TEXT,
+                    Solicitante TEXT,
+                    Observacoes TEXT,
+                    Status TEXT,
+                    Ultima_Atualizacao TEXT,
+                    Responsavel_Atualizacao TEXT
+                );
+                CREATE TABLE IF NOT EXISTS Itens (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Numero_Pedido TEXT NOT NULL,
+                    cod_yazaki TEXT,
+                    codigo_cabo TEXT,
+                    seccao TEXT,
+                    cor TEXT,
+                    quantidade INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS Meta (
+                    chave TEXT PRIMARY KEY,
+                    valor TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_pedidos_status ON Pedidos (Status);
+                CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON Pedidos (Cliente);
+                CREATE INDEX IF NOT EXISTS idx_pedidos_data ON Pedidos (Data_Ordenacao);
+                CREATE INDEX IF NOT EXISTS idx_itens_numero ON Itens (Numero_Pedido);
+            """)
+            vazio = conn.execute("SELECT COUNT(*) FROM Pedidos").fetchone()[0] == 0
+
+        # Na primeira execução, importar o histórico existente da planilha
+        if vazio and os.path.exists(self.arquivo_pedidos):
+            self._importar_planilha()
+
+    @staticmethod
+    def _data_ordenacao(data: str) -> str:
+        """Converte 'dd/mm/aaaa HH:MM' para ISO, permitindo ordenação pelo índice"""
+        try:
+            return datetime.strptime(str(data), '%d/%m/%Y %H:%M').isoformat()
+        except ValueError:
+            return ""
+
+    @instrumentar()
+    def restaurar_backup(self, backup_id: str):
+        """
+        Restaura a planilha e recarrega as tabelas a partir dela numa única
+        transação: quem lê nesse meio tempo vê os dados antigos, nunca o banco vazio
+        """
+        with self.lock:
+            super().restaurar_backup(backup_id)
+            df_pedidos, df_itens = self._ler_planilha(incluir_journal=False)
+            with closing(self._conectar()) as conn, conn:
+                conn.execute("DELETE FROM Itens")
+                conn.execute("DELETE FROM Pedidos")
+                conn.execute("DELETE FROM Meta WHERE chave = 'alteracoes_pendentes'")
+                self._inserir_planilha(conn, df_pedidos, df_itens)
+
+    def _ler_planilha(self, incluir_journal: bool) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Lê pedidos.xlsx diretamente (um ExcelArmazenamento migraria o esquema de
+        novo) e, na migração do backend xlsx, aplica o journal dele
+        """
+        if os.path.exists(self.arquivo_pedidos):
+            abas = self.cache.ler(
+                self.arquivo_pedidos,
+                ['Pedidos', 'Itens'],
+                dtype=TIPOS_LEITURA,
+                converters=CONVERSORES_LEITURA,
+                usecols=usar_coluna
+            )
+            df_pedidos, df_itens = abas['Pedidos'], abas['Itens']
+        else:
+            df_pedidos, df_itens = pd.DataFrame(columns=COLUNAS_PEDIDOS), pd.DataFrame(columns=COLUNAS_ITENS)
+        if incluir_journal:
+            journal = JournalPedidos.get_instance(ExcelArmazenamento.caminho_journal(self.arquivo_pedidos))
+            df_pedidos, df_itens = ExcelArmazenamento._aplicar_journal(
+                df_pedidos.reindex(columns=COLUNAS_PEDIDOS), df_itens, journal.ler()
+            )
+        return df_pedidos, df_itens
+
+    def _inserir_planilha(self, conn: sqlite3.Connection,
+                          df_pedidos: pd.DataFrame, df_itens: pd.DataFrame):
+        df_pedidos = df_pedidos.reindex(columns=COLUNAS_PEDIDOS).fillna("").astype(str)
+        df_itens = df_itens.reindex(columns=COLUNAS_ITENS).fillna("")
+        conn.executemany(
+            self._sql_inserir_pedido(),
+            [self._valores_pedido(p) for p in df_pedidos.to_dict('records')]
+        )
+        conn.executemany(
+            self._sql_inserir_item(),
+            [self._valores_item(i) for i in df_itens.to_dict('records')]
+        )
+
+    @instrumentar()
+    def _importar_planilha(self):
+        """Carrega a planilha e o journal do backend xlsx nas tabelas (primeira execução)"""
+        df_pedidos, df_itens = self._ler_planilha(incluir_journal=True)
+        with self.lock, closing(self._conectar()) as conn, conn:
+            self._inserir_planilha(conn, df_pedidos, df_itens)
+
+    @staticmethod
+    def _sql_inserir_pedido() -> str:
+        colunas = COLUNAS_PEDIDOS + ["Data_Ordenacao"]
+        return (
+            f"INSERT OR IGNORE INTO Pedidos ({', '.join(colunas)}) "
+            f"VALUES ({', '.join('?' for _ in colunas)})"
+        )
+
+    @staticmethod
+    def _sql_inserir_item() -> str:
+        return (
+            f"INSERT INTO Itens ({', '.join(COLUNAS_ITENS)}) "
+            f"VALUES ({', '.join('?' for _ in COLUNAS_ITENS)})"
+        )
+
+    def _valores_pedido(self, pedido: dict) -> tuple:
+        return tuple(pedido.get(col, "") for col in COLUNAS_PEDIDOS) + (
+            self._data_ordenacao(pedido.get("Data", "")),
+        )
+
+    @staticmethod
+    def _valores_item(item: dict) -> tuple:
+        valores = [item.get(col, "") for col in COLUNAS_ITENS]
+        try:
+            valores[-1] = int(valores[-1])
+        except (TypeError, ValueError):
+            valores[-1] = 0
+        return tuple(valores)
+
+    def _incrementar_pendentes(self, conn: sqlite3.Connection, quantidade: int = 1):
+        conn.execute("""
+            INSERT INTO Meta (chave, valor) VALUES ('alteracoes_pendentes', :n)
+            ON CONFLICT(chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + :n
+        """, {"n": quantidade})
+
+    @instrumentar()
+    def ler_dados(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        with closing(self._conectar()) as conn:
+            df_pedidos = pd.read_sql_query(
+                f"SELECT {', '.join(COLUNAS_PEDIDOS)} FROM Pedidos ORDER BY id", conn
+            )
+            df_itens = pd.read_sql_query(
+                f"SELECT {', '.join(COLUNAS_ITENS)} FROM Itens ORDER BY id", conn
+            )
+        return df_pedidos, df_itens
+
+    @instrumentar()
+    def ler_pedidos(self, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        if colunas is None:
+            return super().ler_pedidos()
+        invalidas = set(colunas) - set(COLUNAS_PEDIDOS)
+        if invalidas:
+            raise ValueError(f"Colunas inválidas: {', '.join(sorted(invalidas))}")
+        with closing(self._conectar()) as conn:
+            return pd.read_sql_query(
+                f"SELECT {', '.join(colunas)} FROM Pedidos ORDER BY id", conn
+            )
+
+    @instrumentar()
+    def buscar_pedido(self, numero_pedido: str) -> Tuple[Optional[dict], List[dict]]:
+        with closing(self._conectar()) as conn:
+            pedido = conn.execute(
+                f"SELECT {', '.join(COLUNAS_PEDIDOS)} FROM Pedidos WHERE Numero_Pedido = ?",
+                (numero_pedido,)
+            ).fetchone()
+            if pedido is None:
+                return None, []
+            itens = conn.execute(
+                f"SELECT {', '.join(COLUNAS_ITENS)} FROM Itens "
+                "WHERE Numero_Pedido = ? ORDER BY id",
+                (numero_pedido,)
+            ).fetchall()
+        return dict(pedido), [dict(item) for item in itens]
+
+    @instrumentar()
+    def buscar_pedidos_lote(self, numeros: List[str]) -> Dict[str, Tuple[dict, List[dict]]]:
+        """Consulta só os pedidos procurados, em blocos abaixo do limite de parâmetros do SQLite"""
+        numeros = list(dict.fromkeys(numeros))
+        resultado: Dict[str, Tuple[dict, List[dict]]] = {}
+        with closing(self._conectar()) as conn:
+            for inicio in range(0, len(numeros), 500):
+                bloco = numeros[inicio:inicio + 500]
+                marcadores = ", ".join("?" * len(bloco))
+                for pedido in conn.execute(
+                    f"SELECT {', '.join(COLUNAS_PEDIDOS)} FROM Pedidos "
+                    f"WHERE Numero_Pedido IN ({marcadores}) ORDER BY id",
+                    bloco
+                ):
+                    resultado[pedido["Numero_Pedido"]] = (dict(pedido), [])
+                for item in conn.execute(
+                    f"SELECT {', '.join(COLUNAS_ITENS)} FROM Itens "
+                    f"WHERE Numero_Pedido IN ({marcadores}) ORDER BY id",
+                    bloco
+                ):
+                    if item["Numero_Pedido"] in resultado:
+                        resultado[item["Numero_Pedido"]][1].append(dict(item))
+        return resultado
+
+    @instrumentar()
+    def aplicar_lote(self, alteracoes: List[dict]):
+        """
+        Aplica o lote inteiro numa única transação. Um pedido cujo número já
+        existe é ignorado junto com os itens, como no journal do backend xlsx.
+        """
+        with self.lock, closing(self._conectar()) as conn, conn:
+            for alteracao in alteracoes:
+                if alteracao["tipo"] == "pedido":
+                    inserido = conn.execute(
+                        self._sql_inserir_pedido(),
+                        self._valores_pedido(alteracao["pedido"])
+                    ).rowcount
+                    if not inserido:
+                        continue
+                    conn.executemany(
+                        self._sql_inserir_item(),
+                        [self._valores_item(i) for i in alteracao["itens"]]
+                    )
+                elif alteracao["tipo"] == "status":
+                    conn.execute(
+                        "UPDATE Pedidos SET Status = ?, Ultima_Atualizacao = ?, "
+                        "Responsavel_Atualizacao = ? WHERE Numero_Pedido = ?",
+                        (alteracao["Status"], alteracao["Ultima_Atualizacao"],
+                         alteracao["Responsavel_Atualizacao"], alteracao["Numero_Pedido"])
+                    )
+            self._incrementar_pendentes(conn, len(alteracoes))
+
+    def alteracoes_pendentes(self) -> int:
+        with closing(self._conectar()) as conn:
+            linha = conn.execute(
+                "SELECT valor FROM Meta WHERE chave = 'alteracoes_pendentes'"
+            ).fetchone()
+        return int(linha[0]) if linha else 0
+
+    def preparar_sincronizacao(self):
+        """O banco não é versionado: o GitHub recebe a exportação em pedidos.xlsx"""
+        if self.alteracoes_pendentes():
+            self.consolidar_planilha()
+
+    @instrumentar()
+    def consolidar_planilha(self) -> int:
+        """Exporta as tabelas para pedidos.xlsx no layout original"""
+        try:
+            with self.lock:
+                pendentes = self.alteracoes_pendentes()
+                df_pedidos, df_itens = self.ler_dados()
+                self._fazer_backup()
+                self._gravar_planilha(df_pedidos, df_itens)
+                with closing(self._conectar()) as conn, conn:
+                    conn.execute(
+                        "UPDATE Meta SET valor = 0 WHERE chave = 'alteracoes_pendentes'"
+                    )
+            return pendentes
+        except Exception as e:
+            raise Exception(f"Erro ao exportar pedidos para Excel: {str(e)}")
@@ -0,0 +1,181 @@
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+@dataclass
+class PoliticaRetencao:
+    """
+    Mantém sempre os backups mais recentes, um por hora no último dia e um por
+    dia no último mês
+    """
+    recentes: int = 10
+    horas: int = 24
+    dias: int = 30
+    tamanho_maximo: int = 200 * 1024 * 1024  # bytes comprimidos
+
+class BackupStore:
+    """
+    Repositório de backups endereçado por conteúdo.
+
+    Cada snapshot é a cópia byte a byte do arquivo, comprimida com gzip e
+    guardada em objetos/<sha256>.gz; conteúdos repetidos são armazenados uma
+    única vez. O índice (indice.json) registra quando cada snapshot foi feito.
+    """
+
+    def __init__(self, diretorio: str, politica: Optional[PoliticaRetencao] = None):
+        self.diretorio = diretorio
+        self.diretorio_objetos = os.path.join(diretorio, 'objetos')
+        self.arquivo_indice = os.path.join(diretorio, 'indice.json')
+        self.politica = politica or PoliticaRetencao()
+        self.lock = threading.Lock()
+        os.makedirs(self.diretorio_objetos, exist_ok=True)
+        self._importar_legados()
+
+    def _caminho_objeto(self, hash_conteudo: str) -> str:
+        return os.path.join(self.diretorio_objetos, f"{hash_conteudo}.gz")
+
+    def _ler_indice(self) -> List[dict]:
+        if not os.path.exists(self.arquivo_indice):
+            return []
+        with open(self.arquivo_indice, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _gravar_atomico(caminho: str, dados: bytes):
+        """Grava num arquivo temporário do mesmo diretório e substitui o destino"""
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(dados)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, caminho)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    def _gravar_indice(self, indice: List[dict]):
+        self._gravar_atomico(
+            self.arquivo_indice,
+            json.dumps(indice, ensure_ascii=False, indent=2).encode('utf-8')
+        )
+
+    def registrar(self, caminho: str, data: Optional[datetime] = None) -> Optional[dict]:
+        """
+        Registra um snapshot do arquivo. Retorna a entrada criada ou None quando o
+        conteúdo é igual ao do backup mais recente.
+        """
+        if not os.path.exists(caminho):
+            return None
+
+        with open(caminho, 'rb') as f:
+            conteudo = f.read()
+        hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+        data = data or datetime.now()
+
+        with self.lock:
+            indice = self._ler_indice()
+            if indice and indice[-1]['hash'] == hash_conteudo:
+                return None
+
+            objeto = self._caminho_objeto(hash_conteudo)
+            if not os.path.exists(objeto):
+                self._gravar_atomico(objeto, gzip.compress(conteudo))
+
+            entrada = {
+                'id': data.strftime('%Y%m%d_%H%M%S_%f'),
+                'data': data.isoformat(timespec='seconds'),
+                'arquivo': os.path.basename(caminho),
+                'hash': hash_conteudo,
+                'tamanho': len(conteudo),
+                'tamanho_comprimido': os.path.getsize(objeto)
+            }
+            indice.append(entrada)
+            indice.sort(key=lambda e: e['data'])
+            indice = self._aplicar_retencao(indice)
+            # Índice gravado antes: uma falha no meio nunca deixa entradas sem objeto
+            self._gravar_indice(indice)
+            self._remover_objetos_orfaos(indice)
+            return entrada
+
+    def listar(self) -> List[dict]:
+        """Lista os backups do mais recente para o mais antigo"""
+        with self.lock:
+            return list(reversed(self._ler_indice()))
+
+    def restaurar(self, backup_id: str, destino: str):
+        """Restaura o backup sobre o destino sem removê-lo do repositório"""
+        with self.lock:
+            entrada = next((e for e in self._ler_indice() if e['id'] == backup_id), None)
+            if entrada is None:
+                raise ValueError(f"Backup {backup_id} não encontrado")
+            with open(self._caminho_objeto(entrada['hash']), 'rb') as f:
+                conteudo = gzip.decompress(f.read())
+        if hashlib.sha256(conteudo).hexdigest() != entrada['hash']:
+            raise ValueError(f"Backup {backup_id} corrompido")
+        self._gravar_atomico(destino, conteudo)
+
+    def _aplicar_retencao(self, indice: List[dict], agora: Optional[datetime] = None) -> List[dict]:
+        """
+        Mantém os snapshots mais recentes, o mais recente de cada hora dentro da
+        janela horária e de cada dia dentro da janela diária, descarta os demais e,
+        por fim, os mais antigos enquanto o total comprimido exceder o limite.
+        Só calcula a lista; nada é removido do disco aqui.
+        """
+        if not indice:
+            return indice
+        agora = agora or datetime.now()
+        limite_horario = agora - timedelta(hours=self.politica.horas)
+        limite_diario = agora - timedelta(days=self.politica.dias)
+
+        mantidos = []
+        periodos_vistos = set()
+        for posicao, entrada in enumerate(reversed(indice)):
+            data = datetime.fromisoformat(entrada['data'])
+            if data >= limite_horario:
+                periodo = ('h', data.strftime('%Y%m%d%H'))
+            elif data >= limite_diario:
+                periodo = ('d', data.strftime('%Y%m%d'))
+            else:
+                periodo = None
+            if posicao >= self.politica.recentes and (periodo is None or periodo in periodos_vistos):
+                continue
+            periodos_vistos.add(periodo)
+            mantidos.append(entrada)
+
+        def tamanho_total(entradas):
+            return sum(e['tamanho_comprimido'] for e in {e['hash']: e for e in entradas}.values())
+
+        while len(mantidos) > 1 and tamanho_total(mantidos) > self.politica.tamanho_maximo:
+            mantidos.pop()
+
+        mantidos.reverse()
+        return mantidos
+
+    def _remover_objetos_orfaos(self, indice: List[dict]):
+        referenciados = {f"{e['hash']}.gz" for e in indice}
+        for nome in os.listdir(self.diretorio_objetos):
+            if nome.endswith('.gz') and nome not in referenciados:
+                os.remove(os.path.join(self.diretorio_objetos, nome))
+
+    def _importar_legados(self):
+        """Incorpora os backups antigos (pedidos_backup_*.xlsx) ao repositório"""
+        legados = sorted(
+            f for f in os.listdir(self.diretorio)
+            if f.startswith('pedidos_backup_') and f.endswith('.xlsx')
+        )
+        for nome in legados:
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                data = datetime.strptime(nome[len('pedidos_backup_'):-len('.xlsx')], '%Y%m%d_%H%M%S')
+            except ValueError:
+                data = datetime.fromtimestamp(os.path.getmtime(caminho))
+            self.registrar(caminho, data=data)
+            os.remove(caminho)
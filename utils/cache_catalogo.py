@@ -0,0 +1,73 @@
+import os
+import hashlib
+import tempfile
+
+import numpy as np
+
+from models.catalogo import COLUNAS_CATALOGO, Catalogo
+
+class CacheCatalogo:
+    """
+    Cache em disco do catálogo já processado.
+
+    O catálogo é salvo em formato colunar (.npz do NumPy, sem pickle) com o
+    nome derivado do SHA-256 da planilha de mapeamento. Após um reinício, a
+    carga lê esse arquivo em milissegundos; a planilha só é processada de novo
+    quando o conteúdo dela muda.
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    @staticmethod
+    def hash_arquivo(caminho: str) -> str:
+        sha = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(bloco)
+        return sha.hexdigest()
+
+    def _caminho_cache(self, hash_planilha: str) -> str:
+        return os.path.join(self.diretorio, f"catalogo_{hash_planilha}.npz")
+
+    def carregar(self, caminho_planilha: str) -> Catalogo:
+        """Retorna o catálogo da planilha, do cache em disco quando possível"""
+        hash_planilha = self.hash_arquivo(caminho_planilha)
+        versao = hash_planilha[:16]
+        caminho_cache = self._caminho_cache(hash_planilha)
+
+        if os.path.exists(caminho_cache):
+            try:
+                with np.load(caminho_cache, allow_pickle=False) as dados:
+                    return Catalogo(
+                        {coluna: dados[coluna].astype(object) for coluna in COLUNAS_CATALOGO},
+                        versao
+                    )
+            except Exception:
+                # Cache corrompido ou de formato antigo: processa a planilha de novo
+                os.remove(caminho_cache)
+
+        catalogo = Catalogo.carregar_planilha(caminho_planilha, versao)
+        self._salvar(catalogo, caminho_cache)
+        return catalogo
+
+    def _salvar(self, catalogo: Catalogo, caminho_cache: str):
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **{
+                    coluna: np.asarray(catalogo.colunas[coluna], dtype=str)
+                    for coluna in COLUNAS_CATALOGO
+                })
+            os.replace(temporario, caminho_cache)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+        # Mantém apenas o cache da versão atual da planilha
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            if nome.startswith('catalogo_') and nome.endswith('.npz') and caminho != caminho_cache:
+                os.remove(caminho)
@@ -0,0 +1,89 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+class CachePlanilha:
+    """
+    Cache em memória de planilhas, compartilhado entre as sessões do Streamlit.
+
+    Todas as abas pedidas são lidas numa única abertura do arquivo. A entrada é
+    validada pelo caminho, mtime e tamanho do arquivo, então uma alteração
+    externa invalida o cache automaticamente; as gravações do próprio sistema
+    chamam invalidar() explicitamente.
+    """
+
+    _instancia: Optional['CachePlanilha'] = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._entradas: Dict[str, Tuple[tuple, Dict[str, pd.DataFrame]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_instance() -> 'CachePlanilha':
+        with CachePlanilha._lock_instancia:
+            if CachePlanilha._instancia is None:
+                CachePlanilha._instancia = CachePlanilha()
+            return CachePlanilha._instancia
+
+    @staticmethod
+    def _assinatura(caminho: str) -> tuple:
+        info = os.stat(caminho)
+        return (info.st_mtime_ns, info.st_size)
+
+    def ler(self, caminho: str, abas: List[str], **opcoes) -> Dict[str, pd.DataFrame]:
+        """
+        Retorna cópias das abas pedidas, relendo o arquivo apenas se ele mudou.
+        As opcoes (dtype, usecols...) vão para pd.read_excel; cada arquivo deve
+        ser lido sempre com as mesmas opções, pois elas não fazem parte da chave.
+        """
+        chave = os.path.abspath(caminho)
+        assinatura = self._assinatura(caminho)
+
+        with self.lock:
+            entrada = self._entradas.get(chave)
+            if entrada and entrada[0] == assinatura and all(a in entrada[1] for a in abas):
+                self.hits += 1
+                return {aba: entrada[1][aba].copy() for aba in abas}
+            self.misses += 1
+
+        planilhas = pd.read_excel(caminho, sheet_name=abas, **opcoes)
+
+        with self.lock:
+            # Só guarda se o arquivo não mudou durante a leitura
+            if self._assinatura(caminho) == assinatura:
+                self._entradas[chave] = (assinatura, planilhas)
+        return {aba: df.copy() for aba, df in planilhas.items()}
+
+    def obter(self, caminho: str, abas: List[str],
+              copiar: bool = True) -> Optional[Dict[str, pd.DataFrame]]:
+        """Abas já em cache e válidas, sem ler o arquivo (None se não estiverem)"""
+        chave = os.path.abspath(caminho)
+        assinatura = self._assinatura(caminho)
+        with self.lock:
+            entrada = self._entradas.get(chave)
+            if not (entrada and entrada[0] == assinatura and all(a in entrada[1] for a in abas)):
+                return None
+            self.hits += 1
+            return {
+                aba: entrada[1][aba].copy() if copiar else entrada[1][aba]
+                for aba in abas
+            }
+
+    def invalidar(self, caminho: str):
+        with self.lock:
+            self._entradas.pop(os.path.abspath(caminho), None)
+
+    def estatisticas(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": self.hits / total if total else 0.0,
+                "arquivos": len(self._entradas)
+            }
@@ -0,0 +1,178 @@
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Span em andamento na thread/contexto atual (pai dos spans abertos dentro dele)
+_span_atual: ContextVar[Optional[dict]] = ContextVar('span_atual', default=None)
+
+class Diagnostico:
+    """
+    Medição leve de tempos por operação (spans).
+
+    Cada span registra nome, duração, início, thread, erro e o span pai; spans
+    abertos dentro de outro herdam o mesmo trace, então uma chamada de
+    salvar_pedido vira uma árvore com as etapas que ela executou. Os spans
+    finalizados ficam num buffer circular limitado; a contagem de chamadas por
+    operação é acumulada à parte, e os percentis saem do que está no buffer.
+    DIAGNOSTICO=0 desliga a coleta.
+    """
+
+    _instancia: Optional['Diagnostico'] = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, capacidade: int = 5000, ativo: bool = True):
+        self.ativo = ativo
+        self.lock = threading.Lock()
+        self._spans: deque = deque(maxlen=capacidade)
+        self._chamadas: Dict[str, int] = defaultdict(int)
+        self._ids = itertools.count(1)
+
+    @staticmethod
+    def get_instance() -> 'Diagnostico':
+        """Coletor único por processo (DIAGNOSTICO_SPANS define o tamanho do buffer)"""
+        with Diagnostico._lock_instancia:
+            if Diagnostico._instancia is None:
+                Diagnostico._instancia = Diagnostico(
+                    capacidade=int(os.getenv('DIAGNOSTICO_SPANS', '5000')),
+                    ativo=os.getenv('DIAGNOSTICO', '1') != '0'
+                )
+            return Diagnostico._instancia
+
+    def _novo_span(self, nome: str, atributos: dict) -> dict:
+        pai = _span_atual.get()
+        return {
+            "id": next(self._ids),
+            "trace": pai["trace"] if pai else uuid.uuid4().hex[:12],
+            "pai": pai["id"] if pai else None,
+            "nome": nome,
+            "inicio": time.time(),
+            "duracao_ms": 0.0,
+            "thread": threading.current_thread().name,
+            "erro": "",
+            "atributos": atributos
+        }
+
+    def _guardar(self, registro: dict):
+        with self.lock:
+            self._spans.append(registro)
+            self._chamadas[registro["nome"]] += 1
+
+    @contextmanager
+    def span(self, nome: str, **atributos) -> Iterator[Optional[dict]]:
+        """Mede o bloco; o registro entregue aceita atributos extras durante a execução"""
+        if not self.ativo:
+            yield None
+            return
+        registro = self._novo_span(nome, atributos)
+        token = _span_atual.set(registro)
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except BaseException as e:
+            registro["erro"] = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            registro["duracao_ms"] = (time.perf_counter() - inicio) * 1000
+            _span_atual.reset(token)
+            self._guardar(registro)
+
+    def registrar(self, nome: str, duracao_ms: float, **atributos):
+        """Span já medido por quem chama (ex.: etapas da sincronização), filho do span atual"""
+        if not self.ativo:
+            return
+        registro = self._novo_span(nome, atributos)
+        registro["inicio"] -= duracao_ms / 1000
+        registro["duracao_ms"] = duracao_ms
+        self._guardar(registro)
+
+    def spans(self) -> List[dict]:
+        with self.lock:
+            return list(self._spans)
+
+    @staticmethod
+    def _percentil(ordenados: List[float], fracao: float) -> float:
+        return ordenados[min(len(ordenados) - 1, int(len(ordenados) * fracao))]
+
+    def estatisticas(self) -> List[dict]:
+        """Por operação, das mais lentas (p95) para as mais rápidas"""
+        with self.lock:
+            spans = list(self._spans)
+            chamadas = dict(self._chamadas)
+        duracoes: Dict[str, List[float]] = defaultdict(list)
+        erros: Dict[str, int] = defaultdict(int)
+        for registro in spans:
+            duracoes[registro["nome"]].append(registro["duracao_ms"])
+            if registro["erro"]:
+                erros[registro["nome"]] += 1
+
+        resultado = []
+        for nome, valores in duracoes.items():
+            ordenados = sorted(valores)
+            resultado.append({
+                "operacao": nome,
+                "chamadas": chamadas.get(nome, len(valores)),
+                "amostras": len(valores),
+                "media_ms": sum(valores) / len(valores),
+                "p50_ms": self._percentil(ordenados, 0.5),
+                "p95_ms": self._percentil(ordenados, 0.95),
+                "p99_ms": self._percentil(ordenados, 0.99),
+                "max_ms": ordenados[-1],
+                "erros": erros[nome]
+            })
+        return sorted(resultado, key=lambda item: item["p95_ms"], reverse=True)
+
+    def ultimo_trace(self, nome: str) -> List[dict]:
+        """
+        Spans da última execução da operação `nome`, em ordem de início, cada
+        um com a profundidade na árvore
+        """
+        spans = self.spans()
+        raiz = next((s for s in reversed(spans) if s["nome"] == nome), None)
+        if raiz is None:
+            return []
+        trace = sorted((s for s in spans if s["trace"] == raiz["trace"]), key=lambda s: s["inicio"])
+        profundidade = {raiz["id"]: 0}
+        for registro in trace:
+            if registro["id"] not in profundidade:
+                profundidade[registro["id"]] = profundidade.get(registro["pai"], 0) + 1
+        return [dict(registro, profundidade=profundidade[registro["id"]]) for registro in trace]
+
+    def exportar(self, caminho: str) -> int:
+        """Grava os spans do buffer em JSONL (um por linha) e retorna quantos foram gravados"""
+        spans = self.spans()
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            for registro in spans:
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        return len(spans)
+
+    def limpar(self):
+        with self.lock:
+            self._spans.clear()
+            self._chamadas.clear()
+
+def span(nome: str, **atributos):
+    """Atalho para Diagnostico.get_instance().span(...)"""
+    return Diagnostico.get_instance().span(nome, **atributos)
+
+def instrumentar(nome: Optional[str] = None) -> Callable:
+    """Decorador que mede cada chamada da função (nome padrão: Classe.metodo)"""
+    def decorar(funcao: Callable) -> Callable:
+        rotulo = nome or funcao.__qualname__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with Diagnostico.get_instance().span(rotulo):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorar
@@ -0,0 +1,105 @@
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from pypdf import PdfReader, PdfWriter
+
+from utils.diagnostico import instrumentar
+from utils.renderizador_pdf import RenderizadorPDF, renderizar_pedido
+
+# Abaixo disso o custo de despachar para os processos supera o ganho
+MINIMO_PARALELO = 8
+
+class ExportadorPDF:
+    """
+    Geração de PDFs de pedidos em lote.
+
+    Cada pedido é renderizado num processo de um pool compartilhado (criado na
+    primeira exportação grande), então um lote usa todos os núcleos sem
+    bloquear as outras sessões com o GIL. Lotes pequenos são renderizados no
+    próprio processo, e PDFs já no cache do RenderizadorPDF não são refeitos.
+    O ZIP leva um PDF por pedido; o PDF único junta as páginas desses mesmos
+    PDFs, na ordem recebida.
+    """
+
+    _instancia: Optional['ExportadorPDF'] = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, processos: Optional[int] = None):
+        self.processos = max(1, processos or os.cpu_count() or 1)
+        self.lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def get_instance() -> 'ExportadorPDF':
+        """Exportador único, compartilhado entre as sessões (EXPORTACAO_PDF_PROCESSOS limita o pool)"""
+        with ExportadorPDF._lock_instancia:
+            if ExportadorPDF._instancia is None:
+                processos = os.getenv('EXPORTACAO_PDF_PROCESSOS')
+                ExportadorPDF._instancia = ExportadorPDF(int(processos) if processos else None)
+            return ExportadorPDF._instancia
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self._pool is None:
+                # spawn: o servidor do Streamlit tem várias threads, e fork nelas não é seguro
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def _descartar_pool(self):
+        with self.lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    @instrumentar()
+    def renderizar(self, pedidos: List[dict]) -> Dict[str, bytes]:
+        """PDF de cada pedido (formato de get_pedido_detalhes), por número, na ordem recebida"""
+        cache = RenderizadorPDF.get_instance()
+        pdfs = {pedido["info"]["Numero_Pedido"]: cache.consultar(pedido) for pedido in pedidos}
+        faltantes = [pedido for pedido in pedidos if pdfs[pedido["info"]["Numero_Pedido"]] is None]
+
+        if self.processos == 1 or len(faltantes) < MINIMO_PARALELO:
+            novos = list(map(renderizar_pedido, faltantes))
+        else:
+            blocos = max(1, len(faltantes) // (self.processos * 4))
+            try:
+                novos = list(self._executor().map(renderizar_pedido, faltantes, chunksize=blocos))
+            except BrokenProcessPool:
+                # Processo morto (ex.: falta de memória): recria o pool na próxima vez e segue aqui
+                self._descartar_pool()
+                novos = list(map(renderizar_pedido, faltantes))
+
+        for pedido, pdf in zip(faltantes, novos):
+            cache.guardar(pedido, pdf)
+            pdfs[pedido["info"]["Numero_Pedido"]] = pdf
+        return pdfs
+
+    @instrumentar()
+    def exportar_zip(self, pedidos: List[dict]) -> bytes:
+        """ZIP com um arquivo <numero>.pdf por pedido"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as arquivo:
+            for numero, pdf in self.renderizar(pedidos).items():
+                arquivo.writestr(f"{numero}.pdf", pdf)
+        return buffer.getvalue()
+
+    @instrumentar()
+    def exportar_pdf_unico(self, pedidos: List[dict]) -> bytes:
+        """Um só PDF com os pedidos em sequência, cada um com a sua numeração de páginas"""
+        documento = PdfWriter()
+        for pdf in self.renderizar(pedidos).values():
+            documento.append(PdfReader(io.BytesIO(pdf)))
+        # As fontes se repetem em cada PDF: ficam uma vez só no documento
+        documento.compress_identical_objects()
+        buffer = io.BytesIO()
+        documento.write(buffer)
+        return buffer.getvalue()
@@ -0,0 +1,178 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class FilaCheiaError(Exception):
+    """A fila de gravação atingiu o limite e não aceitou a alteração a tempo"""
+    pass
+
+class FilaEscrita:
+    """
+    Gravador único com commit em grupo.
+
+    As sessões enfileiram alterações (novos pedidos, mudanças de status) e
+    recebem um Future. Uma única thread retira tudo o que se acumulou na fila e
+    aplica o lote de uma vez, com uma só gravação no armazenamento. A fila é
+    limitada: quando está cheia, quem chama espera até `timeout` e então recebe
+    FilaCheiaError. Os ouvintes (ex.: índices em memória) recebem cada lote
+    gravado na própria thread de gravação, antes de os Futures serem
+    resolvidos, então veem as alterações exatamente na ordem em que foram
+    gravadas.
+    """
+
+    _instancias: Dict[int, 'FilaEscrita'] = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, aplicar_lote: Callable[[List[dict]], None],
+                 tamanho_maximo: int = 1000,
+                 lote_maximo: int = 500,
+                 validar_lote: Optional[Callable[[List[List[dict]]], List[Optional[Exception]]]] = None):
+        """
+        Args:
+            aplicar_lote: Função que grava uma lista de alterações numa única operação
+            validar_lote: Função que recebe as alterações de cada entrada do lote e
+                retorna o erro de cada uma (ou None); as recusadas não são gravadas
+            tamanho_maximo: Capacidade da fila (backpressure)
+            lote_maximo: Quantidade máxima de alterações por gravação
+        """
+        self.aplicar_lote = aplicar_lote
+        self.validar_lote = validar_lote
+        self.ouvintes: List[Callable[[List[dict]], None]] = []
+        self.lote_maximo = lote_maximo
+        self.fila: queue.Queue = queue.Queue(maxsize=tamanho_maximo)
+        self.lock = threading.Lock()
+        self.lotes = 0
+        self.alteracoes = 0
+        self.maior_lote = 0
+        self.falhas = 0
+        self._tamanhos = deque(maxlen=1000)
+        self._latencias = deque(maxlen=1000)
+        self.thread = threading.Thread(target=self._executar, daemon=True, name="fila-escrita")
+        self.thread.start()
+
+    @staticmethod
+    def get_instance(armazenamento) -> 'FilaEscrita':
+        """Fila única por backend de armazenamento, compartilhada entre as sessões"""
+        with FilaEscrita._lock_instancias:
+            chave = id(armazenamento)
+            if chave not in FilaEscrita._instancias:
+                FilaEscrita._instancias[chave] = FilaEscrita(
+                    armazenamento.aplicar_lote,
+                    validar_lote=armazenamento.validar_lote
+                )
+            return FilaEscrita._instancias[chave]
+
+    def adicionar_ouvinte(self, ouvinte: Callable[[List[dict]], None]):
+        """Registra uma função chamada com cada lote gravado (uma única vez por função)"""
+        with self.lock:
+            if ouvinte not in self.ouvintes:
+                self.ouvintes.append(ouvinte)
+
+    def enviar(self, alteracao: dict, timeout: Optional[float] = 30) -> Future:
+        """Enfileira a alteração e retorna um Future resolvido após a gravação"""
+        return self.enviar_lote([alteracao], timeout)
+
+    def enviar_lote(self, alteracoes: List[dict], timeout: Optional[float] = 30) -> Future:
+        """
+        Enfileira várias alterações que devem ser gravadas juntas: elas ocupam
+        uma única posição na fila e nunca são divididas entre gravações.
+        """
+        futuro: Future = Future()
+        try:
+            self.fila.put((list(alteracoes), futuro, time.perf_counter()), timeout=timeout)
+        except queue.Full:
+            raise FilaCheiaError("Fila de gravação cheia, tente novamente em instantes")
+        return futuro
+
+    def _executar(self):
+        while True:
+            lote = [self.fila.get()]
+            total = len(lote[0][0])
+            while total < self.lote_maximo:
+                try:
+                    entrada = self.fila.get_nowait()
+                except queue.Empty:
+                    break
+                lote.append(entrada)
+                total += len(entrada[0])
+
+            lote = self._recusar_invalidas(lote)
+            if not lote:
+                continue
+            total = sum(len(alteracoes) for alteracoes, _, _ in lote)
+            gravadas = [alteracao for alteracoes, _, _ in lote for alteracao in alteracoes]
+            try:
+                self.aplicar_lote(gravadas)
+                erro = None
+            except Exception as e:
+                erro = e
+
+            if erro is None:
+                with self.lock:
+                    ouvintes = list(self.ouvintes)
+                for ouvinte in ouvintes:
+                    try:
+                        ouvinte(gravadas)
+                    except Exception:
+                        # O lote já está gravado: a falha de um ouvinte não o desfaz
+                        logger.exception("Falha ao repassar lote gravado")
+
+            agora = time.perf_counter()
+            with self.lock:
+                self.lotes += 1
+                self.alteracoes += total
+                self.maior_lote = max(self.maior_lote, total)
+                self._tamanhos.append(total)
+                self._latencias.extend((agora - inicio) * 1000 for _, _, inicio in lote)
+                if erro:
+                    self.falhas += 1
+
+            for _, futuro, _ in lote:
+                if erro:
+                    futuro.set_exception(erro)
+                else:
+                    futuro.set_result(True)
+
+    def _recusar_invalidas(self, lote: list) -> list:
+        """Resolve com o erro as entradas que validar_lote recusa e devolve as demais"""
+        if self.validar_lote is None:
+            return lote
+        try:
+            erros = self.validar_lote([alteracoes for alteracoes, _, _ in lote])
+        except Exception as e:
+            # Sem conseguir validar (ex.: leitura falhou), nada é gravado
+            erros = [e] * len(lote)
+        aceitas = []
+        for entrada, erro in zip(lote, erros):
+            if erro is None:
+                aceitas.append(entrada)
+            else:
+                entrada[1].set_exception(erro)
+        return aceitas
+
+    def metricas(self) -> dict:
+        with self.lock:
+            latencias = sorted(self._latencias)
+            tamanhos = list(self._tamanhos)
+
+        def percentil(p):
+            if not latencias:
+                return 0.0
+            return latencias[min(len(latencias) - 1, int(p * len(latencias)))]
+
+        return {
+            "fila": self.fila.qsize(),
+            "lotes": self.lotes,
+            "alteracoes": self.alteracoes,
+            "falhas": self.falhas,
+            "lote_medio": sum(tamanhos) / len(tamanhos) if tamanhos else 0.0,
+            "maior_lote": self.maior_lote,
+            "latencia_p50_ms": percentil(0.50),
+            "latencia_p95_ms": percentil(0.95)
+        }
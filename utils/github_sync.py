@@ -1,14 +1,30 @@
 import os
 import json
+import time
 import shutil
-import subprocess
+import hashlib
+import threading
+import git
 import streamlit as st
 from datetime import datetime
+from typing import Dict, List, Optional
+from utils.diagnostico import Diagnostico, instrumentar
 
-class GitHubSync:
+class _EstadoRepositorio:
+    """Estado de sincronização compartilhado pelo processo para um diretório"""
     def __init__(self):
-        self.config_file = "config.json"
-        self.repo_dir = "pedidos"  # Diretório fixo onde os arquivos serão mantidos
+        self.lock = threading.Lock()
+        self.repo: Optional[git.Repo] = None
+        self.hashes: Dict[str, str] = {}
+        self.medicoes: Dict[str, float] = {}
+
+_estados: Dict[str, _EstadoRepositorio] = {}
+_lock_estados = threading.Lock()
+
+class GitHubSync:
+    def __init__(self, config_file: str = "config.json", repo_dir: str = "pedidos"):
+        self.config_file = config_file
+        self.repo_dir = repo_dir  # Diretório onde os arquivos serão mantidos
         self.load_config()
 
     def load_config(self):
@@ -29,79 +45,166 @@ class GitHubSync:
         with open(self.config_file, 'w') as f:
             json.dump(self.config, f, indent=4)
 
-    def _run_git_command(self, command, check_error=True):
-        """Executa um comando git no diretório do repositório"""
-        try:
-            result = subprocess.run(
-                command,
-                cwd=self.repo_dir,
-                capture_output=True,
-                text=True,
-                shell=True
-            )
-            if check_error and result.returncode != 0:
-                raise Exception(f"Erro no comando Git: {result.stderr}")
-            return result.stdout.strip()
-        except Exception as e:
-            st.error(f"Erro ao executar comando Git: {str(e)}")
-            raise
-
-    def sync_files(self):
-        """Sincroniza arquivos com GitHub"""
-        try:
-            # Configurar Git se estiver no Streamlit Cloud
-            if os.getenv('IS_STREAMLIT_CLOUD', '0') == '1' and 'GITHUB_TOKEN' in st.secrets:
-                token = st.secrets['GITHUB_TOKEN']
-                repo_url = self.config['github_repo'].replace(
-                    'https://',
-                    f'https://{token}@'
-                )
+    def _estado(self) -> '_EstadoRepositorio':
+        """Handle do repositório mantido por processo, reaproveitado entre sincronizações"""
+        chave = os.path.abspath(self.repo_dir)
+        with _lock_estados:
+            if chave not in _estados:
+                _estados[chave] = _EstadoRepositorio()
+            return _estados[chave]
+
+    def _abrir_repositorio(self, estado: '_EstadoRepositorio', repo_url: str) -> git.Repo:
+        """Abre (ou inicializa) o repositório uma única vez e ajusta o remoto só se mudou"""
+        if estado.repo is None or not os.path.isdir(estado.repo.git_dir):
+            if os.path.exists(os.path.join(self.repo_dir, '.git')):
+                estado.repo = git.Repo(self.repo_dir)
             else:
-                repo_url = self.config['github_repo']
-
-            # Inicializar ou atualizar o repositório Git
-            if not os.path.exists(os.path.join(self.repo_dir, '.git')):
-                # Se não existe, inicializa um novo repositório
                 os.makedirs(self.repo_dir, exist_ok=True)
-                self._run_git_command('git init')
-                self._run_git_command(f'git remote add origin {repo_url}')
-            else:
-                # Se existe, configura a URL remota
-                self._run_git_command(f'git remote set-url origin {repo_url}')
+                estado.repo = git.Repo.init(self.repo_dir)
+                estado.repo.git.symbolic_ref('HEAD', 'refs/heads/main')
+            estado.hashes = {}
 
             # Configurar usuário do Git
             if os.getenv('IS_STREAMLIT_CLOUD', '0') == '1':
-                self._run_git_command('git config user.name "Streamlit Cloud"')
-                self._run_git_command('git config user.email "noreply@streamlit.io"')
-
-            # Atualizar do remoto
-            self._run_git_command('git fetch origin')
-            self._run_git_command('git reset --hard origin/main', check_error=False)
-
-            # Copiar arquivos atualizados
-            if os.path.exists(self.config['local_mapeamento']):
-                shutil.copy2(self.config['local_mapeamento'], 
-                           os.path.join(self.repo_dir, 'Mapeamento de Racks - Cabos.xlsx'))
-            if os.path.exists(self.config['local_pedidos']):
-                shutil.copy2(self.config['local_pedidos'], 
-                           os.path.join(self.repo_dir, 'pedidos.xlsx'))
-
-            # Adicionar e commitar mudanças
-            self._run_git_command('git add *.xlsx')
-            self._run_git_command(
-                f'git commit -m "Atualização automática de pedidos - {datetime.now().strftime("%d/%m/%Y %H:%M")}"',
-                check_error=False
+                with estado.repo.config_writer() as config:
+                    config.set_value('user', 'name', 'Streamlit Cloud')
+                    config.set_value('user', 'email', 'noreply@streamlit.io')
+
+        repo = estado.repo
+        if 'origin' not in [remoto.name for remoto in repo.remotes]:
+            repo.create_remote('origin', repo_url)
+        elif repo.remotes.origin.url != repo_url:
+            repo.remotes.origin.set_url(repo_url)
+        return repo
+
+    def _arquivos_dados(self) -> List[str]:
+        """Arquivos versionados: planilhas e journal na raiz do repositório"""
+        return sorted(
+            nome for nome in os.listdir(self.repo_dir)
+            if nome.endswith(('.xlsx', '.jsonl'))
+            and os.path.isfile(os.path.join(self.repo_dir, nome))
+        )
+
+    def _hash_arquivo(self, nome: str) -> str:
+        with open(os.path.join(self.repo_dir, nome), 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _copiar_para_repo(self, origem: str, nome: str):
+        """Copia o arquivo para o repositório, exceto quando já está lá"""
+        destino = os.path.join(self.repo_dir, nome)
+        if not os.path.exists(origem):
+            return
+        if os.path.exists(destino) and os.path.samefile(origem, destino):
+            return
+        shutil.copy2(origem, destino)
+
+    @staticmethod
+    def _e_arquivo_dados(caminho: str) -> bool:
+        return '/' not in caminho and caminho.endswith(('.xlsx', '.jsonl'))
+
+    def _atualizar_do_remoto(self, repo: git.Repo):
+        """
+        Leva HEAD e o índice para origin/main sem tocar na árvore de trabalho e
+        depois atualiza só os arquivos que não são dados, além dos arquivos de
+        dados que ainda não existem aqui. As planilhas e o journal locais
+        prevalecem sobre os do remoto e nunca são regravados, então uma gravação
+        concorrente de pedidos não se perde.
+        """
+        repo.git.reset('--mixed', 'origin/main')
+        desatualizados = [
+            caminho for caminho in repo.git.diff('--name-only', '-z').split('\0')
+            if caminho and (
+                not self._e_arquivo_dados(caminho)
+                or not os.path.exists(os.path.join(self.repo_dir, caminho))
             )
+        ]
+        if desatualizados:
+            repo.git.checkout('--', *desatualizados)
 
-            # Push das alterações
-            self._run_git_command('git push -u origin main')
+    @instrumentar()
+    def sync_files(self):
+        """Sincroniza arquivos com GitHub"""
+        estado = self._estado()
+        medicoes = {}
 
-            return True, "Sincronização concluída com sucesso!"
+        def medir(etapa, inicio):
+            medicoes[etapa] = (time.perf_counter() - inicio) * 1000
+            Diagnostico.get_instance().registrar(f"GitHubSync.{etapa}", medicoes[etapa])
+
+        try:
+            with estado.lock:
+                # Configurar Git se estiver no Streamlit Cloud
+                if os.getenv('IS_STREAMLIT_CLOUD', '0') == '1' and 'GITHUB_TOKEN' in st.secrets:
+                    token = st.secrets['GITHUB_TOKEN']
+                    repo_url = self.config['github_repo'].replace(
+                        'https://',
+                        f'https://{token}@'
+                    )
+                else:
+                    repo_url = self.config['github_repo']
+
+                inicio = time.perf_counter()
+                repo = self._abrir_repositorio(estado, repo_url)
+                medir('abrir', inicio)
+
+                # Consultar o remoto e buscar apenas se main mudou desde a última vez
+                inicio = time.perf_counter()
+                saida = repo.git.ls_remote('origin', 'refs/heads/main')
+                remoto_sha = saida.split()[0] if saida else None
+                try:
+                    local_remoto_sha = repo.refs['origin/main'].commit.hexsha
+                except (IndexError, ValueError):
+                    local_remoto_sha = None
+                medir('ls_remote', inicio)
+
+                if remoto_sha and remoto_sha != local_remoto_sha:
+                    inicio = time.perf_counter()
+                    repo.remotes.origin.fetch()
+                    self._atualizar_do_remoto(repo)
+                    estado.hashes = {}
+                    medir('fetch', inicio)
+
+                # Copiar arquivos atualizados
+                inicio = time.perf_counter()
+                self._copiar_para_repo(self.config['local_mapeamento'], 'Mapeamento de Racks - Cabos.xlsx')
+                self._copiar_para_repo(self.config['local_pedidos'], 'pedidos.xlsx')
+                medir('copiar', inicio)
+
+                # Adicionar apenas os arquivos cujo conteúdo mudou
+                inicio = time.perf_counter()
+                hashes = {nome: self._hash_arquivo(nome) for nome in self._arquivos_dados()}
+                alterados = [
+                    nome for nome, valor in hashes.items()
+                    if estado.hashes.get(nome) != valor
+                ]
+                if alterados:
+                    repo.index.add(alterados)
+                medir('add', inicio)
+
+                inicio = time.perf_counter()
+                if alterados and (not repo.head.is_valid() or repo.index.diff('HEAD')):
+                    repo.index.commit(
+                        f"Atualização automática de pedidos - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+                    )
+                medir('commit', inicio)
+
+                # Push apenas quando há commits que o remoto ainda não tem
+                inicio = time.perf_counter()
+                if repo.head.is_valid() and repo.head.commit.hexsha != remoto_sha:
+                    repo.git.push('-u', 'origin', 'main')
+                medir('push', inicio)
+
+                estado.hashes = hashes
+                estado.medicoes = medicoes
+                return True, "Sincronização concluída com sucesso!"
 
         except Exception as e:
-            error_msg = f"Erro na sincronização: {str(e)}"
-            st.error(error_msg)
-            return False, error_msg
+            estado.medicoes = medicoes
+            return False, f"Erro na sincronização: {str(e)}"
+
+    def ultimas_medicoes(self) -> Dict[str, float]:
+        """Tempo, em milissegundos, de cada etapa da última sincronização"""
+        return dict(self._estado().medicoes)
 
     def render_config_page(self):
         """Renderiza página de configuração"""
@@ -0,0 +1,160 @@
+import io
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.catalogo import COLUNAS_CATALOGO, COLUNAS_CHAVE, Catalogo
+
+# Cabeçalhos aceitos (sem acentos, espaços ou pontuação) → coluna interna
+CABECALHOS_IMPORTACAO = {
+    'cliente': 'cliente',
+    'rack': 'rack',
+    'locacao': 'locacao',
+    'localizacao': 'locacao',
+    'codyazaki': 'cod_yazaki',
+    'quantidade': 'quantidade',
+    'qtd': 'quantidade',
+    'qtde': 'quantidade',
+    'solicitante': 'solicitante',
+    'observacoes': 'observacoes',
+    'observacao': 'observacoes'
+}
+COLUNAS_OBRIGATORIAS = ['cliente', 'rack', 'locacao', 'cod_yazaki', 'quantidade']
+COLUNAS_IMPORTACAO = COLUNAS_OBRIGATORIAS + ['solicitante', 'observacoes']
+
+# Modelo oferecido para download na tela de importação
+MODELO_IMPORTACAO = "Cliente;RACK;Locação;CÓD Yazaki;Quantidade;Solicitante;Observações\n"
+
+@dataclass
+class ResultadoImportacao:
+    """Linhas válidas já no formato de salvar_pedido e as rejeitadas com o motivo"""
+    pedidos: List[dict] = field(default_factory=list)
+    erros: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=["Linha", "Motivo"]))
+    total_linhas: int = 0
+
+def _normalizar_cabecalho(nome) -> str:
+    texto = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]', '', texto.casefold())
+
+def ler_arquivo_importacao(conteudo: bytes, nome_arquivo: str) -> pd.DataFrame:
+    """
+    Lê um CSV (separador detectado, UTF-8 ou Latin-1) ou a primeira aba de um
+    XLSX, tudo como texto, com as colunas renomeadas para COLUNAS_IMPORTACAO.
+    A coluna 'linha' guarda o número da linha no arquivo, para as mensagens.
+    """
+    extensao = nome_arquivo.rsplit('.', 1)[-1].lower()
+    try:
+        if extensao == 'csv':
+            try:
+                texto = conteudo.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                texto = conteudo.decode('latin-1')
+            df = pd.read_csv(io.StringIO(texto), dtype=str, sep=None, engine='python',
+                             keep_default_na=False)
+        elif extensao in ('xlsx', 'xlsm'):
+            df = pd.read_excel(io.BytesIO(conteudo), dtype=str, keep_default_na=False)
+        else:
+            raise ValueError("Formato não suportado: envie um arquivo CSV ou XLSX")
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Não foi possível ler o arquivo: {str(e)}")
+
+    df = df.rename(columns=lambda nome: CABECALHOS_IMPORTACAO.get(_normalizar_cabecalho(nome), nome))
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+
+    df = df.loc[:, ~df.columns.duplicated()].reindex(columns=COLUNAS_IMPORTACAO)
+    df = df.fillna('').astype(str).apply(lambda coluna: coluna.str.strip())
+    # Linha 1 é o cabeçalho
+    df.insert(0, 'linha', np.arange(2, len(df) + 2))
+    return df[(df[COLUNAS_IMPORTACAO] != '').any(axis=1)].reset_index(drop=True)
+
+def validar_importacao(df: pd.DataFrame, catalogo: Catalogo, solicitante_padrao: str = "",
+                       data: Optional[datetime] = None) -> ResultadoImportacao:
+    """
+    Valida todas as linhas de uma vez: a posição (cliente, RACK, locação) é
+    procurada no catálogo por um merge com as chaves normalizadas, e o CÓD
+    Yazaki e a quantidade são conferidos em bloco. Cada linha válida vira um
+    pedido com um item, com os nomes e atributos do catálogo (como no
+    formulário de novo pedido).
+    """
+    data = data or datetime.now()
+    if df.empty:
+        return ResultadoImportacao()
+
+    posicoes = pd.DataFrame({coluna: catalogo.colunas[coluna] for coluna in COLUNAS_CATALOGO})
+    for coluna in COLUNAS_CHAVE:
+        posicoes[f'_{coluna}'] = posicoes[coluna].str.casefold()
+    # Posição repetida no catálogo: vale a primeira, como no IndiceCatalogo
+    chaves = [f'_{coluna}' for coluna in COLUNAS_CHAVE]
+    posicoes = posicoes.drop_duplicates(subset=chaves).add_prefix('cat_')
+
+    linhas = df.assign(**{f'cat__{coluna}': df[coluna].str.casefold() for coluna in COLUNAS_CHAVE})
+    linhas = linhas.merge(posicoes, how='left', on=[f'cat_{chave}' for chave in chaves],
+                          validate='many_to_one')
+
+    quantidade = pd.to_numeric(linhas['quantidade'].str.replace(',', '.', regex=False),
+                               errors='coerce')
+    solicitante = linhas['solicitante'].where(linhas['solicitante'] != '', solicitante_padrao.strip())
+
+    vazio = (linhas[['cliente', 'rack', 'locacao', 'cod_yazaki']] == '').any(axis=1)
+    sem_posicao = linhas['cat_cod_yazaki'].isna()
+    codigo_diferente = linhas['cod_yazaki'].str.casefold() != linhas['cat_cod_yazaki'].fillna('').str.casefold()
+    quantidade_invalida = quantidade.isna() | (quantidade < 1) | (quantidade % 1 != 0)
+    sem_solicitante = solicitante == ''
+
+    motivo = pd.Series(
+        np.select(
+            [vazio, sem_posicao, codigo_diferente, quantidade_invalida, sem_solicitante],
+            [
+                "Cliente, RACK, locação e CÓD Yazaki são obrigatórios",
+                "Posição não encontrada no catálogo",
+                "CÓD Yazaki diferente do catálogo (" + linhas['cat_cod_yazaki'].fillna('') + ")",
+                "Quantidade deve ser um número inteiro maior que zero",
+                "Solicitante não informado"
+            ],
+            default=''
+        ),
+        index=linhas.index
+    )
+    validas = linhas[motivo == ''].assign(
+        quantidade=quantidade[motivo == ''].astype(int),
+        solicitante=solicitante[motivo == '']
+    )
+
+    pedidos = [
+        {
+            "cliente": cliente,
+            "rack": rack,
+            "locacao": locacao,
+            "solicitante": nome,
+            "observacoes": observacoes,
+            "data": data,
+            "itens": [{
+                "cod_yazaki": cod_yazaki,
+                "codigo_cabo": codigo_cabo,
+                "seccao": seccao,
+                "cor": cor,
+                "quantidade": qtd
+            }]
+        }
+        for cliente, rack, locacao, nome, observacoes, cod_yazaki, codigo_cabo, seccao, cor, qtd
+        in zip(
+            validas['cat_cliente'], validas['cat_rack'], validas['cat_locacao'],
+            validas['solicitante'], validas['observacoes'], validas['cat_cod_yazaki'],
+            validas['cat_codigo_cabo'], validas['cat_seccao'], validas['cat_cor'],
+            validas['quantidade']
+        )
+    ]
+    erros = pd.DataFrame({
+        "Linha": linhas.loc[motivo != '', 'linha'],
+        "Motivo": motivo[motivo != '']
+    }).reset_index(drop=True)
+    return ResultadoImportacao(pedidos=pedidos, erros=erros, total_linhas=len(df))
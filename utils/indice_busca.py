@@ -0,0 +1,173 @@
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+
+from utils.diagnostico import instrumentar
+
+# Campos do pedido cobertos pela busca (os itens contribuem com os códigos)
+CAMPOS_BUSCA = [
+    "Numero_Pedido", "Cliente", "RACK", "Localizacao", "Solicitante",
+    "Observacoes", "Status", "Responsavel_Atualizacao"
+]
+CAMPOS_ITENS_BUSCA = ["cod_yazaki", "codigo_cabo"]
+
+def normalizar_texto(texto) -> str:
+    """Minúsculas e sem acentos, para comparar 'Concluído' com 'concluido'"""
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+def trigramas(texto: str) -> Set[str]:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+class IndiceBusca:
+    """
+    Índice invertido de trigramas sobre pedidos e códigos dos itens.
+
+    Cada pedido vira um documento normalizado (sem acentos, casefold). Uma
+    busca intersecta as listas de pedidos dos trigramas de cada termo e
+    confirma a ocorrência no texto; termos com menos de três letras percorrem
+    os documentos. O índice é montado a partir do armazenamento e depois
+    recebe as mesmas alterações (novos pedidos, status) gravadas pela fila de
+    escrita; se a assinatura dos arquivos de dados mudar por outro caminho, a
+    próxima busca o remonta.
+    """
+
+    _instancias: Dict[int, 'IndiceBusca'] = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, armazenamento):
+        self.armazenamento = armazenamento
+        self.lock = threading.RLock()
+        self._construido = False
+        self._assinatura: Optional[tuple] = None
+        self._campos: Dict[str, Dict[str, str]] = {}
+        self._itens: Dict[str, str] = {}
+        self._documentos: Dict[str, str] = {}
+        self._postings: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def get_instance(armazenamento) -> 'IndiceBusca':
+        """Índice único por backend de armazenamento, compartilhado entre as sessões"""
+        with IndiceBusca._lock_instancias:
+            chave = id(armazenamento)
+            if chave not in IndiceBusca._instancias:
+                IndiceBusca._instancias[chave] = IndiceBusca(armazenamento)
+            return IndiceBusca._instancias[chave]
+
+    @instrumentar()
+    def _construir(self):
+        assinatura = self.armazenamento.assinatura()
+        df_pedidos, df_itens = self.armazenamento.ler_dados()
+        df_pedidos = df_pedidos.reindex(columns=CAMPOS_BUSCA).fillna("").astype(str)
+        df_itens = df_itens.reindex(columns=["Numero_Pedido"] + CAMPOS_ITENS_BUSCA)
+        df_itens = df_itens.fillna("").astype(str)
+        codigos = (df_itens[CAMPOS_ITENS_BUSCA[0]] + " " + df_itens[CAMPOS_ITENS_BUSCA[1]])
+        itens = codigos.groupby(df_itens["Numero_Pedido"]).agg(" ".join).to_dict()
+
+        self._campos.clear()
+        self._itens.clear()
+        self._documentos.clear()
+        self._postings.clear()
+        for campos in df_pedidos.to_dict('records'):
+            numero = campos["Numero_Pedido"]
+            self._indexar(numero, campos, itens.get(numero, ""))
+        self._assinatura = assinatura
+        self._construido = True
+
+    def _garantir_construido(self):
+        if not self._construido or self.armazenamento.assinatura() != self._assinatura:
+            self._construir()
+
+    def _remover(self, numero: str):
+        documento = self._documentos.pop(numero, None)
+        if documento is None:
+            return
+        for trigrama in trigramas(documento):
+            pedidos = self._postings.get(trigrama)
+            if pedidos is not None:
+                pedidos.discard(numero)
+                if not pedidos:
+                    del self._postings[trigrama]
+
+    def _indexar(self, numero: str, campos: Dict[str, str], itens: str):
+        self._remover(numero)
+        self._campos[numero] = campos
+        self._itens[numero] = itens
+        # Quebra de linha separa os campos: nenhum termo casa entre dois deles
+        documento = normalizar_texto("\n".join([campos.get(c, "") for c in CAMPOS_BUSCA] + [itens]))
+        self._documentos[numero] = documento
+        for trigrama in trigramas(documento):
+            self._postings.setdefault(trigrama, set()).add(numero)
+
+    def aplicar(self, alteracoes: List[dict]):
+        """Aplica ao índice as alterações já gravadas pelo armazenamento"""
+        with self.lock:
+            if not self._construido:
+                # Ainda não montado: a primeira busca lê o estado já com as alterações
+                return
+            try:
+                for alteracao in alteracoes:
+                    if alteracao["tipo"] == "pedido":
+                        pedido = alteracao["pedido"]
+                        campos = {c: str(pedido.get(c, "") or "") for c in CAMPOS_BUSCA}
+                        itens = " ".join(
+                            f"{item.get('cod_yazaki', '')} {item.get('codigo_cabo', '')}"
+                            for item in alteracao["itens"]
+                        )
+                        self._indexar(campos["Numero_Pedido"], campos, itens)
+                    elif alteracao["tipo"] == "status":
+                        numero = alteracao["Numero_Pedido"]
+                        if numero not in self._campos:
+                            continue
+                        campos = dict(self._campos[numero])
+                        campos["Status"] = alteracao["Status"]
+                        campos["Responsavel_Atualizacao"] = alteracao["Responsavel_Atualizacao"]
+                        self._indexar(numero, campos, self._itens[numero])
+            except Exception:
+                # Fora de sincronia com o armazenamento: a próxima consulta remonta
+                self._construido = False
+                raise
+            self._assinatura = self.armazenamento.assinatura()
+
+    def invalidar(self):
+        """Descarta o índice (ex.: após restaurar um backup); a próxima busca o remonta"""
+        with self.lock:
+            self._construido = False
+
+    def buscar(self, termo: str) -> Optional[Set[str]]:
+        """
+        Números dos pedidos que contêm todas as palavras do termo (em qualquer
+        campo). Retorna None para um termo vazio, ou seja, sem filtro.
+        """
+        palavras = normalizar_texto(termo).split()
+        if not palavras:
+            return None
+
+        with self.lock:
+            self._garantir_construido()
+            resultado: Optional[Set[str]] = None
+            for palavra in palavras:
+                if len(palavra) >= 3:
+                    listas = sorted(
+                        (self._postings.get(t, set()) for t in trigramas(palavra)),
+                        key=len
+                    )
+                    candidatos = set.intersection(*listas) if listas[0] else set()
+                else:
+                    candidatos = self._documentos.keys()
+                if resultado is not None:
+                    candidatos = resultado & set(candidatos)
+                resultado = {n for n in candidatos if palavra in self._documentos[n]}
+                if not resultado:
+                    break
+            return resultado
+
+    def estatisticas(self) -> dict:
+        with self.lock:
+            return {
+                "pedidos": len(self._documentos),
+                "trigramas": len(self._postings),
+                "construido": self._construido
+            }
@@ -0,0 +1,211 @@
+import threading
+from datetime import date, datetime, time
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from models.esquema import (
+    alinhar_categorias, converter_datas, relatorio_memoria, tipar_pedidos
+)
+from utils.diagnostico import instrumentar
+
+class IndicePedidos:
+    """
+    Tabela de pedidos em memória, no esquema tipado (models.esquema), com
+    índices secundários.
+
+    As datas (datetime64) ficam também num vetor ordenado, com a posição de
+    cada linha, então um intervalo de datas é resolvido por busca binária.
+    Cada status aponta para as posições das suas linhas. Como o índice de
+    busca, a tabela é montada a partir do armazenamento e depois recebe as
+    alterações gravadas pela fila de escrita.
+    A assinatura dos arquivos de dados é conferida a cada consulta: se eles
+    mudaram por outro caminho (Excel, outro processo, sincronização), a tabela
+    é remontada.
+    """
+
+    _instancias: Dict[int, 'IndicePedidos'] = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, armazenamento):
+        self.armazenamento = armazenamento
+        self.lock = threading.RLock()
+        self._construido = False
+        self._assinatura: Optional[tuple] = None
+        self._df: pd.DataFrame = pd.DataFrame()
+        self._posicoes: Dict[str, int] = {}
+        self._pendentes: List[dict] = []
+        self._datas_ordenadas = np.array([], dtype='datetime64[ns]')
+        self._ordem_datas = np.array([], dtype=np.int64)
+        self._por_status: Dict[str, np.ndarray] = {}
+        # (assinatura, relatório): refeito só quando os dados mudam
+        self._relatorio: Optional[Tuple[tuple, dict]] = None
+
+    @staticmethod
+    def get_instance(armazenamento) -> 'IndicePedidos':
+        """Índice único por backend de armazenamento, compartilhado entre as sessões"""
+        with IndicePedidos._lock_instancias:
+            chave = id(armazenamento)
+            if chave not in IndicePedidos._instancias:
+                IndicePedidos._instancias[chave] = IndicePedidos(armazenamento)
+            return IndicePedidos._instancias[chave]
+
+    @instrumentar()
+    def _construir(self):
+        # Lida antes da leitura: uma gravação durante a leitura força outra montagem
+        assinatura = self.armazenamento.assinatura()
+        df = tipar_pedidos(self.armazenamento.ler_pedidos().reset_index(drop=True))
+        self._assinatura = assinatura
+        self._df = df
+        self._posicoes = {numero: i for i, numero in enumerate(df["Numero_Pedido"])}
+        self._pendentes = []
+        self._indexar_datas()
+        self._por_status = {
+            status: np.asarray(linhas, dtype=np.int64)
+            for status, linhas in df.groupby("Status", sort=False, observed=True).indices.items()
+        }
+        self._construido = True
+
+    def _atualizar(self):
+        """Monta a tabela se ainda não existe ou se os arquivos mudaram fora da fila de escrita"""
+        if not self._construido or self.armazenamento.assinatura() != self._assinatura:
+            self._construir()
+        self._incorporar_pendentes()
+
+    def _indexar_datas(self):
+        datas = self._df["Data"].to_numpy()
+        validas = np.flatnonzero(~pd.isna(datas))
+        ordem = validas[np.argsort(datas[validas], kind='stable')]
+        self._ordem_datas = ordem.astype(np.int64)
+        self._datas_ordenadas = datas[ordem]
+
+    def _incorporar_pendentes(self):
+        """Acrescenta à tabela, de uma vez, os pedidos recebidos desde a última consulta"""
+        if not self._pendentes:
+            return
+        novos = tipar_pedidos(pd.DataFrame(self._pendentes))
+        alinhar_categorias(self._df, novos)
+        inicio = len(self._df)
+        self._df = pd.concat([self._df, novos], ignore_index=True)
+        self._pendentes = []
+
+        linhas = np.arange(inicio, len(self._df), dtype=np.int64)
+        for i, numero in zip(linhas, novos["Numero_Pedido"]):
+            self._posicoes[numero] = int(i)
+        for status, grupo in novos.groupby("Status", sort=False, observed=True).indices.items():
+            atuais = self._por_status.get(status, np.array([], dtype=np.int64))
+            self._por_status[status] = np.concatenate([atuais, linhas[grupo]])
+
+        # Pedidos novos costumam ser os mais recentes: basta anexar ao vetor ordenado
+        datas = novos["Data"].to_numpy()
+        validas = ~pd.isna(datas)
+        datas, novas_linhas = datas[validas], linhas[validas]
+        ordem = np.argsort(datas, kind='stable')
+        datas, novas_linhas = datas[ordem], novas_linhas[ordem]
+        if len(datas) and len(self._datas_ordenadas) and datas[0] < self._datas_ordenadas[-1]:
+            pontos = np.searchsorted(self._datas_ordenadas, datas, side='right')
+            self._datas_ordenadas = np.insert(self._datas_ordenadas, pontos, datas)
+            self._ordem_datas = np.insert(self._ordem_datas, pontos, novas_linhas)
+        else:
+            self._datas_ordenadas = np.concatenate([self._datas_ordenadas, datas])
+            self._ordem_datas = np.concatenate([self._ordem_datas, novas_linhas])
+
+    def _mudar_status(self, alteracao: dict):
+        linha = self._posicoes.get(alteracao["Numero_Pedido"])
+        if linha is None:
+            return
+        anterior = self._df.at[linha, "Status"]
+        novo = alteracao["Status"]
+        if novo not in self._df["Status"].cat.categories:
+            self._df["Status"] = self._df["Status"].cat.add_categories([novo])
+        self._df.at[linha, "Status"] = novo
+        self._df.at[linha, "Ultima_Atualizacao"] = converter_datas(
+            [alteracao["Ultima_Atualizacao"]]
+        ).iloc[0]
+        self._df.at[linha, "Responsavel_Atualizacao"] = alteracao["Responsavel_Atualizacao"]
+        if anterior == novo:
+            return
+
+        linhas = self._por_status.get(anterior)
+        if linhas is not None:
+            self._por_status[anterior] = linhas[linhas != linha]
+        linhas = self._por_status.get(novo, np.array([], dtype=np.int64))
+        self._por_status[novo] = np.insert(linhas, np.searchsorted(linhas, linha), linha)
+
+    def aplicar(self, alteracoes: List[dict]):
+        """Aplica à tabela as alterações já gravadas pelo armazenamento"""
+        with self.lock:
+            if not self._construido:
+                return
+            try:
+                for alteracao in alteracoes:
+                    if alteracao["tipo"] == "pedido":
+                        numero = alteracao["pedido"]["Numero_Pedido"]
+                        if numero not in self._posicoes:
+                            self._posicoes[numero] = -1
+                            self._pendentes.append(alteracao["pedido"])
+                    elif alteracao["tipo"] == "status":
+                        # Status de um pedido ainda pendente: incorpora antes de alterar
+                        self._incorporar_pendentes()
+                        self._mudar_status(alteracao)
+            except Exception:
+                # Fora de sincronia com o armazenamento: a próxima consulta remonta
+                self._construido = False
+                raise
+            # A mudança nos arquivos veio destas alterações, que já estão na tabela
+            self._assinatura = self.armazenamento.assinatura()
+
+    def invalidar(self):
+        """Descarta a tabela (ex.: após restaurar um backup); a próxima consulta a remonta"""
+        with self.lock:
+            self._construido = False
+
+    @staticmethod
+    def _limite(valor: Union[date, datetime], fim: bool) -> np.datetime64:
+        """Uma data sem hora cobre o dia inteiro quando usada como limite final"""
+        if not isinstance(valor, datetime):
+            valor = datetime.combine(valor, time.max if fim else time.min)
+        return np.datetime64(pd.Timestamp(valor).to_datetime64(), 'ns')
+
+    def consultar(self, status: Optional[str] = None,
+                  data_inicio: Optional[Union[date, datetime]] = None,
+                  data_fim: Optional[Union[date, datetime]] = None) -> pd.DataFrame:
+        """
+        Pedidos (na ordem de gravação) com o status e a Data dentro do intervalo
+        informados. Pedidos sem data válida ficam fora de qualquer intervalo.
+        """
+        with self.lock:
+            self._atualizar()
+
+            linhas = None
+            if data_inicio is not None or data_fim is not None:
+                esquerda = 0 if data_inicio is None else np.searchsorted(
+                    self._datas_ordenadas, self._limite(data_inicio, False), side='left'
+                )
+                direita = len(self._datas_ordenadas) if data_fim is None else np.searchsorted(
+                    self._datas_ordenadas, self._limite(data_fim, True), side='right'
+                )
+                linhas = np.sort(self._ordem_datas[esquerda:direita])
+            if status:
+                por_status = self._por_status.get(status, np.array([], dtype=np.int64))
+                linhas = por_status if linhas is None else np.intersect1d(
+                    linhas, por_status, assume_unique=True
+                )
+            return self._df.copy() if linhas is None else self._df.iloc[linhas].copy()
+
+    def relatorio_memoria(self) -> dict:
+        """
+        Memória da tabela tipada comparada com a leitura só em texto (object).
+        A leitura em texto relê o armazenamento inteiro, então o relatório fica
+        guardado até a assinatura dos dados mudar.
+        """
+        with self.lock:
+            self._atualizar()
+            assinatura, tipado = self._assinatura, self._df
+            if self._relatorio is not None and self._relatorio[0] == assinatura:
+                return self._relatorio[1]
+        relatorio = relatorio_memoria(self.armazenamento.ler_pedidos().fillna("").astype(object), tipado)
+        with self.lock:
+            self._relatorio = (assinatura, relatorio)
+        return relatorio
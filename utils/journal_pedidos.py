@@ -0,0 +1,90 @@
+import os
+import json
+import threading
+from typing import Dict, List
+
+class JournalPedidos:
+    """
+    Journal append-only de pedidos e atualizações de status.
+
+    Cada linha é um JSON independente. Novos pedidos e mudanças de status são
+    acrescentados ao final do arquivo (custo O(1)), e a compactação posterior
+    incorpora as entradas na planilha de pedidos.
+    """
+
+    _instancias: Dict[str, 'JournalPedidos'] = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.lock = threading.RLock()
+        self._total = self._contar_entradas()
+
+    @staticmethod
+    def get_instance(caminho: str) -> 'JournalPedidos':
+        """Retorna o journal compartilhado entre as sessões para o caminho informado"""
+        chave = os.path.abspath(caminho)
+        with JournalPedidos._lock_instancias:
+            if chave not in JournalPedidos._instancias:
+                JournalPedidos._instancias[chave] = JournalPedidos(caminho)
+            return JournalPedidos._instancias[chave]
+
+    def _contar_entradas(self) -> int:
+        if not os.path.exists(self.caminho):
+            return 0
+        with open(self.caminho, 'rb') as f:
+            return sum(1 for linha in f if linha.strip())
+
+    def __len__(self) -> int:
+        return self._total
+
+    def registrar(self, *entradas: dict):
+        """Acrescenta entradas ao journal de forma durável (flush + fsync)"""
+        if not entradas:
+            return
+        dados = "".join(
+            json.dumps(entrada, ensure_ascii=False) + "\n"
+            for entrada in entradas
+        ).encode('utf-8')
+        with self.lock:
+            diretorio = os.path.dirname(self.caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            with open(self.caminho, 'a+b') as f:
+                # Uma queda no meio da escrita deixa a última linha sem '\n': sem
+                # quebrar a linha, a nova entrada se juntaria a ela e seria descartada
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        dados = b"\n" + dados
+                f.write(dados)
+                f.flush()
+                os.fsync(f.fileno())
+            self._total += len(entradas)
+
+    def ler(self) -> List[dict]:
+        """Lê todas as entradas, ignorando uma eventual última linha incompleta"""
+        with self.lock:
+            if not os.path.exists(self.caminho):
+                return []
+            entradas = []
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    linha = linha.strip()
+                    if not linha:
+                        continue
+                    try:
+                        entradas.append(json.loads(linha))
+                    except json.JSONDecodeError:
+                        # Linha truncada por queda durante a escrita
+                        continue
+            return entradas
+
+    def limpar(self):
+        """Esvazia o journal após a compactação"""
+        with self.lock:
+            if os.path.exists(self.caminho):
+                with open(self.caminho, 'w', encoding='utf-8') as f:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._total = 0
@@ -0,0 +1,76 @@
+from typing import Callable, Dict, Iterator, List, Optional
+
+import openpyxl
+
+def converter_texto(valor) -> str:
+    return "" if valor is None else str(valor)
+
+class LeitorPlanilha:
+    """
+    Leitura em streaming de uma aba do Excel (openpyxl em modo read_only).
+
+    As linhas são entregues em lotes de dicionários já convertidos para o tipo
+    de cada coluna, sem montar a aba inteira na memória. Como a leitura é um
+    gerador, quem procura um registro pode parar no primeiro encontrado; o
+    arquivo é fechado assim que o gerador termina ou é descartado. A projeção
+    de colunas evita converter (e guardar) o que o chamador não usa.
+    """
+
+    def __init__(self, caminho: str, tamanho_lote: int = 1000):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+
+    def lotes(self, aba: str, colunas: Optional[List[str]] = None,
+              tipos: Optional[Dict[str, Callable]] = None) -> Iterator[List[dict]]:
+        """
+        Args:
+            aba: Nome da aba
+            colunas: Colunas desejadas (todas as do cabeçalho se omitido); colunas
+                ausentes na planilha vêm vazias
+            tipos: Conversor por coluna (texto por padrão)
+        """
+        tipos = tipos or {}
+        livro = openpyxl.load_workbook(self.caminho, read_only=True, data_only=True)
+        try:
+            planilha = livro[aba]
+            cabecalho = next(planilha.iter_rows(max_row=1, values_only=True), None)
+            if cabecalho is None:
+                return
+            posicoes = {nome: i for i, nome in enumerate(cabecalho) if nome is not None}
+            if colunas is None:
+                colunas = list(posicoes)
+
+            # Lê só o intervalo de colunas que contém as colunas pedidas
+            presentes = [posicoes[c] for c in colunas if c in posicoes]
+            inicio = min(presentes) if presentes else 0
+            fim = max(presentes) if presentes else 0
+            selecao = [
+                (coluna, posicoes[coluna] - inicio if coluna in posicoes else None,
+                 tipos.get(coluna, converter_texto))
+                for coluna in colunas
+            ]
+
+            lote = []
+            for valores in planilha.iter_rows(min_row=2, min_col=inicio + 1,
+                                              max_col=fim + 1, values_only=True):
+                if all(valor is None for valor in valores):
+                    continue
+                lote.append({
+                    coluna: converter(
+                        valores[i] if i is not None and i < len(valores) else None
+                    )
+                    for coluna, i, converter in selecao
+                })
+                if len(lote) >= self.tamanho_lote:
+                    yield lote
+                    lote = []
+            if lote:
+                yield lote
+        finally:
+            livro.close()
+
+    def linhas(self, aba: str, colunas: Optional[List[str]] = None,
+               tipos: Optional[Dict[str, Callable]] = None) -> Iterator[dict]:
+        """As mesmas linhas de lotes(), uma a uma"""
+        for lote in self.lotes(aba, colunas, tipos):
+            yield from lote
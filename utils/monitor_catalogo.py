@@ -0,0 +1,114 @@
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models.catalogo import Catalogo, DiferencaCatalogo
+from utils.cache_catalogo import CacheCatalogo
+
+class MonitorCatalogo:
+    """
+    Acompanha a planilha de mapeamento e mantém o catálogo atualizado.
+
+    Uma thread em segundo plano (e cada leitura do catálogo) compara o mtime e o
+    tamanho da planilha. Quando mudam, a planilha é recarregada, comparada com a
+    versão anterior por (cliente, RACK, locação) e o índice é atualizado só nas
+    posições que mudaram. As últimas diferenças ficam disponíveis para a tela de
+    Configurações.
+    """
+
+    _instancias: Dict[str, 'MonitorCatalogo'] = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, caminho_planilha: str, diretorio_cache: str,
+                 intervalo: float = 5.0, historico: int = 20):
+        """
+        Args:
+            caminho_planilha: Planilha de mapeamento (aba 'Projeto')
+            diretorio_cache: Pasta do cache em disco do catálogo
+            intervalo: Segundos entre verificações em segundo plano
+            historico: Quantidade de diferenças mantidas para consulta
+        """
+        self.caminho_planilha = caminho_planilha
+        self.cache = CacheCatalogo(diretorio_cache)
+        self.intervalo = intervalo
+        self.lock = threading.Lock()
+        self.catalogo: Optional[Catalogo] = None
+        self.ultima_verificacao: Optional[datetime] = None
+        self.ultimo_erro: Optional[str] = None
+        self._assinatura: Optional[Tuple[int, int]] = None
+        self._diferencas: deque = deque(maxlen=historico)
+        self._parar = threading.Event()
+        self.thread = threading.Thread(target=self._executar, daemon=True, name="monitor-catalogo")
+        self.thread.start()
+
+    @staticmethod
+    def get_instance(caminho_planilha: str, diretorio_cache: str) -> 'MonitorCatalogo':
+        """Monitor único por planilha, compartilhado entre as sessões"""
+        with MonitorCatalogo._lock_instancias:
+            chave = os.path.abspath(caminho_planilha)
+            if chave not in MonitorCatalogo._instancias:
+                MonitorCatalogo._instancias[chave] = MonitorCatalogo(
+                    caminho_planilha,
+                    diretorio_cache,
+                    intervalo=float(os.getenv('MONITOR_CATALOGO_SEGUNDOS', '5'))
+                )
+            return MonitorCatalogo._instancias[chave]
+
+    def _assinatura_arquivo(self) -> Tuple[int, int]:
+        info = os.stat(self.caminho_planilha)
+        return info.st_mtime_ns, info.st_size
+
+    def verificar(self) -> Optional[DiferencaCatalogo]:
+        """Recarrega o catálogo se a planilha mudou e retorna a diferença"""
+        assinatura = self._assinatura_arquivo()
+        if assinatura == self._assinatura and self.catalogo is not None:
+            self.ultima_verificacao = datetime.now()
+            return None
+
+        with self.lock:
+            self.ultima_verificacao = datetime.now()
+            if assinatura == self._assinatura and self.catalogo is not None:
+                return None
+
+            novo = self.cache.carregar(self.caminho_planilha)
+            anterior = self.catalogo
+            self._assinatura = assinatura
+            self.ultimo_erro = None
+
+            # Primeira carga, ou o arquivo foi regravado com o mesmo conteúdo
+            if anterior is None or novo.versao == anterior.versao:
+                if anterior is None:
+                    self.catalogo = novo
+                return None
+
+            diferenca = novo.herdar_indice(anterior)
+            self.catalogo = novo
+            self._diferencas.appendleft(diferenca)
+            return diferenca
+
+    def obter(self) -> Catalogo:
+        """Catálogo da versão atual da planilha"""
+        try:
+            self.verificar()
+        except Exception as e:
+            # Planilha sendo gravada ou indisponível: segue com a última versão válida
+            self.ultimo_erro = str(e)
+            if self.catalogo is None:
+                raise
+        return self.catalogo
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception as e:
+                self.ultimo_erro = str(e)
+
+    def diferencas(self) -> List[DiferencaCatalogo]:
+        """Diferenças detectadas, da mais recente para a mais antiga"""
+        return list(self._diferencas)
+
+    def parar(self):
+        self._parar.set()
@@ -1,16 +1,39 @@
+import json
+import logging
 import os
 import platform
+import shlex
+import subprocess
+import threading
+import time
+import uuid
 from abc import ABC, abstractmethod
-import tempfile
-from typing import Optional
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.diagnostico import span
+
+logger = logging.getLogger(__name__)
+
+class ErroImpressao(Exception):
+    """O comando de impressão falhou (ou não existe)"""
+    pass
 
 class PrintManager(ABC):
     @abstractmethod
-    def print_file(self, filepath: str) -> None:
+    def imprimir(self, arquivos: List[str], impressora: Optional[str] = None) -> None:
+        """Envia os arquivos de uma vez para a impressora; levanta ErroImpressao se falhar"""
         pass
 
+    def print_file(self, filepath: str) -> None:
+        self.imprimir([filepath])
+
     @staticmethod
     def get_instance() -> 'PrintManager':
+        """COMANDO_IMPRESSAO substitui o lpr (ex.: um script que simula a impressora)"""
+        comando = os.getenv('COMANDO_IMPRESSAO')
+        if comando:
+            return UnixPrintManager(comando)
         system = platform.system().lower()
         if system == 'windows':
             return WindowsPrintManager()
@@ -18,26 +41,305 @@ class PrintManager(ABC):
             return UnixPrintManager()
 
 class WindowsPrintManager(PrintManager):
-    def print_file(self, filepath: str) -> None:
+    def imprimir(self, arquivos: List[str], impressora: Optional[str] = None) -> None:
         try:
-            import win32print
             import win32api
-            win32api.ShellExecute(
-                0,
-                "print",
-                filepath,
-                None,
-                ".",
-                0
-            )
         except ImportError:
-            print(f"Arquivo gerado em: {filepath}")
-            print("Impressão não disponível no Windows sem win32print")
+            raise ErroImpressao("Impressão não disponível no Windows sem win32print")
+        for arquivo in arquivos:
+            if impressora:
+                win32api.ShellExecute(0, "printto", arquivo, f'"{impressora}"', ".", 0)
+            else:
+                win32api.ShellExecute(0, "print", arquivo, None, ".", 0)
 
 class UnixPrintManager(PrintManager):
-    def print_file(self, filepath: str) -> None:
+    def __init__(self, comando: str = "lpr", timeout: float = 60):
+        """
+        Args:
+            comando: Comando que recebe os arquivos no fim da linha. Se tiver
+                {impressora}, o nome é colocado ali; senão usa-se -P <impressora>
+            timeout: Segundos até considerar o comando travado
+        """
+        self.comando = comando
+        self.timeout = timeout
+
+    def _montar_comando(self, arquivos: List[str], impressora: Optional[str]) -> List[str]:
+        if "{impressora}" in self.comando:
+            partes: List[str] = []
+            for parte in shlex.split(self.comando):
+                if "{impressora}" in parte and not impressora:
+                    # Sem impressora: some o marcador e a opção que o precede (ex.: -d)
+                    if parte == "{impressora}" and partes and partes[-1].startswith("-"):
+                        partes.pop()
+                    continue
+                partes.append(parte.replace("{impressora}", impressora or ""))
+        else:
+            partes = shlex.split(self.comando) + (["-P", impressora] if impressora else [])
+        return partes + list(arquivos)
+
+    def imprimir(self, arquivos: List[str], impressora: Optional[str] = None) -> None:
+        comando = self._montar_comando(arquivos, impressora)
         try:
-            os.system(f"lpr {filepath}")
-        except:
-            print(f"Arquivo gerado em: {filepath}")
-            print("Impressão não disponível neste sistema")
+            resultado = subprocess.run(comando, capture_output=True, text=True, timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise ErroImpressao(f"Falha ao executar {comando[0]}: {str(e)}")
+        if resultado.returncode != 0:
+            detalhe = (resultado.stderr or resultado.stdout).strip()
+            raise ErroImpressao(f"{comando[0]} retornou {resultado.returncode}: {detalhe}")
+
+class SpoolerImpressao:
+    """
+    Fila de impressão persistente.
+
+    Cada trabalho (um PDF já renderizado) é gravado na pasta do spooler e
+    registrado em fila.json, então nada se perde se o app reiniciar. Uma thread
+    envia os trabalhos em ordem; os que estão prontos em sequência para a
+    mesma impressora vão juntos numa única chamada do comando. Falhas são
+    repetidas com espera exponencial até `tentativas_maximas`. status() permite
+    que a interface acompanhe cada trabalho; `aviso` descreve um problema na
+    própria fila (ex.: fila.json ilegível ao iniciar).
+    """
+
+    PENDENTE = "pendente"
+    IMPRIMINDO = "imprimindo"
+    CONCLUIDO = "concluido"
+    FALHOU = "falhou"
+
+    _instancias: Dict[str, 'SpoolerImpressao'] = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, diretorio: str, impressao: Optional[PrintManager] = None,
+                 tentativas_maximas: int = 5,
+                 espera_inicial: float = 2.0,
+                 espera_maxima: float = 120.0,
+                 lote_maximo: int = 20,
+                 historico: int = 200):
+        """
+        Args:
+            diretorio: Pasta com fila.json e os PDFs aguardando impressão
+            impressao: Quem executa a impressão (PrintManager.get_instance() por padrão)
+            tentativas_maximas: Tentativas antes de marcar o trabalho como falho
+            espera_inicial: Espera antes da primeira nova tentativa
+            espera_maxima: Limite da espera exponencial
+            lote_maximo: Trabalhos por chamada do comando
+            historico: Trabalhos finalizados mantidos para consulta de status
+        """
+        self.diretorio = diretorio
+        self.caminho_fila = os.path.join(diretorio, "fila.json")
+        self.impressao = impressao or PrintManager.get_instance()
+        self.tentativas_maximas = tentativas_maximas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.lote_maximo = lote_maximo
+        self.historico = historico
+
+        self.lock = threading.Lock()
+        self._sinal = threading.Condition(self.lock)
+        self._parar = False
+        self.aviso = ""
+        os.makedirs(diretorio, exist_ok=True)
+        self._trabalhos: List[dict] = self._carregar()
+
+        self.thread = threading.Thread(target=self._executar, daemon=True, name="spooler-impressao")
+        self.thread.start()
+
+    @staticmethod
+    def get_instance(diretorio: str) -> 'SpoolerImpressao':
+        """Spooler único por pasta, compartilhado entre as sessões"""
+        chave = os.path.abspath(diretorio)
+        with SpoolerImpressao._lock_instancias:
+            if chave not in SpoolerImpressao._instancias:
+                SpoolerImpressao._instancias[chave] = SpoolerImpressao(diretorio)
+            return SpoolerImpressao._instancias[chave]
+
+    def _carregar(self) -> List[dict]:
+        if not os.path.exists(self.caminho_fila):
+            return []
+        try:
+            with open(self.caminho_fila, 'r', encoding='utf-8') as f:
+                trabalhos = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            # O arquivo é preservado para conferência; a fila recomeça vazia
+            preservado = f"{self.caminho_fila}.{datetime.now().strftime('%Y%m%d_%H%M%S')}.ilegivel"
+            try:
+                os.replace(self.caminho_fila, preservado)
+            except OSError:
+                preservado = self.caminho_fila
+            self.aviso = (
+                f"Fila de impressão ilegível ({str(e)}): começou vazia, "
+                f"o arquivo anterior está em {preservado}"
+            )
+            logger.warning(self.aviso)
+            return []
+        for trabalho in trabalhos:
+            # Interrompido no meio do envio: manda de novo (pode sair repetido)
+            if trabalho["status"] == self.IMPRIMINDO:
+                trabalho["status"] = self.PENDENTE
+            trabalho["proxima_tentativa"] = 0
+        return trabalhos
+
+    def _salvar(self):
+        """Grava fila.json por substituição atômica (chamar com o lock)"""
+        temporario = self.caminho_fila + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self._trabalhos, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho_fila)
+
+    def _podar(self):
+        """Descarta os finalizados mais antigos além do histórico (chamar com o lock)"""
+        finalizados = [t for t in self._trabalhos if t["status"] in (self.CONCLUIDO, self.FALHOU)]
+        excedentes = {t["id"] for t in finalizados[:max(0, len(finalizados) - self.historico)]}
+        for trabalho in finalizados:
+            if trabalho["id"] in excedentes and os.path.exists(trabalho["arquivo"]):
+                os.remove(trabalho["arquivo"])
+        if excedentes:
+            self._trabalhos = [t for t in self._trabalhos if t["id"] not in excedentes]
+
+    def enviar(self, pdf: bytes, nome: str, impressora: Optional[str] = None) -> str:
+        """Enfileira um PDF e retorna o id do trabalho, sem esperar a impressão"""
+        identificador = uuid.uuid4().hex[:12]
+        arquivo = os.path.join(self.diretorio, f"{identificador}.pdf")
+        with open(arquivo, 'wb') as f:
+            f.write(pdf)
+        trabalho = {
+            "id": identificador,
+            "nome": nome,
+            "arquivo": arquivo,
+            "impressora": impressora or os.getenv('IMPRESSORA_PADRAO') or None,
+            "status": self.PENDENTE,
+            "tentativas": 0,
+            "erro": "",
+            "criado_em": datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+            "finalizado_em": "",
+            "proxima_tentativa": 0
+        }
+        with self.lock:
+            self._trabalhos.append(trabalho)
+            self._salvar()
+            self._sinal.notify_all()
+        return identificador
+
+    def reenviar(self, identificador: str) -> bool:
+        """Devolve à fila um trabalho que falhou, com as tentativas zeradas"""
+        with self.lock:
+            trabalho = next((t for t in self._trabalhos if t["id"] == identificador), None)
+            if trabalho is None or trabalho["status"] != self.FALHOU or not os.path.exists(trabalho["arquivo"]):
+                return False
+            trabalho.update(status=self.PENDENTE, tentativas=0, finalizado_em="", proxima_tentativa=0)
+            self._salvar()
+            self._sinal.notify_all()
+            return True
+
+    def status(self, identificador: str) -> Optional[dict]:
+        """Situação do trabalho (None se não existir ou já tiver saído do histórico)"""
+        with self.lock:
+            trabalho = next((t for t in self._trabalhos if t["id"] == identificador), None)
+            return self._publico(trabalho) if trabalho else None
+
+    def trabalhos(self, limite: int = 50) -> List[dict]:
+        """Trabalhos mais recentes primeiro"""
+        with self.lock:
+            return [self._publico(t) for t in reversed(self._trabalhos[-limite:])]
+
+    def resumo(self) -> Dict[str, int]:
+        with self.lock:
+            contagem = {s: 0 for s in (self.PENDENTE, self.IMPRIMINDO, self.CONCLUIDO, self.FALHOU)}
+            for trabalho in self._trabalhos:
+                contagem[trabalho["status"]] += 1
+            return contagem
+
+    def _publico(self, trabalho: dict) -> dict:
+        publico = {k: v for k, v in trabalho.items() if k not in ("arquivo", "proxima_tentativa")}
+        espera = trabalho["proxima_tentativa"] - time.time()
+        publico["proxima_tentativa_em"] = (
+            round(espera, 1) if trabalho["status"] == self.PENDENTE and espera > 0 else 0
+        )
+        return publico
+
+    def aguardar(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até não haver trabalhos pendentes; retorna False em caso de timeout"""
+        prazo = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            while any(t["status"] in (self.PENDENTE, self.IMPRIMINDO) for t in self._trabalhos):
+                restante = None if prazo is None else prazo - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._sinal.wait(restante)
+            return True
+
+    def parar(self):
+        with self.lock:
+            self._parar = True
+            self._sinal.notify_all()
+        self.thread.join(timeout=5)
+
+    def _proximo_lote(self) -> List[dict]:
+        """
+        O primeiro trabalho pronto e os que o seguem na fila, prontos e para a
+        mesma impressora (chamar com o lock)
+        """
+        agora = time.time()
+        lote: List[dict] = []
+        for trabalho in self._trabalhos:
+            if trabalho["status"] != self.PENDENTE:
+                continue
+            if trabalho["proxima_tentativa"] > agora or (lote and trabalho["impressora"] != lote[0]["impressora"]):
+                if lote:
+                    break
+                continue
+            lote.append(trabalho)
+            if len(lote) >= self.lote_maximo:
+                break
+        return lote
+
+    def _espera_ate_proximo(self) -> Optional[float]:
+        """Segundos até algum trabalho adiado ficar pronto (None se não houver nenhum)"""
+        adiados = [t["proxima_tentativa"] for t in self._trabalhos if t["status"] == self.PENDENTE]
+        return max(0.0, min(adiados) - time.time()) if adiados else None
+
+    def _executar(self):
+        while True:
+            with self.lock:
+                while not self._parar:
+                    lote = self._proximo_lote()
+                    if lote:
+                        break
+                    self._sinal.wait(self._espera_ate_proximo())
+                if self._parar:
+                    return
+                for trabalho in lote:
+                    trabalho["status"] = self.IMPRIMINDO
+                    trabalho["tentativas"] += 1
+                self._salvar()
+
+            try:
+                with span("SpoolerImpressao.imprimir", trabalhos=len(lote), impressora=lote[0]["impressora"]):
+                    self.impressao.imprimir([t["arquivo"] for t in lote], lote[0]["impressora"])
+                erro = ""
+            except Exception as e:
+                erro = str(e)
+
+            with self.lock:
+                for trabalho in lote:
+                    if not erro:
+                        trabalho["status"] = self.CONCLUIDO
+                        trabalho["erro"] = ""
+                    elif trabalho["tentativas"] >= self.tentativas_maximas:
+                        trabalho["status"] = self.FALHOU
+                        trabalho["erro"] = erro
+                    else:
+                        trabalho["status"] = self.PENDENTE
+                        trabalho["erro"] = erro
+                        espera = min(self.espera_inicial * 2 ** (trabalho["tentativas"] - 1),
+                                     self.espera_maxima)
+                        trabalho["proxima_tentativa"] = time.time() + espera
+                        continue
+                    trabalho["finalizado_em"] = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+                    # O PDF de um trabalho que falhou fica para reenviar()
+                    if trabalho["status"] == self.CONCLUIDO and os.path.exists(trabalho["arquivo"]):
+                        os.remove(trabalho["arquivo"])
+                self._podar()
+                self._salvar()
+                self._sinal.notify_all()
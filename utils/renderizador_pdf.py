@@ -0,0 +1,218 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+from utils.diagnostico import instrumentar
+
+# Memória máxima dos PDFs guardados (os mais antigos saem primeiro)
+LIMITE_CACHE_BYTES = 64 * 1024 * 1024
+
+def _texto(valor) -> str:
+    """As fontes padrão do PDF só cobrem latin-1: o resto vira '?'"""
+    return str(valor if valor is not None else "").encode('latin-1', 'replace').decode('latin-1')
+
+class ModeloPedidoPDF(FPDF):
+    """
+    Modelo do PDF de um pedido: cabeçalho, rodapé, fontes e medidas ficam
+    definidos aqui, uma vez, e cada documento só preenche os campos.
+    """
+
+    FONTE = 'Helvetica'
+    LINHA = 6
+    # (título, chave do item, largura em mm) da tabela de itens
+    COLUNAS_ITENS = [
+        ("CÓD Yazaki", "cod_yazaki", 40),
+        ("Código Cabo", "codigo_cabo", 45),
+        ("Secção", "seccao", 30),
+        ("Cor", "cor", 45),
+        ("Qtd.", "quantidade", 30)
+    ]
+    ASSINATURAS = ["Solicitante", "Aprovação"]
+
+    def __init__(self):
+        super().__init__()
+        self.set_auto_page_break(auto=True, margin=20)
+        self.set_title("Pedido de Requisição")
+
+    def header(self):
+        self.set_font(self.FONTE, 'B', 14)
+        self.cell(0, 8, "PEDIDO DE REQUISIÇÃO", align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        self.line(self.l_margin, self.get_y() + 1, self.w - self.r_margin, self.get_y() + 1)
+        self.ln(4)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font(self.FONTE, 'I', 8)
+        self.cell(0, 10, f"Página {self.page_no()}/{{nb}}", align='C')
+
+    def _titulo(self, texto: str):
+        self.ln(2)
+        self.set_font(self.FONTE, 'B', 12)
+        self.cell(0, self.LINHA + 1, texto, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    def _campo(self, rotulo: str, valor):
+        self.set_font(self.FONTE, 'B', 11)
+        self.cell(35, self.LINHA, f"{rotulo}:")
+        self.set_font(self.FONTE, '', 11)
+        self.multi_cell(0, self.LINHA, _texto(valor), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    def _itens(self, itens: List[dict]):
+        self.set_font(self.FONTE, 'B', 10)
+        self.set_fill_color(240, 242, 246)
+        for titulo, _, largura in self.COLUNAS_ITENS:
+            self.cell(largura, self.LINHA + 1, titulo, border=1, fill=True)
+        self.ln()
+        self.set_font(self.FONTE, '', 10)
+        for item in itens:
+            for _, chave, largura in self.COLUNAS_ITENS:
+                self.cell(largura, self.LINHA + 1, _texto(item.get(chave, "")), border=1)
+            self.ln()
+
+    def _assinaturas(self):
+        # Mantém o bloco inteiro na mesma página
+        if self.get_y() + 35 > self.page_break_trigger:
+            self.add_page()
+        self.ln(20)
+        largura = (self.w - self.l_margin - self.r_margin) / len(self.ASSINATURAS)
+        y = self.get_y()
+        for i, _ in enumerate(self.ASSINATURAS):
+            x = self.l_margin + i * largura
+            self.line(x + 10, y, x + largura - 10, y)
+        self.set_font(self.FONTE, '', 10)
+        for rotulo in self.ASSINATURAS:
+            self.cell(largura, self.LINHA, rotulo, align='C')
+        self.ln()
+
+    def adicionar_pedido(self, pedido: dict):
+        """Uma página (ou mais) com o pedido no formato de get_pedido_detalhes"""
+        info = pedido["info"]
+        self.add_page()
+        self._campo("Número", info["Numero_Pedido"])
+        self._campo("Data", info["Data"])
+        self._campo("Status", pedido["status"])
+
+        self._titulo("Informações")
+        self._campo("Cliente", info["Cliente"])
+        self._campo("RACK", info["RACK"])
+        self._campo("Localização", info["Localizacao"])
+        self._campo("Solicitante", info["Solicitante"])
+        if info.get("Ultima_Atualizacao"):
+            self._campo("Atualizado", f"{info['Ultima_Atualizacao']} por {info['Responsavel_Atualizacao']}")
+
+        if info.get("Observacoes"):
+            self._titulo("Observações")
+            self.set_font(self.FONTE, '', 11)
+            self.multi_cell(0, self.LINHA, _texto(info["Observacoes"]),
+                            new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+        self._titulo("Itens")
+        self._itens(pedido["itens"])
+        self._assinaturas()
+        self.set_font(self.FONTE, 'I', 8)
+        self.cell(0, self.LINHA, f"Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}",
+                  new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+@instrumentar()
+def renderizar_pedido(pedido: dict) -> bytes:
+    """PDF de um pedido, direto em memória (função de módulo para rodar em outros processos)"""
+    pdf = ModeloPedidoPDF()
+    pdf.adicionar_pedido(pedido)
+    return bytes(pdf.output())
+
+@instrumentar()
+def chave_pedido(pedido: dict) -> Tuple[str, str, str]:
+    """
+    (Numero_Pedido, Ultima_Atualizacao, Status): o PDF só muda quando o pedido
+    é atualizado. O status entra porque a atualização tem precisão de minutos.
+    """
+    info = pedido["info"]
+    return (info["Numero_Pedido"], str(info.get("Ultima_Atualizacao") or ""), str(pedido["status"]))
+
+class RenderizadorPDF:
+    """
+    PDFs de pedidos em memória, com cache.
+
+    Cada PDF é guardado pela chave_pedido, então reabrir (ou baixar de novo) um
+    pedido não renderiza outra vez; uma atualização de status muda a chave. O
+    cache é limitado em bytes. pre_renderizar() gera o PDF numa thread de fundo
+    logo após a gravação, para o primeiro download já sair pronto.
+    """
+
+    _instancia: Optional['RenderizadorPDF'] = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, limite_bytes: int = LIMITE_CACHE_BYTES):
+        self.limite_bytes = limite_bytes
+        self.lock = threading.Lock()
+        self._cache: 'OrderedDict[Tuple[str, str, str], bytes]' = OrderedDict()
+        self._bytes = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pre-render-pdf")
+        self.hits = 0
+        self.misses = 0
+        self.pre_renderizados = 0
+
+    @staticmethod
+    def get_instance() -> 'RenderizadorPDF':
+        """Renderizador único, compartilhado entre as sessões"""
+        with RenderizadorPDF._lock_instancia:
+            if RenderizadorPDF._instancia is None:
+                RenderizadorPDF._instancia = RenderizadorPDF()
+            return RenderizadorPDF._instancia
+
+    def consultar(self, pedido: dict) -> Optional[bytes]:
+        """PDF já renderizado para esta versão do pedido, ou None"""
+        chave = chave_pedido(pedido)
+        with self.lock:
+            pdf = self._cache.get(chave)
+            if pdf is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._cache.move_to_end(chave)
+            return pdf
+
+    def guardar(self, pedido: dict, pdf: bytes):
+        chave = chave_pedido(pedido)
+        with self.lock:
+            anterior = self._cache.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior)
+            self._cache[chave] = pdf
+            self._bytes += len(pdf)
+            while self._bytes > self.limite_bytes and len(self._cache) > 1:
+                _, removido = self._cache.popitem(last=False)
+                self._bytes -= len(removido)
+
+    @instrumentar()
+    def obter(self, pedido: dict) -> bytes:
+        """PDF do pedido, do cache ou renderizado agora"""
+        pdf = self.consultar(pedido)
+        if pdf is None:
+            pdf = renderizar_pedido(pedido)
+            self.guardar(pedido, pdf)
+        return pdf
+
+    def pre_renderizar(self, pedido: dict) -> Future:
+        """Renderiza em segundo plano e guarda no cache"""
+        def executar():
+            self.guardar(pedido, renderizar_pedido(pedido))
+            with self.lock:
+                self.pre_renderizados += 1
+        return self._executor.submit(executar)
+
+    def estatisticas(self) -> Dict:
+        with self.lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": self.hits / consultas if consultas else 0.0,
+                "pre_renderizados": self.pre_renderizados,
+                "pdfs": len(self._cache),
+                "bytes": self._bytes
+            }
@@ -0,0 +1,95 @@
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+class SequenciaPedidos:
+    """
+    Gerador persistente de números de pedido (REQ-NNN).
+
+    O último número emitido fica num pequeno arquivo de contador protegido por
+    lock do sistema operacional, então a alocação é O(1), sobrevive a reinícios
+    e não entrega o mesmo número a duas sessões ou processos. Se o contador não
+    existir, ele é reconstruído uma única vez a partir dos pedidos existentes.
+    """
+
+    _locks: Dict[str, threading.Lock] = {}
+    _lock_locks = threading.Lock()
+
+    def __init__(self, caminho: str, reconstruir: Callable[[], int]):
+        """
+        Args:
+            caminho: Arquivo do contador
+            reconstruir: Função que retorna o maior número já usado nos pedidos
+        """
+        self.caminho = caminho
+        self.caminho_lock = caminho + '.lock'
+        self.reconstruir = reconstruir
+        chave = os.path.abspath(caminho)
+        with SequenciaPedidos._lock_locks:
+            self.lock = SequenciaPedidos._locks.setdefault(chave, threading.Lock())
+
+    @staticmethod
+    def formatar(numero: int) -> str:
+        return f"REQ-{numero:03d}"
+
+    @staticmethod
+    def extrair_numero(numero_pedido: str) -> int:
+        """Retorna a parte numérica de 'REQ-NNN' (0 se o formato não bater)"""
+        correspondencia = re.fullmatch(r'\s*REQ-(\d+)\s*', str(numero_pedido))
+        return int(correspondencia.group(1)) if correspondencia else 0
+
+    @contextmanager
+    def _travar(self):
+        """Lock entre threads do processo e entre processos (arquivo .lock)"""
+        with self.lock:
+            diretorio = os.path.dirname(self.caminho_lock)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            with open(self.caminho_lock, 'a+b') as f:
+                if os.name == 'nt':
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                else:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if os.name == 'nt':
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                    else:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _ler_contador(self) -> int:
+        if not os.path.exists(self.caminho):
+            return self.reconstruir()
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            conteudo = f.read().strip()
+        return int(conteudo) if conteudo else self.reconstruir()
+
+    def _gravar_contador(self, valor: int):
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(str(valor))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+
+    def reservar(self, quantidade: int) -> List[str]:
+        """Reserva um bloco contíguo de números, por exemplo para importações em lote"""
+        if quantidade < 1:
+            raise ValueError("A quantidade reservada deve ser maior que zero")
+        with self._travar():
+            ultimo = self._ler_contador()
+            self._gravar_contador(ultimo + quantidade)
+        return [self.formatar(n) for n in range(ultimo + 1, ultimo + quantidade + 1)]
+
+    def proximo(self) -> str:
+        return self.reservar(1)[0]
@@ -0,0 +1,163 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+class SyncWorker:
+    """
+    Sincronização com o GitHub em segundo plano.
+
+    As solicitações entram numa fila e são agrupadas dentro de uma janela de
+    tempo, de modo que uma rajada de pedidos gera um único commit. Antes de
+    cada sincronização rodam as preparações registradas (ex.: exportar o banco
+    SQLite para pedidos.xlsx). Falhas (por exemplo, remoto inacessível) são
+    repetidas com espera exponencial.
+    """
+
+    _instancia: Optional['SyncWorker'] = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, sincronizar: Callable[[], Tuple[bool, str]],
+                 janela: float = 10.0,
+                 espera_inicial: float = 5.0,
+                 espera_maxima: float = 300.0):
+        """
+        Args:
+            sincronizar: Função que executa a sincronização e retorna (sucesso, mensagem)
+            janela: Segundos aguardando novas solicitações antes de sincronizar
+            espera_inicial: Espera antes da primeira nova tentativa após uma falha
+            espera_maxima: Limite da espera exponencial entre tentativas
+        """
+        self.sincronizar = sincronizar
+        self.preparacoes: List[Callable[[], None]] = []
+        self.janela = janela
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+
+        self.fila: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        self._parar = threading.Event()
+        self._ocioso = threading.Event()
+        self._ocioso.set()
+
+        self.pendentes = 0
+        self.sincronizando = False
+        self.tentativas = 0
+        self.ultima_sincronizacao: Optional[datetime] = None
+        self.ultimo_sucesso: Optional[bool] = None
+        self.ultima_mensagem = ""
+        self.proxima_tentativa: Optional[datetime] = None
+
+        self.thread = threading.Thread(target=self._executar, daemon=True, name="sync-worker")
+        self.thread.start()
+
+    @staticmethod
+    def get_instance() -> 'SyncWorker':
+        """Worker único por processo, sincronizando via GitHubSync"""
+        with SyncWorker._lock_instancia:
+            if SyncWorker._instancia is None:
+                from utils.github_sync import GitHubSync
+                SyncWorker._instancia = SyncWorker(
+                    lambda: GitHubSync().sync_files(),
+                    janela=float(os.getenv('SYNC_JANELA_SEGUNDOS', '10'))
+                )
+            return SyncWorker._instancia
+
+    def adicionar_preparacao(self, preparacao: Callable[[], None]):
+        """Registra uma função chamada antes de cada sincronização (uma única vez por função)"""
+        with self.lock:
+            if preparacao not in self.preparacoes:
+                self.preparacoes.append(preparacao)
+
+    def solicitar(self, motivo: str = ""):
+        """Enfileira uma sincronização sem bloquear quem chamou"""
+        with self.lock:
+            self.pendentes += 1
+            self._ocioso.clear()
+        self.fila.put(motivo)
+
+    def status(self) -> dict:
+        with self.lock:
+            return {
+                "fila": self.pendentes,
+                "sincronizando": self.sincronizando,
+                "tentativas": self.tentativas,
+                "ultima_sincronizacao": self.ultima_sincronizacao,
+                "ultimo_sucesso": self.ultimo_sucesso,
+                "ultima_mensagem": self.ultima_mensagem,
+                "proxima_tentativa": self.proxima_tentativa
+            }
+
+    def aguardar(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até a fila esvaziar com sucesso; retorna False em caso de timeout"""
+        return self._ocioso.wait(timeout)
+
+    def parar(self):
+        self._parar.set()
+        self.fila.put(None)
+        self.thread.join(timeout=5)
+
+    def _drenar_fila(self) -> bool:
+        """Descarta as solicitações já agrupadas; retorna True se recebeu sinal de parada"""
+        while True:
+            try:
+                if self.fila.get_nowait() is None:
+                    return True
+            except queue.Empty:
+                return False
+
+    def _executar(self):
+        while not self._parar.is_set():
+            if self.fila.get() is None:
+                return
+
+            # Agrupar solicitações que chegarem durante a janela
+            prazo = time.monotonic() + self.janela
+            while (restante := prazo - time.monotonic()) > 0:
+                try:
+                    if self.fila.get(timeout=restante) is None:
+                        return
+                except queue.Empty:
+                    break
+
+            espera = self.espera_inicial
+            while not self._parar.is_set():
+                if self._drenar_fila():
+                    return
+                with self.lock:
+                    lote = self.pendentes
+                    self.pendentes = 0
+                    self.sincronizando = True
+                    self.tentativas += 1
+                    preparacoes = list(self.preparacoes)
+
+                try:
+                    # Uma preparação que falha conta como falha: nada de enviar dados desatualizados
+                    for preparacao in preparacoes:
+                        preparacao()
+                    sucesso, mensagem = self.sincronizar()
+                except Exception as e:
+                    sucesso, mensagem = False, f"Erro na sincronização: {str(e)}"
+
+                with self.lock:
+                    self.sincronizando = False
+                    self.ultima_sincronizacao = datetime.now()
+                    self.ultimo_sucesso = sucesso
+                    self.ultima_mensagem = mensagem
+                    if sucesso:
+                        self.tentativas = 0
+                        self.proxima_tentativa = None
+                        if self.pendentes == 0:
+                            self._ocioso.set()
+                    else:
+                        # As solicitações continuam pendentes até a próxima tentativa
+                        self.pendentes += lote
+                        self.proxima_tentativa = datetime.fromtimestamp(time.time() + espera)
+
+                if sucesso:
+                    break
+                if self._parar.wait(espera):
+                    return
+                espera = min(espera * 2, self.espera_maxima)
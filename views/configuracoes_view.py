@@ -2,17 +2,20 @@ import streamlit as st
 import os
 from datetime import datetime
 import platform
+from controllers.pedido_controller import PedidoController
+from models.catalogo import ConsultaCatalogo
+from utils.cache_planilha import CachePlanilha
+from utils.diagnostico import Diagnostico
+from utils.renderizador_pdf import RenderizadorPDF
+from utils.sync_worker import SyncWorker
+from utils.github_sync import GitHubSync
 
 class ConfiguracoesView:
-    def __init__(self):
-        self.base_dir = os.path.join(
-            os.path.expanduser("~"),
-            "OneDrive - Yazaki",
-            "Solicitação",
-            "Pedidos"
-        )
-        self.arquivo_pedidos = os.path.join(self.base_dir, "pedidos.xlsx")
-        self.arquivo_backup = os.path.join(self.base_dir, "backup")
+    def __init__(self, controller: PedidoController):
+        self.controller = controller
+        self.arquivo_pedidos = controller.arquivo_pedidos
+        self.arquivo_backup = controller.diretorio_backup
+        self.base_dir = os.path.dirname(self.arquivo_pedidos)
 
     def mostrar_interface(self):
         st.markdown("### ⚙️ Configurações do Sistema", unsafe_allow_html=True)
@@ -35,16 +38,142 @@ class ConfiguracoesView:
         **Pasta de Backup:** {self.arquivo_backup}
         """)
         
+        # Alterações ainda não gravadas na planilha de pedidos
+        st.markdown("#### 🗂️ Armazenamento de Pedidos")
+        st.markdown(f"""
+        **Backend:** {os.getenv('BACKEND_PEDIDOS', 'xlsx')}  
+        **Alterações pendentes na planilha:** {self.controller.alteracoes_pendentes()}
+        """)
+        if self.controller.armazenamento.erro_migracao:
+            st.error(self.controller.armazenamento.erro_migracao)
+        if self.controller.armazenamento.erro_compactacao:
+            st.warning(self.controller.armazenamento.erro_compactacao)
+        cache = CachePlanilha.get_instance().estatisticas()
+        st.markdown(f"""
+        **Cache de planilhas:** {cache['hits']} acertos / {cache['misses']} leituras do disco
+        ({cache['taxa_acerto']:.0%} de acerto)
+        """)
+        escrita = self.controller.fila_escrita.metricas()
+        st.markdown(f"""
+        **Fila de gravação:** {escrita['fila']} aguardando · {escrita['lotes']} lotes gravados
+        (média de {escrita['lote_medio']:.1f} alterações, maior {escrita['maior_lote']}) ·
+        latência p50 {escrita['latencia_p50_ms']:.0f} ms / p95 {escrita['latencia_p95_ms']:.0f} ms
+        """)
+        consultas = ConsultaCatalogo.get_instance().estatisticas()
+        st.markdown(f"""
+        **Consultas ao catálogo:** {consultas['hits']} acertos / {consultas['misses']} calculadas
+        ({consultas['taxa_acerto']:.0%} de acerto, {consultas['entradas']} em cache)
+        """)
+        pdfs = RenderizadorPDF.get_instance().estatisticas()
+        st.markdown(f"""
+        **PDFs de pedidos:** {pdfs['hits']} reaproveitados / {pdfs['misses']} renderizados na hora
+        ({pdfs['pre_renderizados']} prontos ao salvar, {pdfs['pdfs']} em cache, {pdfs['bytes'] / 1024:.0f} KB)
+        """)
+        impressao = self.controller.spooler.resumo()
+        st.markdown(f"""
+        **Fila de impressão:** {impressao['pendente']} na fila · {impressao['imprimindo']} imprimindo ·
+        {impressao['concluido']} impressos · {impressao['falhou']} com falha
+        """)
+        if self.controller.spooler.aviso:
+            st.warning(self.controller.spooler.aviso)
+        with st.expander("🧮 Memória da tabela de pedidos"):
+            try:
+                memoria = self.controller.relatorio_memoria()
+                st.markdown(f"""
+                **{memoria['linhas']} pedidos:** {memoria['total_antes'] / 1024:.1f} KB só em texto →
+                {memoria['total_depois'] / 1024:.1f} KB no esquema tipado
+                ({memoria['reducao']:.0%} de redução)
+                """)
+                st.dataframe(
+                    [
+                        {
+                            "Coluna": c["coluna"],
+                            "Tipo": c["tipo"],
+                            "Antes (KB)": round(c["antes"] / 1024, 1),
+                            "Depois (KB)": round(c["depois"] / 1024, 1)
+                        }
+                        for c in memoria["colunas"]
+                    ],
+                    hide_index=True
+                )
+            except Exception as e:
+                st.error(f"Erro ao calcular memória: {str(e)}")
+        if st.button("🗜️ Atualizar planilha agora"):
+            try:
+                total = self.controller.consolidar_planilha()
+                st.success(f"{total} alterações incorporadas à planilha de pedidos!")
+            except Exception as e:
+                st.error(f"Erro ao atualizar planilha: {str(e)}")
+        self._mostrar_diagnostico()
+
+        # Mudanças detectadas na planilha de mapeamento
+        st.markdown("#### 📑 Planilha de Mapeamento")
+        try:
+            catalogo = self.controller.carregar_catalogo()
+            st.markdown(f"""
+            **Versão atual:** {catalogo.versao} ({len(catalogo)} posições)
+            """)
+        except Exception as e:
+            st.error(str(e))
+        alteracoes = self.controller.alteracoes_catalogo()
+        if not alteracoes:
+            st.info("Nenhuma alteração na planilha de mapeamento desde o início desta execução")
+        for diferenca in alteracoes:
+            titulo = (
+                f"{diferenca.data.strftime('%d/%m/%Y %H:%M:%S')} - "
+                f"{len(diferenca.adicionadas)} adicionadas, "
+                f"{len(diferenca.removidas)} removidas, "
+                f"{len(diferenca.alteradas)} alteradas"
+            )
+            with st.expander(titulo):
+                for rotulo, posicoes in (("Adicionadas", diferenca.adicionadas),
+                                         ("Removidas", diferenca.removidas),
+                                         ("Alteradas", diferenca.alteradas)):
+                    if posicoes:
+                        st.markdown(f"**{rotulo}:**")
+                        st.markdown("\n".join(
+                            f"- {cliente} / {rack} / {locacao}"
+                            for cliente, rack, locacao in posicoes[:50]
+                        ))
+                        if len(posicoes) > 50:
+                            st.caption(f"... e mais {len(posicoes) - 50}")
+                if not diferenca.incremental:
+                    st.caption("Linhas inseridas ou removidas no meio da planilha: índice reconstruído")
+        
+        # Situação da sincronização em segundo plano
+        st.markdown("#### 🔄 Sincronização com GitHub")
+        worker = SyncWorker.get_instance()
+        sync = worker.status()
+        if sync['ultima_sincronizacao'] is None:
+            ultima = "Nenhuma sincronização nesta execução"
+        else:
+            ultima = (
+                f"{sync['ultima_sincronizacao'].strftime('%d/%m/%Y %H:%M:%S')} - "
+                f"{'✅' if sync['ultimo_sucesso'] else '❌'} {sync['ultima_mensagem']}"
+            )
+        st.markdown(f"""
+        **Solicitações na fila:** {sync['fila']}{" (sincronizando...)" if sync['sincronizando'] else ""}  
+        **Última sincronização:** {ultima}
+        """)
+        if sync['proxima_tentativa']:
+            st.warning(
+                f"Nova tentativa às {sync['proxima_tentativa'].strftime('%H:%M:%S')} "
+                f"(tentativa {sync['tentativas']})"
+            )
+        medicoes = GitHubSync().ultimas_medicoes()
+        if medicoes:
+            st.caption(
+                "Etapas da última sincronização: " +
+                " · ".join(f"{etapa} {ms:.0f} ms" for etapa, ms in medicoes.items())
+            )
+        if st.button("🔄 Sincronizar agora"):
+            worker.solicitar("manual")
+            st.success("Sincronização agendada!")
+        
         # Mostrar backups disponíveis
         st.markdown("#### 💾 Backups Disponíveis")
         
-        if not os.path.exists(self.arquivo_backup):
-            os.makedirs(self.arquivo_backup, exist_ok=True)
-            
-        backups = sorted([
-            f for f in os.listdir(self.arquivo_backup)
-            if f.endswith('.xlsx')
-        ], reverse=True)
+        backups = self.controller.listar_backups()
         
         if not backups:
             st.info("Nenhum backup encontrado")
@@ -52,25 +181,30 @@ class ConfiguracoesView:
             for backup in backups:
                 col1, col2 = st.columns([3, 1])
                 with col1:
-                    st.text(backup)
+                    data = datetime.fromisoformat(backup['data']).strftime('%d/%m/%Y %H:%M:%S')
+                    st.text(
+                        f"{data} - {backup['arquivo']} "
+                        f"({backup['tamanho'] / 1024:.0f} KB, "
+                        f"{backup['tamanho_comprimido'] / 1024:.0f} KB comprimido)"
+                    )
                 with col2:
-                    if st.button("📥 Restaurar", key=f"restore_{backup}"):
+                    if st.button("📥 Restaurar", key=f"restore_{backup['id']}"):
                         try:
-                            # Restaurar backup
-                            backup_path = os.path.join(self.arquivo_backup, backup)
-                            os.replace(backup_path, self.arquivo_pedidos)
+                            self.controller.restaurar_backup(backup['id'])
                             st.success("Backup restaurado com sucesso!")
-                            st.experimental_rerun()
+                            st.rerun()
                         except Exception as e:
                             st.error(f"Erro ao restaurar backup: {str(e)}")
         
         # Informações adicionais
         st.markdown("#### ℹ️ Informações")
         st.markdown("""
-        - O sistema mantém automaticamente os últimos 10 backups
-        - Um novo backup é criado sempre que há alterações nos pedidos
-        - Os backups são nomeados com data e hora para fácil identificação
-        - Use o botão "Restaurar" para voltar a uma versão anterior dos dados
+        - Um novo backup é criado sempre que a planilha de pedidos é regravada
+        - Backups com conteúdo idêntico são armazenados uma única vez, comprimidos
+        - São mantidos os 10 backups mais recentes, um por hora nas últimas 24 horas
+          e um por dia nos últimos 30 dias
+        - Use o botão "Restaurar" para voltar a uma versão anterior dos dados; o backup
+          restaurado continua disponível e a versão atual ganha um backup próprio
         """)
         
         # Aviso importante
@@ -78,4 +212,59 @@ class ConfiguracoesView:
         **⚠️ Atenção!**  
         Ao restaurar um backup, a versão atual dos dados será substituída.
         Certifique-se de que deseja realmente fazer isso antes de prosseguir.
-        """) 
\ No newline at end of file
+        """) 
+
+    def _mostrar_diagnostico(self):
+        """Tempos por operação medidos nesta execução e o trace do último salvamento"""
+        diagnostico = Diagnostico.get_instance()
+        with st.expander("🩺 Diagnóstico de desempenho"):
+            estatisticas = diagnostico.estatisticas()
+            if not estatisticas:
+                st.info("Nenhuma operação medida ainda nesta execução")
+                return
+            st.markdown("**Operações mais lentas (p95)**")
+            st.dataframe(
+                [
+                    {
+                        "Operação": e["operacao"],
+                        "Chamadas": e["chamadas"],
+                        "p50 (ms)": round(e["p50_ms"], 1),
+                        "p95 (ms)": round(e["p95_ms"], 1),
+                        "p99 (ms)": round(e["p99_ms"], 1),
+                        "Máx (ms)": round(e["max_ms"], 1),
+                        "Erros": e["erros"]
+                    }
+                    for e in estatisticas[:15]
+                ],
+                hide_index=True
+            )
+
+            trace = diagnostico.ultimo_trace("PedidoController.salvar_pedido")
+            if trace:
+                st.markdown("**Último pedido salvo**")
+                st.code("\n".join(
+                    f"{'  ' * s['profundidade']}{s['nome']}  {s['duracao_ms']:.1f} ms"
+                    + (f"  [{s['erro']}]" if s['erro'] else "")
+                    for s in trace
+                ), language=None)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("💾 Exportar medições"):
+                    try:
+                        caminho = os.path.join(
+                            self.base_dir, "diagnostico",
+                            f"spans_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+                        )
+                        total = diagnostico.exportar(caminho)
+                        st.success(f"{total} medições exportadas para {caminho}")
+                        with open(caminho, 'rb') as f:
+                            st.download_button("📥 Baixar arquivo", f.read(),
+                                               file_name=os.path.basename(caminho),
+                                               mime="application/jsonl")
+                    except Exception as e:
+                        st.error(f"Erro ao exportar medições: {str(e)}")
+            with col2:
+                if st.button("🧹 Limpar medições"):
+                    diagnostico.limpar()
+                    st.rerun()
@@ -0,0 +1,97 @@
+import streamlit as st
+from controllers.pedido_controller import PedidoController
+from utils.importacao_pedidos import MODELO_IMPORTACAO
+
+class ImportacaoView:
+    """Importação de vários pedidos a partir de uma planilha (CSV ou XLSX)"""
+
+    def __init__(self, controller: PedidoController):
+        self.controller = controller
+
+    def mostrar_interface(self):
+        st.markdown("### 📥 Importar Pedidos")
+        st.markdown("""
+        Cada linha do arquivo vira um pedido com um item. Colunas obrigatórias:
+        **Cliente**, **RACK**, **Locação**, **CÓD Yazaki** e **Quantidade**;
+        **Solicitante** e **Observações** são opcionais.
+        """)
+        st.download_button(
+            label="📄 Baixar modelo (CSV)",
+            data=MODELO_IMPORTACAO.encode('utf-8-sig'),
+            file_name="modelo_importacao_pedidos.csv",
+            mime="text/csv"
+        )
+
+        # Resultado da última importação (o envio do arquivo é limpo em seguida)
+        importados = st.session_state.pop('importacao_concluida', None)
+        if importados:
+            st.success(
+                f"✅ {len(importados)} pedidos criados ({importados[0]} a {importados[-1]})! "
+                "Você pode visualizá-los na aba de Histórico."
+            )
+
+        versao = st.session_state.setdefault('importacao_versao', 0)
+        arquivo = st.file_uploader(
+            "Arquivo de pedidos",
+            type=["csv", "xlsx"],
+            key=f"arquivo_importacao_{versao}"
+        )
+        solicitante = st.text_input(
+            "Solicitante (para linhas sem solicitante)",
+            placeholder="Digite seu nome completo"
+        )
+        if arquivo is None:
+            return
+
+        try:
+            resultado = self.controller.preparar_importacao(
+                arquivo.getvalue(), arquivo.name, solicitante
+            )
+        except Exception as e:
+            st.error(f"❌ {str(e)}")
+            return
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Linhas", resultado.total_linhas)
+        col2.metric("Válidas", len(resultado.pedidos))
+        col3.metric("Com erro", len(resultado.erros))
+
+        if not resultado.erros.empty:
+            st.warning("As linhas abaixo não serão importadas:")
+            st.dataframe(resultado.erros, hide_index=True)
+
+        if not resultado.pedidos:
+            st.info("Nenhuma linha válida para importar")
+            return
+
+        st.markdown("#### Pré-visualização")
+        st.dataframe(
+            [
+                {
+                    "Cliente": p["cliente"],
+                    "RACK": p["rack"],
+                    "Locação": p["locacao"],
+                    "CÓD Yazaki": p["itens"][0]["cod_yazaki"],
+                    "Quantidade": p["itens"][0]["quantidade"],
+                    "Solicitante": p["solicitante"]
+                }
+                for p in resultado.pedidos[:100]
+            ],
+            hide_index=True
+        )
+        if len(resultado.pedidos) > 100:
+            st.caption(f"... e mais {len(resultado.pedidos) - 100}")
+
+        if st.button(f"💾 Criar {len(resultado.pedidos)} pedidos", type="primary"):
+            try:
+                with st.spinner("Gravando pedidos..."):
+                    numeros = self.controller.salvar_pedidos_em_lote(resultado.pedidos)
+                st.session_state.importacao_concluida = numeros
+                st.session_state.importacao_versao = versao + 1
+                st.rerun()
+            except Exception as e:
+                st.error(f"""
+                ❌ Erro ao importar pedidos:
+
+                {str(e)}
+                """)
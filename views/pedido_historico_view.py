@@ -1,14 +1,21 @@
 import streamlit as st
 from controllers.pedido_controller import PedidoController
+from models.esquema import STATUS_PEDIDOS, exibir_pedidos
 from datetime import datetime
-import pandas as pd
-import os
-import tempfile
 import time
-from fpdf import FPDF
-from utils.print_manager import PrintManager
+from utils.exportacao_pdf import ExportadorPDF
+from utils.renderizador_pdf import RenderizadorPDF
 
 class PedidoHistoricoView:
+    # Rótulo da ordenação → coluna usada em buscar_pedidos
+    ORDENACOES = {
+        "Número": "Numero_Pedido",
+        "Data": "Data",
+        "Cliente": "Cliente",
+        "Status": "Status",
+        "Última Atualização": "Ultima_Atualizacao"
+    }
+
     def __init__(self, controller: PedidoController):
         self.controller = controller
         self._aplicar_estilos()
@@ -90,28 +97,204 @@ class PedidoHistoricoView:
         </style>
         """, unsafe_allow_html=True)
 
+    def _mostrar_paginacao(self, pagina: int, tamanho_pagina: int, total: int):
+        """Botões de página anterior/próxima"""
+        paginas = max(1, (total + tamanho_pagina - 1) // tamanho_pagina)
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("⬅️ Anterior", disabled=pagina == 0, use_container_width=True):
+                st.session_state.pagina_historico = pagina - 1
+                st.rerun()
+        with col2:
+            st.markdown(
+                f"<p style='text-align: center'>Página {pagina + 1} de {paginas}</p>",
+                unsafe_allow_html=True
+            )
+        with col3:
+            if st.button("Próxima ➡️", disabled=pagina + 1 >= paginas, use_container_width=True):
+                st.session_state.pagina_historico = pagina + 1
+                st.rerun()
+
+    def _mostrar_exportacao_lote(self, status, termo, data_inicio, data_fim):
+        """Exporta de uma vez todos os pedidos dos filtros atuais (e de um RACK) em PDF"""
+        with st.expander("📦 Exportar pedidos em lote"):
+            st.caption("Usa a busca, o status e o período selecionados acima.")
+            col_rack, col_formato = st.columns(2)
+            with col_rack:
+                rack = st.text_input("RACK (opcional)", key="rack_exportacao").strip()
+            with col_formato:
+                formato = st.radio(
+                    "Formato",
+                    ["PDF único", "ZIP (um PDF por pedido)"],
+                    key="formato_exportacao"
+                )
+            
+            filtros = (termo, status, data_inicio, data_fim, rack, formato)
+            def pedidos_do_lote():
+                df_lote, total = self.controller.buscar_pedidos(
+                    status=status,
+                    rack=rack or None,
+                    termo=termo,
+                    data_inicio=data_inicio,
+                    data_fim=data_fim,
+                    ordenar_por=[("Numero_Pedido", True)]
+                )
+                return df_lote, total
+            
+            col_gerar, col_imprimir = st.columns(2)
+            with col_gerar:
+                gerar = st.button("Gerar arquivo", key="gerar_exportacao")
+            with col_imprimir:
+                imprimir = st.button("🖨️ Enviar todos para a impressora", key="imprimir_lote")
+            
+            if imprimir:
+                try:
+                    df_lote, total = pedidos_do_lote()
+                    if not total:
+                        st.warning("Nenhum pedido para imprimir com esses filtros.")
+                    else:
+                        trabalhos = self.controller.imprimir_pedidos(df_lote["Numero_Pedido"].tolist())
+                        st.session_state.setdefault('trabalhos_impressao', []).extend(trabalhos)
+                        st.success(f"✅ {total} pedidos enviados para a fila de impressão")
+                except Exception as e:
+                    st.error(f"❌ {str(e)}")
+            
+            if gerar:
+                try:
+                    df_lote, total = pedidos_do_lote()
+                    if not total:
+                        st.warning("Nenhum pedido para exportar com esses filtros.")
+                        st.session_state.pop('exportacao_lote', None)
+                    else:
+                        with st.spinner(f"Gerando PDFs de {total} pedidos..."):
+                            detalhes = self.controller.get_pedidos_detalhes(
+                                df_lote["Numero_Pedido"].tolist()
+                            )
+                            exportador = ExportadorPDF.get_instance()
+                            carimbo = datetime.now().strftime('%Y%m%d_%H%M%S')
+                            if formato == "PDF único":
+                                arquivo = (f"pedidos_{carimbo}.pdf", exportador.exportar_pdf_unico(detalhes),
+                                           "application/pdf")
+                            else:
+                                arquivo = (f"pedidos_{carimbo}.zip", exportador.exportar_zip(detalhes),
+                                           "application/zip")
+                        st.session_state.exportacao_lote = (filtros, total) + arquivo
+                except Exception as e:
+                    st.error(f"❌ Erro ao exportar pedidos: {str(e)}")
+            
+            # O arquivo gerado só vale para os filtros com que foi gerado
+            exportacao = st.session_state.get('exportacao_lote')
+            if exportacao and exportacao[0] == filtros:
+                _, total, nome_arquivo, dados, mime = exportacao
+                st.download_button(
+                    label=f"📥 Baixar {total} pedidos",
+                    data=dados,
+                    file_name=nome_arquivo,
+                    mime=mime,
+                    key="baixar_exportacao"
+                )
+
+    def _mostrar_impressoes(self):
+        """Situação dos trabalhos de impressão enviados nesta sessão"""
+        trabalhos = self.controller.status_impressao(st.session_state.get('trabalhos_impressao', []))
+        if not trabalhos:
+            return
+        rotulos = {
+            "pendente": "⏳ Na fila",
+            "imprimindo": "🖨️ Imprimindo",
+            "concluido": "✅ Impresso",
+            "falhou": "❌ Falhou"
+        }
+        with st.expander(f"🖨️ Impressões ({len(trabalhos)})"):
+            st.dataframe(
+                [
+                    {
+                        "Pedido": t["nome"].removesuffix(".pdf"),
+                        "Situação": rotulos.get(t["status"], t["status"]),
+                        "Tentativas": t["tentativas"],
+                        "Próxima tentativa (s)": t["proxima_tentativa_em"] or "",
+                        "Erro": t["erro"]
+                    }
+                    for t in reversed(trabalhos)
+                ],
+                hide_index=True
+            )
+            falhos = [t["id"] for t in trabalhos if t["status"] == "falhou"]
+            col1, col2 = st.columns(2)
+            with col1:
+                st.button("🔄 Atualizar situação", key="atualizar_impressoes")
+            with col2:
+                if falhos and st.button(f"Reenviar {len(falhos)} com falha", key="reenviar_impressoes"):
+                    for trabalho in falhos:
+                        self.controller.spooler.reenviar(trabalho)
+                    st.rerun()
+
     def mostrar_interface(self):
         """Mostra a interface do histórico de pedidos"""
         st.markdown("### 📋 Histórico de Pedidos")
         
-        # Filtro de Status
-        status_filtro = st.selectbox(
-            "Status do Pedido",
-            ["Todos", "Pendente", "Concluído", "Em Processamento"]
+        # Busca livre (pedido, cliente, RACK, solicitante, códigos dos itens...)
+        termo = st.text_input(
+            "Buscar",
+            placeholder="🔍 Buscar por número, cliente, RACK, solicitante, código Yazaki ou cabo..."
         )
         
+        # Filtros de status e período
+        col_status, col_inicio, col_fim = st.columns([2, 1, 1])
+        with col_status:
+            status_filtro = st.selectbox(
+                "Status do Pedido",
+                ["Todos"] + STATUS_PEDIDOS
+            )
+        with col_inicio:
+            data_inicio = st.date_input("De", value=None, format="DD/MM/YYYY")
+        with col_fim:
+            data_fim = st.date_input("Até", value=None, format="DD/MM/YYYY")
+        
+        # Ordenação e tamanho da página
+        col_ordem, col_sentido, col_tamanho = st.columns([2, 1, 1])
+        with col_ordem:
+            ordenar_por = st.selectbox("Ordenar por", list(self.ORDENACOES))
+        with col_sentido:
+            decrescente = st.checkbox("Mais recentes/maiores primeiro", value=True)
+        with col_tamanho:
+            tamanho_pagina = st.selectbox("Pedidos por página", [10, 25, 50, 100], index=1)
+        
+        # Voltar à primeira página quando os filtros mudam
+        filtros = (termo, status_filtro, data_inicio, data_fim, ordenar_por, decrescente, tamanho_pagina)
+        if st.session_state.get('filtros_historico') != filtros:
+            st.session_state.filtros_historico = filtros
+            st.session_state.pagina_historico = 0
+        pagina = st.session_state.get('pagina_historico', 0)
+        
         try:
-            # Buscar pedidos
-            df_pedidos = self.controller.buscar_pedidos(
-                status=None if status_filtro == "Todos" else status_filtro
+            # Buscar somente a página atual
+            df_pedidos, total = self.controller.buscar_pedidos(
+                status=None if status_filtro == "Todos" else status_filtro,
+                termo=termo,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                offset=pagina * tamanho_pagina,
+                limit=tamanho_pagina,
+                ordenar_por=[(self.ORDENACOES[ordenar_por], not decrescente)]
             )
             
+            # A página guardada pode ter ficado além do fim (ex.: pedidos removidos por restauração)
+            if df_pedidos.empty and total:
+                st.session_state.pagina_historico = 0
+                st.rerun()
+            
             if not df_pedidos.empty:
                 # Mostrar total de pedidos
-                st.write(f"Total: {len(df_pedidos)} pedidos encontrados")
+                st.write(f"Total: {total} pedidos encontrados")
+                self._mostrar_exportacao_lote(
+                    None if status_filtro == "Todos" else status_filtro,
+                    termo, data_inicio, data_fim
+                )
+                self._mostrar_paginacao(pagina, tamanho_pagina, total)
                 
                 # Formatar DataFrame para exibição
-                df_display = df_pedidos[[
+                df_display = exibir_pedidos(df_pedidos)[[
                     "Numero_Pedido", "Data", "Cliente", "RACK", 
                     "Localizacao", "Solicitante", "Status",
                     "Ultima_Atualizacao", "Responsavel_Atualizacao"
@@ -168,12 +351,17 @@ class PedidoHistoricoView:
                         st.write(f"**Solicitante:** {detalhes['info']['Solicitante']}")
                         st.write(f"**Status:** {detalhes['status']}")
                         
-                        # Botão de impressão simplificado
-                        if st.button("🖨️", help="Imprimir pedido"):
+                        try:
+                            self.baixar_pdf(detalhes)
+                        except Exception as e:
+                            st.error(f"❌ {str(e)}")
+                        
+                        if st.button("🖨️ Enviar para a impressora", key="enviar_impressora"):
                             try:
-                                self.imprimir_pedido(pedido_selecionado)
+                                trabalho = self.controller.imprimir_pedido(pedido_selecionado)
+                                st.session_state.setdefault('trabalhos_impressao', []).append(trabalho)
                             except Exception as e:
-                                st.error("Erro ao processar impressão")
+                                st.error(f"❌ {str(e)}")
                     
                     with col2:
                         st.markdown("#### Item")
@@ -190,8 +378,9 @@ class PedidoHistoricoView:
                     # Seleção de status
                     novo_status = st.selectbox(
                         "Novo Status",
-                        ["Pendente", "Em Processamento", "Concluído"],
-                        index=["Pendente", "Em Processamento", "Concluído"].index(detalhes['status'])
+                        STATUS_PEDIDOS,
+                        index=STATUS_PEDIDOS.index(detalhes['status'])
+                        if detalhes['status'] in STATUS_PEDIDOS else 0
                     )
                     
                     # Campo de responsável logo abaixo
@@ -247,92 +436,21 @@ class PedidoHistoricoView:
             
             Por favor, tente novamente ou contate o suporte.
             """)
-
-    def formatar_pedido_para_impressao(self, pedido: dict) -> str:
-        """Formata o pedido para impressão"""
-        info = pedido["info"]
-        itens = pedido["itens"]
         
-        texto = f"""
-=================================================
-            PEDIDO DE REQUISIÇÃO
-=================================================
-Número: {info['Numero_Pedido']}
-Data: {info['Data']}
-Status: {pedido['status']}
-
-INFORMAÇÕES:
--------------------------------------------------
-Cliente: {info['Cliente']}
-RACK: {info['RACK']}
-Localização: {info['Localizacao']}
-Solicitante: {info['Solicitante']}
-
-OBSERVAÇÕES:
-{info['Observacoes']}
+        # Depois da página, para já incluir o que foi enviado nesta execução
+        self._mostrar_impressoes()
 
-ITENS:
--------------------------------------------------"""
-
-        for item in itens:
-            texto += f"""
-CÓD Yazaki: {item['cod_yazaki']}
-Código Cabo: {item['codigo_cabo']}
-Secção: {item['seccao']}
-Cor: {item['cor']}
-Quantidade: {item['quantidade']}
--------------------------------------------------"""
-        
-        texto += "\n\n"
-        texto += "Assinatura: _____________________________\n"
-        texto += f"Impresso em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-        
-        return texto
-
-    def _criar_pdf(self, texto: str) -> str:
-        """Cria um arquivo PDF com o conteúdo do pedido"""
-        pdf = FPDF()
-        pdf.add_page()
-        
-        # Usar fonte padrão
-        pdf.set_font('Helvetica', size=11)
-        
-        # Adicionar texto
-        for linha in texto.split('\n'):
-            pdf.cell(0, 5, txt=linha, ln=True)
-        
-        # Salvar PDF
-        nome_arquivo = f"pedido_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        
-        # No Streamlit Cloud, salvar na pasta temporária
-        if os.getenv('IS_STREAMLIT_CLOUD', '0') == '1':
-            caminho_pdf = os.path.join('/tmp', nome_arquivo)
-        else:
-            caminho_pdf = os.path.join(os.path.expanduser("~"), "Downloads", nome_arquivo)
-            
-        pdf.output(caminho_pdf)
-        return caminho_pdf
-
-    def imprimir_pedido(self, numero_pedido: str):
-        """Gera um PDF do pedido"""
+    def baixar_pdf(self, pedido: dict):
+        """Oferece o PDF do pedido para download (em memória, reaproveitando o já renderizado)"""
         try:
-            # Obter dados do pedido
-            pedido = self.controller.get_pedido_detalhes(numero_pedido)
-            texto = self.formatar_pedido_para_impressao(pedido)
-            
-            # Gerar PDF
-            caminho_pdf = self._criar_pdf(texto)
-            
-            # Mostrar link para download
-            if os.path.exists(caminho_pdf):
-                with open(caminho_pdf, 'rb') as f:
-                    pdf_bytes = f.read()
-                st.download_button(
-                    label="📥 Baixar PDF do Pedido",
-                    data=pdf_bytes,
-                    file_name=os.path.basename(caminho_pdf),
-                    mime="application/pdf"
-                )
+            numero_pedido = pedido['info']['Numero_Pedido']
+            pdf_bytes = RenderizadorPDF.get_instance().obter(pedido)
+            st.download_button(
+                label="📥 Baixar PDF do Pedido",
+                data=pdf_bytes,
+                file_name=f"pedido_{numero_pedido}.pdf",
+                mime="application/pdf"
+            )
             
         except Exception as e:
-            raise Exception(f"Erro ao processar pedido: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Erro ao processar pedido: {str(e)}")
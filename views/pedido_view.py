@@ -1,5 +1,6 @@
 import streamlit as st
 from controllers.pedido_controller import PedidoController
+from models.catalogo import IndiceCatalogo
 from typing import List, Dict
 import pandas as pd
 from datetime import datetime
@@ -137,15 +138,10 @@ class PedidoView:
         </style>
         """, unsafe_allow_html=True)
 
-    def _mostrar_posicoes_e_contagem(self, dados, cliente: str, rack: str):
+    def _mostrar_posicoes_e_contagem(self, indice: IndiceCatalogo, cliente: str, rack: str):
         """Mostra a tabela de posições e a contagem"""
-        # Filtrar posições do rack
-        posicoes = [
-            item.locacao
-            for item in dados
-            if item.cliente.lower() == cliente.lower() 
-            and item.rack.lower() == rack.lower()
-        ]
+        # Posições do rack
+        posicoes = indice.posicoes(cliente, rack)
         
         if posicoes:
             # Layout em duas colunas
@@ -230,8 +226,18 @@ class PedidoView:
                 placeholder="Digite aqui observações importantes sobre o pedido (opcional)"
             )
             
-            # Botão de submit
-            submitted = st.form_submit_button("💾 Criar Pedido de Requisição")
+            # Botões de submit
+            col_criar, col_carrinho = st.columns(2)
+            with col_criar:
+                submitted = st.form_submit_button("💾 Criar Pedido de Requisição")
+            with col_carrinho:
+                adicionar = st.form_submit_button("🛒 Adicionar ao carrinho")
+            
+            if adicionar:
+                self._adicionar_ao_carrinho(item_selecionado, quantidade)
+                if 'posicao_selecionada' in st.session_state:
+                    del st.session_state.posicao_selecionada
+                st.rerun()
             
             if submitted:
                 if not solicitante:
@@ -280,15 +286,161 @@ class PedidoView:
         
         st.markdown('</div>', unsafe_allow_html=True)
 
+    @staticmethod
+    def _carrinho() -> dict:
+        """Carrinho da sessão: posições de um mesmo cliente/RACK, por locação"""
+        return st.session_state.setdefault(
+            'carrinho', {"cliente": "", "rack": "", "itens": {}, "versao": 0}
+        )
+
+    def _adicionar_ao_carrinho(self, item, quantidade: int):
+        """Coloca a posição no carrinho (ou atualiza a quantidade, se já estiver nele)"""
+        carrinho = self._carrinho()
+        if carrinho["itens"] and (
+            carrinho["cliente"].casefold() != item.cliente.casefold()
+            or carrinho["rack"].casefold() != item.rack.casefold()
+        ):
+            st.session_state.aviso_carrinho = (
+                f"O carrinho já tem posições do RACK {carrinho['rack']} ({carrinho['cliente']}). "
+                "Crie o pedido ou esvazie o carrinho antes de escolher outro RACK."
+            )
+            return
+        carrinho["cliente"] = item.cliente
+        carrinho["rack"] = item.rack
+        carrinho["itens"][item.locacao] = {
+            "cod_yazaki": item.cod_yazaki,
+            "codigo_cabo": item.codigo_cabo,
+            "seccao": item.seccao,
+            "cor": item.cor,
+            "quantidade": int(quantidade)
+        }
+        carrinho["versao"] += 1
+
+    def _aplicar_edicoes(self, tabela: pd.DataFrame):
+        """Leva ao carrinho as quantidades editadas e tira dele as posições marcadas em Remover"""
+        carrinho = self._carrinho()
+        carrinho["itens"] = {
+            locacao: dict(carrinho["itens"][locacao], quantidade=int(quantidade))
+            for locacao, quantidade, remover in zip(tabela["Locação"], tabela["Quantidade"],
+                                                     tabela["Remover"].astype(bool))
+            if not remover
+        }
+        carrinho["versao"] += 1
+
+    def _esvaziar_carrinho(self):
+        carrinho = self._carrinho()
+        carrinho["itens"] = {}
+        carrinho["versao"] += 1
+
+    def _mostrar_carrinho(self):
+        """Posições escolhidas e o formulário que cria um único pedido com todas elas"""
+        aviso = st.session_state.pop('aviso_carrinho', None)
+        if aviso:
+            st.warning(aviso)
+        criado = st.session_state.pop('pedido_carrinho', None)
+        if criado:
+            st.success(f"""
+            ✅ Pedido {criado[0]} criado com {criado[1]} itens!
+            
+            Você pode visualizá-lo na aba de Histórico.
+            """)
+
+        carrinho = self._carrinho()
+        if not carrinho["itens"]:
+            return
+
+        st.markdown('<div class="requisicao-form">', unsafe_allow_html=True)
+        st.markdown(
+            f"### 🛒 Carrinho - RACK {carrinho['rack']} ({carrinho['cliente']}): "
+            f"{len(carrinho['itens'])} posições"
+        )
+        with st.form(key="carrinho_form"):
+            tabela = st.data_editor(
+                pd.DataFrame([
+                    {
+                        "Locação": locacao,
+                        "CÓD Yazaki": item["cod_yazaki"],
+                        "Código Cabo": item["codigo_cabo"],
+                        "Cor": item["cor"],
+                        "Quantidade": item["quantidade"],
+                        "Remover": False
+                    }
+                    for locacao, item in carrinho["itens"].items()
+                ]),
+                column_config={
+                    "Quantidade": st.column_config.NumberColumn(min_value=1, step=1, required=True),
+                    "Remover": st.column_config.CheckboxColumn()
+                },
+                disabled=["Locação", "CÓD Yazaki", "Código Cabo", "Cor"],
+                hide_index=True,
+                key=f"editor_carrinho_{carrinho['versao']}"
+            )
+            solicitante = st.text_input(
+                "Nome do Solicitante",
+                placeholder="Digite seu nome completo"
+            )
+            observacoes = st.text_area(
+                "Observações",
+                placeholder="Digite aqui observações importantes sobre o pedido (opcional)"
+            )
+            atualizar = st.form_submit_button("🔄 Atualizar carrinho")
+            submitted = st.form_submit_button("💾 Criar pedido com os itens do carrinho")
+
+            # Remoções e quantidades editadas passam a valer no carrinho
+            if atualizar or submitted:
+                self._aplicar_edicoes(tabela)
+            if atualizar:
+                st.rerun()
+
+            if submitted:
+                # Aviso pelo carrinho: o rerun mostra a tabela já sem as posições removidas
+                if not solicitante:
+                    st.session_state.aviso_carrinho = "Por favor, informe o nome do solicitante!"
+                    st.rerun()
+                if not carrinho["itens"]:
+                    st.session_state.aviso_carrinho = "Todas as posições foram removidas do carrinho!"
+                    st.rerun()
+
+                try:
+                    pedido = {
+                        "cliente": carrinho["cliente"],
+                        "rack": carrinho["rack"],
+                        "locacao": ", ".join(carrinho["itens"]),
+                        "solicitante": solicitante,
+                        "observacoes": observacoes,
+                        "data": datetime.now(),
+                        "itens": list(carrinho["itens"].values())
+                    }
+                    
+                    # Um único salvamento (e uma única sincronização) para o RACK inteiro
+                    numero_pedido = self.controller.salvar_pedido(pedido)
+                    
+                    self._esvaziar_carrinho()
+                    st.session_state.pedido_carrinho = (numero_pedido, len(pedido["itens"]))
+                    st.rerun()
+                    
+                except Exception as e:
+                    st.error(f"""
+                    ❌ Erro ao criar pedido:
+                    
+                    {str(e)}
+                    
+                    Por favor, tente novamente ou contate o suporte.
+                    """)
+        if st.button("🗑️ Esvaziar carrinho"):
+            self._esvaziar_carrinho()
+            st.rerun()
+        st.markdown('</div>', unsafe_allow_html=True)
+
     def mostrar_interface(self):
         """Mostra a interface principal do pedido"""
         st.markdown('<p class="titulo-secao">📦 Novo Pedido de Bobina</p>', unsafe_allow_html=True)
         
-        # Carregar dados da planilha
-        dados = self.controller.carregar_dados()
+        # Índice do catálogo (construído uma vez por versão da planilha)
+        indice = self.controller.obter_indice()
         
         # 1. Seleção do Cliente
-        clientes = sorted(list(set(item.cliente for item in dados)))
+        clientes = indice.clientes()
         cliente = st.selectbox(
             "Cliente",
             [""] + clientes,
@@ -298,10 +450,7 @@ class PedidoView:
         # 2. Seleção do RACK
         rack = None
         if cliente:
-            racks_do_cliente = sorted(list(set(
-                item.rack for item in dados 
-                if item.cliente.lower() == cliente.lower()
-            )))
+            racks_do_cliente = indice.racks(cliente)
             rack = st.selectbox(
                 "RACK",
                 [""] + racks_do_cliente,
@@ -310,17 +459,16 @@ class PedidoView:
             
             # Mostrar posições e contagem se um RACK foi selecionado
             if rack:
-                self._mostrar_posicoes_e_contagem(dados, cliente, rack)
+                self._mostrar_posicoes_e_contagem(indice, cliente, rack)
                 
                 # Se uma posição foi selecionada, mostrar o formulário
                 if 'posicao_selecionada' in st.session_state:
-                    item_selecionado = next(
-                        (item for item in dados 
-                         if item.cliente.lower() == cliente.lower()
-                         and item.rack.lower() == rack.lower()
-                         and item.locacao.lower() == st.session_state.posicao_selecionada.lower()),
-                        None
+                    item_selecionado = indice.item(
+                        cliente, rack, st.session_state.posicao_selecionada
                     )
                     
                     if item_selecionado:
-                        self._mostrar_formulario_requisicao(item_selecionado) 
\ No newline at end of file
+                        self._mostrar_formulario_requisicao(item_selecionado)
+        
+        # 3. Carrinho com as posições já escolhidas
+        self._mostrar_carrinho() 
\ No newline at end of file